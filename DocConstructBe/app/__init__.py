@@ -1,8 +1,8 @@
 import os
 from flask import Flask
 
-from config.sys_config import DOCUMENTS_FOLDER
-from data_model.models import init_tables
+from config.sys_config import DOCUMENTS_FOLDER, THUMBNAILS_FOLDER
+from database.migrations import upgrade_database
 from app.errors import handle_error
 from flask_executor import Executor
 
@@ -23,16 +23,20 @@ def create_app():
         DOCUMENTS_FOLDER=DOCUMENTS_FOLDER,
 
     )
-    init_tables()
+    upgrade_database()
 
     app.register_error_handler(code_or_exception=Exception, f=handle_error)
 
     with app.app_context():
         from .routes import init_routes
         init_routes(app)
+        from .commands import init_commands
+        init_commands(app)
+        from .db_routing import init_db_routing
+        init_db_routing(app)
 
         # Create necessary directories
-        directories = [DOCUMENTS_FOLDER]
+        directories = [DOCUMENTS_FOLDER, THUMBNAILS_FOLDER]
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
 
@@ -1,14 +1,22 @@
 import datetime
+import functools
 from datetime import date, timedelta
 import os
-import shutil
 import tempfile
 import mimetypes
-from config.sys_config import DOCUMENTS_FOLDER
+from sqlalchemy import case, delete, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, joinedload, selectinload
+from sqlalchemy.sql import Select
+from storage.storage import document_key, get_storage
 from utils.data_extract import ExtractProfessional
 from utils.doc_to_bin import process_pdf_image_to_binary,process_image_to_binary
+from utils.pagination import paginate, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
+from utils.search import ranked_search
+from importer.professionals import read_professional_rows
 from doc_map.doc_map import DocumentMap
 from app.errors import (
+    ValidationError,
     ProjectDoesNotExist,
     ProjectAlreadyExists,
     ProfessionalDoesNotExist,
@@ -25,8 +33,24 @@ from data_model.models import (
     ProjectDocument,
     ProfessionalDocument,
     PermitOwner, 
+    DocumentIngest,
+    PendingFileDeletion,
+    DeletedEntity,
+    ProjectCompliance,
+    LicenseStatusChange,
+    ProjectCounter,
+    license_warning_date,
+)
+from database.database import (
+    db_session,
+    session_scope,
+    dialect_insert,
+    insert_unless_conflicting,
+    after_commit,
+    after_rollback,
+    UUID_F,
+    db_now,
 )
-from database.database import db_session
 from data_model.enum import (
     ProjectStatus,
     ProfessionalStatus,
@@ -37,40 +61,114 @@ from data_model.enum import (
     DocumentStatus
 )
 from doc_map.doc_map import DocumentFiller
+from config.sys_config import COMPLIANCE_SUMMARY, LICENSE_EXPIRY_NOTICE_DAYS
+from notifications.notifier import Notifier, get_notifier
+from cache.cache import get_cache
 from app.errors import InvalidFileFormat
 
 
 class ProjectManager:
+    # Named loader strategies, so each read endpoint issues a fixed number of queries
+    LIST_PROFILE = 'list'
+    DETAIL_PROFILE = 'detail'
+
+    @staticmethod
+    def query_options(profile: str = None) -> list:
+        profiles = {
+            ProjectManager.LIST_PROFILE: [
+                joinedload(Project.permit_owner),
+            ],
+            ProjectManager.DETAIL_PROFILE: [
+                joinedload(Project.permit_owner),
+                selectinload(Project.professionals).joinedload(ProjectProfessional.professional),
+                selectinload(Project.documents),
+            ],
+        }
+        return profiles.get(profile, [])
+
+    # Read cache kind of the project detail payload, see invalidate_details()
+    DETAIL_CACHE = 'project_detail'
+
+    @staticmethod
+    def invalidate_details(project_ids: list[str]) -> None:
+        """Retire the cached detail payloads of the given projects; call it after the commit."""
+        get_cache().invalidate(ProjectManager.DETAIL_CACHE, project_ids)
+
+    # Keyset sort keys, each backed by a (column, id) index
+    SORT_KEYS = {
+        'name': Project.name,
+        'status_due_date': Project.status_due_date,
+        'created_at': Project.created_at,
+    }
+
+    @staticmethod
+    def filter_query(status: ProjectStatus = None, permit_owner_id: str = None, due_date_from: date = None,
+                     due_date_to: date = None, profile: str = LIST_PROFILE) -> Query:
+        query = db_session.query(Project).options(*ProjectManager.query_options(profile))
+        if status:
+            query = query.filter(Project.status == enum_to_value(status))
+        if permit_owner_id:
+            query = query.filter(Project.permit_owner_id == permit_owner_id)
+        if due_date_from:
+            query = query.filter(Project.status_due_date >= due_date_from)
+        if due_date_to:
+            query = query.filter(Project.status_due_date <= due_date_to)
+        return query
+
     @staticmethod
-    def get_all() -> list[Project]:
-        return db_session.query(Project).all()
+    def get_all(profile: str = LIST_PROFILE) -> list[Project]:
+        return ProjectManager.filter_query(profile=profile).all()
+
+    # Columns the search endpoint matches, mirrored by the indexes in migration 0005
+    SEARCH_COLUMNS = [Project.name, Project.request_number, Project.description]
 
     @staticmethod
-    def get_by_id(project_id: str) -> Project:
-        project = db_session.query(Project).filter(Project.id == project_id).first()
+    def search(search_text: str, limit: int, offset: int = 0) -> list[Project]:
+        query = db_session.query(Project).options(*ProjectManager.query_options(ProjectManager.LIST_PROFILE))
+        query = ranked_search(query, Project.id, ProjectManager.SEARCH_COLUMNS, search_text)
+        return query.offset(offset).limit(limit).all()
+
+    @staticmethod
+    def get_page(limit: int = None, cursor: str = None, sort: str = 'name', descending: bool = False,
+                 **filters) -> tuple[list[Project], str | None]:
+        """One page of projects and the cursor of the next one. Without limit or cursor every match is returned."""
+        query = ProjectManager.filter_query(**filters)
+        if limit is None and not cursor:
+            return query.all(), None
+        return paginate(query, sort, ProjectManager.SORT_KEYS[sort], Project.id, limit or DEFAULT_PAGE_SIZE,
+                        cursor=cursor, descending=descending)
+
+    @staticmethod
+    def get_by_id(project_id: str, profile: str = None) -> Project:
+        project = db_session.query(Project).options(*ProjectManager.query_options(profile)).filter(
+            Project.id == project_id
+        ).first()
         if not project:
             raise ProjectDoesNotExist()
         return project
 
     @staticmethod
     def create(name: str,  request_number: str, status: ProjectStatus, description: str = None, permit_owner: PermitOwner = None,
-               status_due_date: date = None) -> Project:
-        existing_project = db_session.query(Project).filter(
-            (Project.name == name) | (Project.request_number == request_number)
-        ).first()
-        if existing_project:
-            raise ProjectAlreadyExists()
-        project = Project(
+               status_due_date: date = None, professional_ids: list[str] = None) -> Project:
+        if permit_owner is not None:
+            db_session.add(permit_owner)
+            db_session.flush()
+        # The unique name and request number keys reject duplicates as part of the insert itself
+        project = insert_unless_conflicting(Project(
             name=name,
             request_number=request_number,
             description=description,
-            permit_owner=permit_owner,
+            permit_owner=None,
+            permit_owner_id=permit_owner.id if permit_owner is not None else None,
             status=enum_to_value(status),
             status_due_date=status_due_date,
-        )
-        project.created_at = project.updated_at = datetime.datetime.now()
-        db_session.add(project)
-        db_session.commit()
+        ))
+        if project is None:
+            raise ProjectAlreadyExists()
+        if professional_ids:
+            ProjectManager._change_professionals(project.id, attach=professional_ids, field='professionals')
+        ComplianceManager.refresh_summary([project.id])
+        db_session.flush()
         return project
 
     def update(self, project_id: str, name: str, status: ProjectStatus, description: str = None,permit_owner: PermitOwner = None,
@@ -85,36 +183,55 @@ class ProjectManager:
         project.firefighting_number = firefighting_number
         project.status = enum_to_value(status)
         project.status_due_date = status_due_date
-        project.updated_at = datetime.datetime.now()
-        db_session.commit()
+        try:
+            db_session.flush()
+        except IntegrityError:
+            raise ProjectAlreadyExists()
+        after_commit(ProjectManager.invalidate_details, [project_id])
         return project
 
-    def delete(self, project_id: str) -> None:
-        project = self.get_by_id(project_id=project_id)
-        db_session.delete(project)
-        db_session.commit()
+    @staticmethod
+    def delete(project_id: str) -> None:
+        document_ids = select(ProjectDocument.id).where(ProjectDocument.project_id == project_id)
+        db_session.execute(document_ids.with_for_update())
+        queue_file_deletions(select(ProjectDocument.file_path).where(ProjectDocument.project_id == project_id))
+        remove_document_ingests(document_ids)
+        # Documents and memberships go with it through ON DELETE CASCADE
+        deleted = db_session.execute(
+            delete(Project).where(Project.id == project_id).returning(Project.id)
+        ).first()
+        if not deleted:
+            raise ProjectDoesNotExist()
+        db_session.add(DeletedEntity(entity_type=DeletedEntity.PROJECT, entity_id=project_id))
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
 
     @staticmethod
     def get_statuses() -> list[str]:
         return [status.value for status in ProjectStatus]
 
     def attach_professional(self, project_id: str, professional_id: str) -> ProjectProfessional:
-        project = self.get_by_id(project_id=project_id)
-        professional = ProfessionalManager().get_by_id(professional_id=professional_id)
-        # Check if a relationship already exists
-        existing = db_session.query(ProjectProfessional).filter(
-            ProjectProfessional.project_id == project.id,
-            ProjectProfessional.professional_id == professional.id
-        ).first()
-        if existing:
+        # Inserts the pair only if both rows exist and it is not attached yet, all in one statement
+        pair = select(
+            literal(UUID_F.uuid_allocator(), UUID_F()),
+            Project.id,
+            Professional.id,
+        ).join(Professional, Professional.id == professional_id).where(Project.id == project_id)
+        statement = dialect_insert(ProjectProfessional).from_select(
+            ['id', 'project_id', 'professional_id'], pair
+        ).on_conflict_do_nothing().returning(ProjectProfessional)
+        project_professional = db_session.scalars(statement).first()
+        if project_professional is None:
+            # Only a failed attach pays for finding out why
+            self.get_by_id(project_id=project_id)
+            ProfessionalManager().get_by_id(professional_id=professional_id)
             raise ProfessionalAlreadyInProject()
-        project_professional = ProjectProfessional(
-            project_id=project_id,
-            professional_id=professional_id,
-            created_at=datetime.datetime.now(),
+        ProjectCounterManager.count_memberships(
+            1, ProjectProfessional.project_id == project_id, ProjectProfessional.professional_id == professional_id
         )
-        db_session.add(project_professional)
-        db_session.commit()
+        ComplianceManager.refresh_summary([project_id])
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
         return project_professional
 
     @staticmethod
@@ -127,8 +244,68 @@ class ProjectManager:
         if not project_professional:
             raise ProfessionalNotInProject()
 
+        ProjectCounterManager.count_memberships(
+            -1, ProjectProfessional.project_id == project_id, ProjectProfessional.professional_id == professional_id
+        )
         db_session.delete(project_professional)
-        db_session.commit()
+        ComplianceManager.refresh_summary([project_id])
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
+
+    @staticmethod
+    def update_professionals(project_id: str, attach: list[str] = (), detach: list[str] = ()) -> dict:
+        """
+        Attach and detach many professionals in one transaction. Pairs that are already in
+        the requested state are left alone; the result lists the ones that changed.
+        """
+        if not db_session.query(Project.id).filter(Project.id == project_id).first():
+            raise ProjectDoesNotExist()
+        overlap = set(attach) & set(detach)
+        if overlap:
+            raise ValidationError(params={"validation_errors": {
+                "detach": f"Cannot attach and detach the same professionals: {', '.join(sorted(overlap))}"
+            }})
+        changes = ProjectManager._change_professionals(project_id, attach=attach, detach=detach)
+        ComplianceManager.refresh_summary([project_id])
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
+        return changes
+
+    @staticmethod
+    def _change_professionals(project_id: str, attach: list[str] = (), detach: list[str] = (),
+                              field: str = 'attach') -> dict:
+        """Set-based attach and detach in the current transaction, without committing it."""
+        changes = {'attached': [], 'detached': []}
+        attach = list(dict.fromkeys(attach))
+        if attach:
+            # One IN query tells which of the requested professionals exist
+            found = set(db_session.scalars(select(Professional.id).where(Professional.id.in_(attach))))
+            missing = [professional_id for professional_id in attach if professional_id not in found]
+            if missing:
+                raise ValidationError(params={"validation_errors": {
+                    field: f"Professionals not found: {', '.join(missing)}"
+                }})
+            table = ProjectProfessional.__table__
+            statement = dialect_insert(table).values([
+                {'id': UUID_F.uuid_allocator(), 'project_id': project_id, 'professional_id': professional_id}
+                for professional_id in attach
+            ]).on_conflict_do_nothing().returning(table.c.professional_id)
+            changes['attached'] = list(db_session.execute(statement).scalars())
+            if changes['attached']:
+                ProjectCounterManager.count_memberships(
+                    1, table.c.project_id == project_id, table.c.professional_id.in_(changes['attached'])
+                )
+        if detach:
+            table = ProjectProfessional.__table__
+            ProjectCounterManager.count_memberships(
+                -1, table.c.project_id == project_id, table.c.professional_id.in_(list(detach))
+            )
+            statement = delete(table).where(
+                table.c.project_id == project_id,
+                table.c.professional_id.in_(list(detach)),
+            ).returning(table.c.professional_id)
+            changes['detached'] = list(db_session.execute(statement).scalars())
+        return changes
 
     @staticmethod
     def get_document(project_id: str, document_id: str) -> ProjectDocument:
@@ -140,23 +317,27 @@ class ProjectManager:
             raise ProjectDocumentNotFound()
         return document
 
+    @staticmethod
+    def get_documents(project_id: str, document_type: ProjectDocumentType = None,
+                      document_status: DocumentStatus = None) -> list[ProjectDocument]:
+        query = db_session.query(ProjectDocument).filter(ProjectDocument.project_id == project_id)
+        if document_type:
+            query = query.filter(ProjectDocument.document_type == enum_to_value(document_type))
+        if document_status:
+            query = query.filter(ProjectDocument.status == enum_to_value(document_status))
+        return query.order_by(ProjectDocument.document_type, ProjectDocument.created_at).all()
+
     def add_document(self, file_path: str, project_id: str, document_type: str,
                      document_name: str, document_status: DocumentStatus) -> ProjectDocument:
-        self.get_by_id(project_id=project_id)
-        # Create projects documents directory if it doesn't exist
-        projects_dir = os.path.join(DOCUMENTS_FOLDER, 'projects')
-        if not os.path.exists(projects_dir):
-            os.makedirs(projects_dir, exist_ok=True)
-        # Create directory for this project if it doesn't exist
-        project_dir = os.path.join(projects_dir, project_id)
-        if not os.path.exists(project_dir):
-            os.makedirs(project_dir, exist_ok=True)
+        # Answered from the session without a query when the request already loaded the project
+        if db_session.get(Project, project_id) is None:
+            raise ProjectDoesNotExist()
         # Generate a unique filename
         filename = f"{document_type}_{document_name}"
-        dest_path = os.path.join(project_dir, filename)
+        dest_path = document_key('projects', project_id, filename)
         # Copy the file to the destination
         if os.path.exists(file_path):
-            shutil.copy2(file_path, dest_path)
+            store_document_file(dest_path, file_path)
 
         try:
           status = document_status.value if hasattr(document_status, 'value') else document_status
@@ -169,10 +350,12 @@ class ProjectManager:
             name=document_name,
             file_path=dest_path,
             status=status,
-            created_at=datetime.datetime.now(),
         )
         db_session.add(document)
-        db_session.commit()
+        ProjectCounterManager.count_document(project_id, status, 1)
+        ComplianceManager.refresh_summary([project_id])
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
         return document
 
     @staticmethod
@@ -186,20 +369,18 @@ class ProjectManager:
         document = db_session.query(ProjectDocument).filter(
             ProjectDocument.id == document_id,
             ProjectDocument.project_id == project_id
-        ).first()
+        ).with_for_update().first()
         if not document:
             raise ProjectDocumentNotFound()
-        # Remove the file from the filesystem if it exists
-        if document.file_path and os.path.exists(document.file_path):
-            try:
-                os.remove(document.file_path)
-            except OSError as e:
-                # Log the error but continue with database deletion
-                import logging
-                logging.error(f"Error removing file {document.file_path}: {e}")
+        # The file itself is removed by the reclaimer once this has committed
+        queue_file_deletions(select(ProjectDocument.file_path).where(ProjectDocument.id == document_id))
+        remove_document_ingests([document_id])
         # Remove the document record from the database
         db_session.delete(document)
-        db_session.commit()
+        ProjectCounterManager.count_document(project_id, document.status, -1)
+        ComplianceManager.refresh_summary([project_id])
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, [project_id])
 
     @staticmethod
     def get_document_types() -> list[str]:
@@ -220,16 +401,16 @@ class ProjectManager:
 class ProjectDocumentManager:
 
     @staticmethod
-    def get_document_project_professionals(project_id: str, document_type: ProjectDocumentType):
-        professionals = []
-        doc_professionals = DocumentMap.DOCUMENT_PROFESSIONAL_MAP.get(document_type.name, [])
-        doc_professionals_types = [professional.value for professional in doc_professionals]
-        project_professionals = db_session.query(ProjectProfessional).filter(ProjectProfessional.project_id == project_id).all()
-        for project_professional in project_professionals:
-            professional = db_session.query(Professional).filter(Professional.id == project_professional.professional_id).first()
-            if professional.professional_type in doc_professionals_types:
-                professionals.append(professional)
-        return professionals
+    def get_document_project_professionals(project_id: str, document_type: ProjectDocumentType) -> list[Professional]:
+        doc_professionals_types = DocumentMap.DOCUMENT_PROFESSIONAL_TYPES.get(document_type.name, [])
+        if not doc_professionals_types:
+            return []
+        return db_session.query(Professional).join(
+            ProjectProfessional, Professional.id == ProjectProfessional.professional_id
+        ).filter(
+            ProjectProfessional.project_id == project_id,
+            Professional.professional_type.in_(doc_professionals_types)
+        ).all()
     
     @staticmethod
     def get_document_professionals_types(document_type: ProjectDocumentType):
@@ -238,13 +419,8 @@ class ProjectDocumentManager:
     
     @staticmethod
     def get_document_professionals(document_type: ProjectDocumentType,professionals: list[Professional]):
-        doc_professionals_types = ProjectDocumentManager.get_document_professionals_types(document_type)
-        document_professionals = []
-        for professional in professionals:
-            prof_type_value = ProfessionalManager.get_professional_type_by_value(professional.professional_type)
-            if prof_type_value.name in doc_professionals_types:
-                document_professionals.append(professional)
-        return document_professionals
+        doc_professionals_types = DocumentMap.DOCUMENT_PROFESSIONAL_TYPES.get(document_type.name, [])
+        return [professional for professional in professionals if professional.professional_type in doc_professionals_types]
     
     
     @staticmethod
@@ -255,6 +431,18 @@ class ProjectDocumentManager:
 
 
 class ProfessionalManager:
+    # Named loader strategies, so each read endpoint issues a fixed number of queries
+    DETAIL_PROFILE = 'detail'
+
+    @staticmethod
+    def query_options(profile: str = None) -> list:
+        profiles = {
+            ProfessionalManager.DETAIL_PROFILE: [
+                selectinload(Professional.documents),
+            ],
+        }
+        return profiles.get(profile, [])
+
     @staticmethod
     def get_types() -> list[str]:
         return [professional_type.value for professional_type in ProfessionalType]
@@ -263,31 +451,111 @@ class ProfessionalManager:
     def get_statuses() -> list[str]:
         return [status.value for status in ProfessionalStatus]
 
+    # Keyset sort keys, each backed by a (column, id) index
+    SORT_KEYS = {
+        'name': Professional.name,
+        'license_expiration_date': Professional.license_expiration_date,
+        'created_at': Professional.created_at,
+    }
+
+    @staticmethod
+    def status_filter(status: ProfessionalStatus):
+        """Professional.status as a range condition on the indexed expiration date."""
+        today = date.today()
+        warning_date = license_warning_date()
+        if status == ProfessionalStatus.EXPIRED:
+            return Professional.license_expiration_date < today
+        if status == ProfessionalStatus.WARNING:
+            return Professional.license_expiration_date.between(today, warning_date - timedelta(days=1))
+        return Professional.license_expiration_date >= warning_date
+
+    @staticmethod
+    def filter_query(professional_type: ProfessionalType = None, status: ProfessionalStatus = None) -> Query:
+        query = db_session.query(Professional)
+        if professional_type:
+            query = query.filter(Professional.professional_type == enum_to_value(professional_type))
+        if status:
+            query = query.filter(ProfessionalManager.status_filter(status))
+        return query
+
+    @staticmethod
+    def refresh_statuses() -> int:
+        """
+        Rewrite the stored status of professionals whose licence crossed a threshold and record
+        each change for the expiry digest. Returns the row count. Reads derive the status
+        themselves, so only the scheduled command and the notifier run this.
+        """
+        with session_scope() as session:
+            # Locked, so a concurrent refresh waits and then finds nothing left to record
+            changed = session.execute(
+                select(Professional.id, Professional.stored_status, Professional.status,
+                       Professional.license_expiration_date)
+                .where(Professional.stored_status != Professional.status)
+                .with_for_update()
+            ).all()
+            if changed:
+                session.execute(insert(LicenseStatusChange), [{
+                    'professional_id': row.id,
+                    'old_status': row.stored_status,
+                    'new_status': row.status,
+                    'license_expiration_date': row.license_expiration_date,
+                } for row in changed])
+            updated = session.query(Professional).filter(Professional.stored_status != Professional.status).update(
+                {Professional.stored_status: Professional.status}, synchronize_session=False
+            )
+        if updated:
+            # The change feed and cached project details carry the status
+            ProjectManager.invalidate_details(ProfessionalManager.project_ids([row.id for row in changed]))
+        return updated
+
+    @staticmethod
+    def project_ids(professional_ids: list[str]) -> list[str]:
+        """Projects the given professionals are attached to."""
+        if not professional_ids:
+            return []
+        return list(db_session.scalars(
+            select(ProjectProfessional.project_id)
+            .where(ProjectProfessional.professional_id.in_(professional_ids))
+            .distinct()
+        ))
+
     @staticmethod
     def get_all() -> list[Professional]:
-        professionals = db_session.query(Professional).all()
-        for professional in professionals:
-            professional.status = ProfessionalManager.get_professional_status(professional.license_expiration_date).value
-        return professionals
+        return db_session.query(Professional).all()
+
+    # Columns the search endpoint matches, mirrored by the indexes in migration 0005
+    SEARCH_COLUMNS = [Professional.name, Professional.national_id, Professional.license_number, Professional.email]
 
     @staticmethod
-    def get_by_id(professional_id: str) -> Professional:
-        professional = db_session.query(Professional).filter(Professional.id == professional_id).first()
+    def search(search_text: str, limit: int, offset: int = 0) -> list[Professional]:
+        query = ranked_search(db_session.query(Professional), Professional.id,
+                              ProfessionalManager.SEARCH_COLUMNS, search_text)
+        return query.offset(offset).limit(limit).all()
+
+    @staticmethod
+    def get_page(limit: int = None, cursor: str = None, sort: str = 'name', descending: bool = False,
+                 **filters) -> tuple[list[Professional], str | None]:
+        """One page of professionals and the cursor of the next one. Without limit or cursor every match is returned."""
+        query = ProfessionalManager.filter_query(**filters)
+        if limit is None and not cursor:
+            return query.all(), None
+        return paginate(query, sort, ProfessionalManager.SORT_KEYS[sort], Professional.id,
+                        limit or DEFAULT_PAGE_SIZE, cursor=cursor, descending=descending)
+
+    @staticmethod
+    def get_by_id(professional_id: str, profile: str = None) -> Professional:
+        professional = db_session.query(Professional).options(*ProfessionalManager.query_options(profile)).filter(
+            Professional.id == professional_id
+        ).first()
         if not professional:
             raise ProfessionalDoesNotExist()
-        professional.status = ProfessionalManager.get_professional_status(professional.license_expiration_date).value
         return professional
 
     @staticmethod
     def create(name: str, national_id: str, email: str, phone: str, address: str, license_number: str,
                license_expiration_date: date, professional_type: str, license_file_path: str = None) -> Professional:
-        existing_professional = db_session.query(Professional).filter(
-            (Professional.national_id == national_id) |
-            (Professional.email == email)
-        ).first()
-        if existing_professional:
-            raise ProfessionalAlreadyExists()
-        professional = Professional(
+        # The unique national ID and email keys reject duplicates as part of the insert itself
+        professional = insert_unless_conflicting(Professional(
             name=name,
             national_id=national_id,
             email=email,
@@ -296,14 +564,11 @@ class ProfessionalManager:
             license_number=license_number,
             license_expiration_date=license_expiration_date,
             professional_type=professional_type,
-            status=ProfessionalManager.get_professional_status(license_expiration_date).value,
+            stored_status=ProfessionalManager.get_professional_status(license_expiration_date).value,
             license_file_path=license_file_path if license_file_path else '',
-            created_at=datetime.datetime.now(),
-            updated_at=datetime.datetime.now()
-        )
-
-        db_session.add(professional)
-        db_session.commit()
+        ))
+        if professional is None:
+            raise ProfessionalAlreadyExists()
         
         # If license_file_path is provided, add it as a document
         if license_file_path:
@@ -318,9 +583,87 @@ class ProfessionalManager:
             
         return professional
 
+    IMPORT_BATCH_SIZE = 1000
+
+    @staticmethod
+    def bulk_import(file_path: str) -> dict:
+        """
+        Create professionals from a CSV/XLSX registry in batches of multi-row inserts.
+        Valid rows are created even when others are rejected; the report lists every rejected row.
+        The batches are only flushed: the caller's unit of work commits the import as a whole,
+        so an unexpected failure partway leaves nothing half imported.
+        """
+        report = {'total': 0, 'created': 0, 'errors': []}
+        batch = []
+        for line_number, fields, errors in read_professional_rows(file_path):
+            report['total'] += 1
+            if not errors:
+                try:
+                    # Runs the same validators as a single create
+                    Professional(**fields)
+                except ValidationError as e:
+                    errors = e.error_attributes[ValidationError.ERROR_PARAMS]['validation_errors']
+            if errors:
+                report['errors'].append({'row': line_number, 'errors': errors})
+                continue
+            batch.append((line_number, fields))
+            if len(batch) >= ProfessionalManager.IMPORT_BATCH_SIZE:
+                ProfessionalManager._insert_import_batch(batch, report)
+                batch = []
+        if batch:
+            ProfessionalManager._insert_import_batch(batch, report)
+        report['errors'].sort(key=lambda error: error['row'])
+        return report
+
+    @staticmethod
+    def _insert_import_batch(batch: list[tuple[int, dict]], report: dict) -> None:
+        national_ids = {fields['national_id'] for _, fields in batch}
+        emails = {fields['email'] for _, fields in batch}
+        existing = db_session.query(Professional.national_id, Professional.email).filter(
+            or_(Professional.national_id.in_(national_ids), Professional.email.in_(emails))
+        ).all()
+        # Rows earlier in the file claim their keys too, so in-file duplicates are caught here
+        taken_national_ids = {national_id for national_id, _ in existing}
+        taken_emails = {email for _, email in existing}
+
+        rows = {}
+        for line_number, fields in batch:
+            if fields['national_id'] in taken_national_ids or fields['email'] in taken_emails:
+                report['errors'].append({'row': line_number, 'errors': {
+                    'national_id': 'Professional with this national ID or email already exists'
+                }})
+                continue
+            taken_national_ids.add(fields['national_id'])
+            taken_emails.add(fields['email'])
+            professional_id = UUID_F.uuid_allocator()
+            rows[professional_id] = (line_number, dict(
+                fields,
+                id=professional_id,
+                status=ProfessionalManager.get_professional_status(fields['license_expiration_date']).value,
+                license_file_path='',
+            ))
+        if not rows:
+            return
+
+        statement = dialect_insert(Professional.__table__).values(
+            [values for _, values in rows.values()]
+        ).on_conflict_do_nothing().returning(Professional.__table__.c.id)
+        inserted_ids = set(db_session.execute(statement).scalars())
+
+        report['created'] += len(inserted_ids)
+        for professional_id, (line_number, _) in rows.items():
+            if professional_id not in inserted_ids:
+                report['errors'].append({'row': line_number, 'errors': {
+                    'national_id': 'Professional with this national ID or email was created concurrently'
+                }})
+
     def update(self, professional_id: str, name: str, national_id: str, email: str, phone: str, license_number: str,
                address: str, license_expiration_date: date, professional_type: str, license_file_path: str = None) -> Professional:
         professional = self.get_by_id(professional_id=professional_id)
+        type_changed = professional.professional_type != professional_type
+        if type_changed:
+            # Still counted under the stored type until the change is flushed below
+            ProjectCounterManager.count_memberships(-1, ProjectProfessional.professional_id == professional_id)
         professional.name = name
         professional.national_id = national_id
         professional.email = email
@@ -329,9 +672,19 @@ class ProfessionalManager:
         professional.address = address
         professional.license_expiration_date = license_expiration_date
         professional.professional_type = professional_type
-        professional.status = ProfessionalManager.get_professional_status(license_expiration_date).value
-        professional.updated_at = date.today()
-        db_session.commit()
+        professional.stored_status = ProfessionalManager.get_professional_status(license_expiration_date).value
+        project_ids = ProfessionalManager.project_ids([professional_id])
+        try:
+            if type_changed:
+                db_session.flush()
+                ProjectCounterManager.count_memberships(1, ProjectProfessional.professional_id == professional_id)
+            # The type decides which requirements the professional fills in each project
+            ComplianceManager.refresh_summary(project_ids)
+            db_session.flush()
+        except IntegrityError:
+            raise ProfessionalAlreadyExists()
+        # Project pages list the professional's name, contact, type and status
+        after_commit(ProjectManager.invalidate_details, project_ids)
        
         # If license_file_path is provided, add it as a document
         if license_file_path:
@@ -345,10 +698,26 @@ class ProfessionalManager:
             )
         return professional
 
-    def delete(self, professional_id: str) -> None:
-        professional = self.get_by_id(professional_id)
-        db_session.delete(professional)
-        db_session.commit()
+    @staticmethod
+    def delete(professional_id: str) -> None:
+        affected_project_ids = ProfessionalManager.project_ids([professional_id])
+        document_ids = select(ProfessionalDocument.id).where(ProfessionalDocument.professional_id == professional_id)
+        db_session.execute(document_ids.with_for_update())
+        queue_file_deletions(
+            select(ProfessionalDocument.file_path).where(ProfessionalDocument.professional_id == professional_id)
+        )
+        remove_document_ingests(document_ids)
+        ProjectCounterManager.count_memberships(-1, ProjectProfessional.professional_id == professional_id)
+        # Documents and project memberships go with it through ON DELETE CASCADE
+        deleted = db_session.execute(
+            delete(Professional).where(Professional.id == professional_id).returning(Professional.id)
+        ).first()
+        if not deleted:
+            raise ProfessionalDoesNotExist()
+        db_session.add(DeletedEntity(entity_type=DeletedEntity.PROFESSIONAL, entity_id=professional_id))
+        ComplianceManager.refresh_summary(affected_project_ids)
+        db_session.flush()
+        after_commit(ProjectManager.invalidate_details, affected_project_ids)
 
     @staticmethod
     def get_document(professional_id: str, document_id: str) -> ProfessionalDocument:
@@ -362,21 +731,15 @@ class ProfessionalManager:
 
     def add_document(self, file_path: str, professional_id: str, document_type: str,
                      document_name: str) -> ProfessionalDocument:
-        self.get_by_id(professional_id=professional_id)
-        # Create professionals documents directory if it doesn't exist
-        professionals_dir = os.path.join(DOCUMENTS_FOLDER, 'professionals')
-        if not os.path.exists(professionals_dir):
-            os.makedirs(professionals_dir, exist_ok=True)
-        # Create directory for this professional if it doesn't exist
-        professional_dir = os.path.join(professionals_dir, professional_id)
-        if not os.path.exists(professional_dir):
-            os.makedirs(professional_dir, exist_ok=True)
+        # Answered from the session without a query when the request already loaded the professional
+        if db_session.get(Professional, professional_id) is None:
+            raise ProfessionalDoesNotExist()
         # Generate a unique filename
         filename = f"{document_type}_{document_name}"
-        dest_path = os.path.join(professional_dir, filename)
+        dest_path = document_key('professionals', professional_id, filename)
         # Copy the file to the destination
         if os.path.exists(file_path):
-            shutil.copy2(file_path, dest_path)
+            store_document_file(dest_path, file_path)
         # Create document record in database
         document = ProfessionalDocument(
             professional_id=professional_id,
@@ -384,10 +747,9 @@ class ProfessionalManager:
             name=document_name,
             file_path=dest_path,
             status=enum_to_value(DocumentStatus.UPLOADED),
-            created_at=datetime.datetime.now(),
         )
         db_session.add(document)
-        db_session.commit()
+        db_session.flush()
         return document
 
     @staticmethod
@@ -395,20 +757,15 @@ class ProfessionalManager:
         document = db_session.query(ProfessionalDocument).filter(
             ProfessionalDocument.id == document_id,
             ProfessionalDocument.professional_id == professional_id
-        ).first()
+        ).with_for_update().first()
         if not document:
             raise ProfessionalDocumentNotFound()
-        # Remove the file from the filesystem if it exists
-        if document.file_path and os.path.exists(document.file_path):
-            try:
-                os.remove(document.file_path)
-            except OSError as e:
-                # Log the error but continue with database deletion
-                import logging
-                logging.error(f"Error removing file {document.file_path}: {e}")
+        # The file itself is removed by the reclaimer once this has committed
+        queue_file_deletions(select(ProfessionalDocument.file_path).where(ProfessionalDocument.id == document_id))
+        remove_document_ingests([document_id])
         # Remove the document record from the database
         db_session.delete(document)
-        db_session.commit()
+        db_session.flush()
 
     @staticmethod
     def get_document_types() -> list[str]:
@@ -434,7 +791,7 @@ class ProfessionalManager:
     def get_professional_status(license_expiration_date: date) -> ProfessionalStatus:
         if license_expiration_date < date.today():
             return ProfessionalStatus.EXPIRED
-        elif license_expiration_date < date.today() + timedelta(days=30):
+        elif license_expiration_date < license_warning_date():
             return ProfessionalStatus.WARNING
         else:
             return ProfessionalStatus.ACTIVE
@@ -444,14 +801,464 @@ class ProfessionalManager:
         return ProfessionalType.map_to_value(professional_type_value)
 
 
+class LicenseExpiryManager:
+    """
+    Licence expiry notices: the professionals on projects still in progress whose licence runs
+    out soon, and the stored status changes recorded by ProfessionalManager.refresh_statuses().
+    """
+    # Every project but a finished one is in progress, including one whose status was never set
+    CLOSED_PROJECT_STATUSES = [ProjectStatus.FINAL.value]
+    DIGEST_BATCH_SIZE = 200
+
+    @staticmethod
+    def upcoming_expiries(days: int = None) -> list[dict]:
+        """Professionals on active projects whose licence expires within days, soonest first."""
+        today = date.today()
+        days = days or LICENSE_EXPIRY_NOTICE_DAYS
+        # One range scan of the expiration date index, joined to the memberships
+        rows = db_session.execute(
+            select(
+                Professional.id,
+                Professional.name,
+                Professional.email,
+                Professional.professional_type,
+                Professional.license_expiration_date,
+                Project.id.label('project_id'),
+                Project.name.label('project_name'),
+            )
+            .join(ProjectProfessional, ProjectProfessional.professional_id == Professional.id)
+            .join(Project, Project.id == ProjectProfessional.project_id)
+            .where(
+                Professional.license_expiration_date.between(today, today + timedelta(days=days)),
+                or_(Project.status.is_(None), Project.status.not_in(LicenseExpiryManager.CLOSED_PROJECT_STATUSES)),
+            )
+            .order_by(Professional.license_expiration_date, Professional.id, Project.name)
+        ).all()
+        expiries = {}
+        for row in rows:
+            expiry = expiries.setdefault(row.id, {
+                'id': row.id,
+                'name': row.name,
+                'email': row.email,
+                'professional_type': row.professional_type,
+                'license_expiration_date': row.license_expiration_date.isoformat(),
+                'days_left': (row.license_expiration_date - today).days,
+                'projects': [],
+            })
+            expiry['projects'].append({'id': row.project_id, 'name': row.project_name})
+        return list(expiries.values())
+
+    @staticmethod
+    def notify(notifier: Notifier = None, days: int = None) -> dict:
+        """
+        Refresh the stored statuses, then send the upcoming expiries and the status changes not
+        notified yet in digests of at most DIGEST_BATCH_SIZE entries. A change is only marked
+        notified once its digest was delivered, so a failed run resends it next time.
+        """
+        notifier = notifier or get_notifier()
+        batch_size = LicenseExpiryManager.DIGEST_BATCH_SIZE
+        ProfessionalManager.refresh_statuses()
+        generated_on = date.today().isoformat()
+        expiries = LicenseExpiryManager.upcoming_expiries(days)
+        for start in range(0, len(expiries), batch_size):
+            notifier.send({
+                'kind': 'license_expiries',
+                'generated_on': generated_on,
+                'days': days or LICENSE_EXPIRY_NOTICE_DAYS,
+                'professionals': expiries[start:start + batch_size],
+            })
+        notified_changes = 0
+        while True:
+            with session_scope() as session:
+                changes = session.execute(
+                    select(LicenseStatusChange, Professional.name, Professional.email)
+                    .join(Professional, Professional.id == LicenseStatusChange.professional_id)
+                    .where(LicenseStatusChange.notified_at.is_(None))
+                    .order_by(LicenseStatusChange.changed_at, LicenseStatusChange.id)
+                    .limit(batch_size)
+                    .with_for_update(of=LicenseStatusChange, skip_locked=True)
+                ).all()
+                if not changes:
+                    break
+                notifier.send({
+                    'kind': 'license_status_changes',
+                    'generated_on': generated_on,
+                    'changes': [{
+                        'professional_id': change.professional_id,
+                        'name': name,
+                        'email': email,
+                        'old_status': change.old_status,
+                        'new_status': change.new_status,
+                        'license_expiration_date': change.license_expiration_date.isoformat(),
+                        'changed_at': change.changed_at.isoformat(),
+                    } for change, name, email in changes],
+                })
+                session.execute(
+                    update(LicenseStatusChange)
+                    .where(LicenseStatusChange.id.in_([change.id for change, _, _ in changes]))
+                    .values(notified_at=db_now())
+                )
+                notified_changes += len(changes)
+        return {'upcoming_expiries': len(expiries), 'status_changes': notified_changes}
+
+
+class SyncManager:
+    """
+    Change feed over the project and professional lists: rows created or updated since a
+    cursor, plus tombstones of the rows deleted since then.
+    """
+    CURSOR_SORT = 'sync'
+    # Rows carry the start time of the transaction that wrote them but only become visible
+    # when it commits, and a replica may lag a little behind; each poll looks back this far
+    # so neither is missed. Clients apply rows by id, so a repeated row is harmless.
+    OVERLAP_SECONDS = 60
+    # Tombstones older than this are pruned; a cursor that old gets a full snapshot instead
+    TOMBSTONE_RETENTION_DAYS = 30
+
+    @staticmethod
+    def get_changes(since: str = None) -> dict:
+        """Rows changed after the since cursor, or every row with reset=True without one."""
+        as_of = SyncManager.database_now(db_session)
+        changed_after = None
+        if since:
+            changed_after, _ = decode_cursor(since, SyncManager.CURSOR_SORT, Project.updated_at)
+            if changed_after < as_of - timedelta(days=SyncManager.TOMBSTONE_RETENTION_DAYS):
+                changed_after = None
+        projects = db_session.query(Project).options(*ProjectManager.query_options(ProjectManager.LIST_PROFILE))
+        professionals = db_session.query(Professional)
+        deleted = {DeletedEntity.PROJECT: [], DeletedEntity.PROFESSIONAL: []}
+        if changed_after is not None:
+            window_start = changed_after - timedelta(seconds=SyncManager.OVERLAP_SECONDS)
+            projects = projects.filter(Project.updated_at > window_start)
+            professionals = professionals.filter(Professional.updated_at > window_start)
+            tombstones = db_session.query(DeletedEntity.entity_type, DeletedEntity.entity_id).filter(
+                DeletedEntity.deleted_at > window_start
+            )
+            for entity_type, entity_id in tombstones:
+                deleted[entity_type].append(entity_id)
+        return {
+            'projects': projects.order_by(Project.updated_at, Project.id).all(),
+            'professionals': professionals.order_by(Professional.updated_at, Professional.id).all(),
+            'deleted_projects': deleted[DeletedEntity.PROJECT],
+            'deleted_professionals': deleted[DeletedEntity.PROFESSIONAL],
+            'reset': changed_after is None,
+            'cursor': encode_cursor(SyncManager.CURSOR_SORT, as_of, None),
+        }
+
+    @staticmethod
+    def database_now(session) -> datetime.datetime:
+        """The database clock that stamps the rows, naive like the timestamp columns."""
+        return session.scalar(select(db_now())).replace(tzinfo=None)
+
+    @staticmethod
+    def prune_tombstones() -> int:
+        """Delete tombstones past the retention period. Returns the row count."""
+        with session_scope() as session:
+            retention_start = SyncManager.database_now(session) - timedelta(days=SyncManager.TOMBSTONE_RETENTION_DAYS)
+            return session.execute(delete(DeletedEntity).where(DeletedEntity.deleted_at < retention_start)).rowcount
+
+
+class ComplianceManager:
+    """
+    Which required documents each project is missing and whether the professional types
+    they need are attached. The required types come from DocumentMap.DOCUMENT_PROFESSIONAL_MAP.
+    """
+    DOCUMENT = 'document'
+    PROFESSIONAL = 'professional'
+
+    # Progress of a document type is the furthest along of its documents
+    STATUS_RANKS = {
+        DocumentStatus.MISSING.value: 0,
+        DocumentStatus.PENDING.value: 1,
+        DocumentStatus.UPLOADED.value: 1,
+        DocumentStatus.SIGNED.value: 2,
+        DocumentStatus.DELIVERED.value: 3,
+    }
+    RANK_STATUSES = {
+        0: DocumentStatus.MISSING.value,
+        1: DocumentStatus.PENDING.value,
+        2: DocumentStatus.SIGNED.value,
+        3: DocumentStatus.DELIVERED.value,
+    }
+
+    @staticmethod
+    @functools.cache
+    def required_documents() -> dict[str, list[str]]:
+        """Stored document type -> stored professional types it requires."""
+        return {
+            ProjectDocumentType[document_type].value: professional_types
+            for document_type, professional_types in DocumentMap.DOCUMENT_PROFESSIONAL_TYPES.items()
+        }
+
+    @staticmethod
+    def _aggregate(project_ids: list[str]) -> list[tuple]:
+        """(project_id, kind, key, rank) for every required document type and professional type present."""
+        required = ComplianceManager.required_documents()
+        professional_types = {professional_type for types in required.values() for professional_type in types}
+        rank = case(
+            *[(ProjectDocument.status == status, status_rank) for status, status_rank in ComplianceManager.STATUS_RANKS.items()],
+            else_=ComplianceManager.STATUS_RANKS[DocumentStatus.PENDING.value]
+        )
+        documents = select(
+            ProjectDocument.project_id.label('project_id'),
+            literal(ComplianceManager.DOCUMENT).label('kind'),
+            ProjectDocument.document_type.label('key'),
+            rank.label('rank'),
+        ).where(ProjectDocument.project_id.in_(project_ids), ProjectDocument.document_type.in_(list(required)))
+        professionals = select(
+            ProjectProfessional.project_id,
+            literal(ComplianceManager.PROFESSIONAL),
+            Professional.professional_type,
+            literal(1),
+        ).join(Professional, Professional.id == ProjectProfessional.professional_id).where(
+            ProjectProfessional.project_id.in_(project_ids),
+            Professional.professional_type.in_(list(professional_types)),
+        )
+        present = union_all(documents, professionals).subquery()
+        return db_session.execute(
+            select(present.c.project_id, present.c.kind, present.c.key, func.max(present.c.rank))
+            .group_by(present.c.project_id, present.c.kind, present.c.key)
+        ).all()
+
+    @staticmethod
+    def compute(project_ids: list[str]) -> dict[str, dict]:
+        """The compliance matrix of the given projects, from a single grouped query."""
+        if not project_ids:
+            return {}
+        document_ranks = {project_id: {} for project_id in project_ids}
+        attached_types = {project_id: set() for project_id in project_ids}
+        for project_id, kind, key, rank in ComplianceManager._aggregate(project_ids):
+            if kind == ComplianceManager.DOCUMENT:
+                document_ranks[project_id][key] = rank
+            else:
+                attached_types[project_id].add(key)
+
+        matrix = {}
+        for project_id in project_ids:
+            documents = []
+            missing_professional_types = set()
+            for document_type, professional_types in ComplianceManager.required_documents().items():
+                missing_types = [t for t in professional_types if t not in attached_types[project_id]]
+                missing_professional_types.update(missing_types)
+                documents.append({
+                    'document_type': document_type,
+                    'status': ComplianceManager.RANK_STATUSES[document_ranks[project_id].get(document_type, 0)],
+                    'professionals_attached': not missing_types,
+                    'missing_professional_types': missing_types,
+                })
+            missing_documents = sum(1 for document in documents if document['status'] == DocumentStatus.MISSING.value)
+            matrix[project_id] = {
+                'documents': documents,
+                'missing_documents': missing_documents,
+                'missing_professionals': len(missing_professional_types),
+                'complete': not missing_documents and not missing_professional_types,
+            }
+        return matrix
+
+    @staticmethod
+    def get_matrix(limit: int = None, cursor: str = None, sort: str = 'name', descending: bool = False,
+                   incomplete_only: bool = False, **filters) -> tuple[list[Project], dict, str | None]:
+        """A page of projects, their compliance matrix and the next cursor, as in ProjectManager.get_page()."""
+        query = ProjectManager.filter_query(**filters)
+        if incomplete_only:
+            if not COMPLIANCE_SUMMARY:
+                raise ValidationError(params={"validation_errors": {
+                    "incomplete_only": "Filtering by compliance needs COMPLIANCE_SUMMARY to be enabled"
+                }})
+            query = query.join(ProjectCompliance, ProjectCompliance.project_id == Project.id).filter(
+                (ProjectCompliance.missing_documents > 0) | (ProjectCompliance.missing_professionals > 0)
+            )
+        if limit is None and not cursor:
+            projects, next_cursor = query.all(), None
+        else:
+            projects, next_cursor = paginate(query, sort, ProjectManager.SORT_KEYS[sort], Project.id,
+                                             limit or DEFAULT_PAGE_SIZE, cursor=cursor, descending=descending)
+        return projects, ComplianceManager.compute([project.id for project in projects]), next_cursor
+
+    @staticmethod
+    def refresh_summary(project_ids: list[str]) -> None:
+        """Recompute the summary rows of the given projects in the current transaction."""
+        if not COMPLIANCE_SUMMARY or not project_ids:
+            return
+        # The pending change must be visible to the aggregate
+        db_session.flush()
+        matrix = ComplianceManager.compute(list(project_ids))
+        table = ProjectCompliance.__table__
+        statement = dialect_insert(table).values([
+            {'project_id': project_id,
+             'missing_documents': compliance['missing_documents'],
+             'missing_professionals': compliance['missing_professionals']}
+            for project_id, compliance in matrix.items()
+        ])
+        db_session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.project_id],
+            set_={
+                'missing_documents': statement.excluded.missing_documents,
+                'missing_professionals': statement.excluded.missing_professionals,
+                'updated_at': db_now(),
+            },
+        ))
+
+    SUMMARY_BATCH_SIZE = 500
+
+    @staticmethod
+    def rebuild_summary() -> int:
+        """Recompute the summary of every project, e.g. after switching it on or changing the requirements."""
+        project_ids = list(db_session.scalars(select(Project.id).order_by(Project.id)))
+        for start in range(0, len(project_ids), ComplianceManager.SUMMARY_BATCH_SIZE):
+            ComplianceManager.refresh_summary(project_ids[start:start + ComplianceManager.SUMMARY_BATCH_SIZE])
+            db_session.commit()
+        return len(project_ids)
+
+
+class ProjectCounterManager:
+    """
+    Denormalized per-project counts for the project list: documents per status and
+    professionals per type. The writes that change them adjust them in the same transaction,
+    and each counter row is stamped when it last changed, which is the project's last activity.
+    """
+    REPAIR_BATCH_SIZE = 500
+
+    @staticmethod
+    def _add(rows: list[dict] | Select) -> None:
+        """Upsert (project_id, kind, key, value) rows, adding value to the counter when it exists."""
+        table = ProjectCounter.__table__
+        if isinstance(rows, Select):
+            statement = dialect_insert(table).from_select(['project_id', 'kind', 'key', 'value'], rows)
+        else:
+            statement = dialect_insert(table).values(rows)
+        db_session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.project_id, table.c.kind, table.c.key],
+            set_={'value': table.c.value + statement.excluded.value, 'updated_at': db_now()},
+        ))
+
+    @staticmethod
+    def count_document(project_id: str, status: str, delta: int) -> None:
+        ProjectCounterManager._add([{
+            'project_id': project_id, 'kind': ProjectCounter.DOCUMENTS, 'key': status, 'value': delta,
+        }])
+
+    @staticmethod
+    def count_memberships(delta: int, *conditions) -> None:
+        """Add delta for every stored membership matching conditions to its project's per-type counter."""
+        ProjectCounterManager._add(
+            select(
+                ProjectProfessional.project_id,
+                literal(ProjectCounter.PROFESSIONALS),
+                Professional.professional_type,
+                func.count() * delta,
+            )
+            .join(Professional, Professional.id == ProjectProfessional.professional_id)
+            .where(*conditions)
+            .group_by(ProjectProfessional.project_id, Professional.professional_type)
+        )
+
+    @staticmethod
+    def get_counts(project_ids: list[str]) -> dict:
+        """Project id -> its counters and last activity time, read with one primary key range scan."""
+        counts = {
+            project_id: {
+                'documents': {},
+                'documents_total': 0,
+                'professionals': {},
+                'professionals_total': 0,
+                'last_activity_at': None,
+            } for project_id in project_ids
+        }
+        if not project_ids:
+            return counts
+        counters = db_session.execute(
+            select(ProjectCounter.project_id, ProjectCounter.kind, ProjectCounter.key, ProjectCounter.value,
+                   ProjectCounter.updated_at)
+            .where(ProjectCounter.project_id.in_(project_ids))
+        ).all()
+        for project_id, kind, key, value, updated_at in counters:
+            project_counts = counts[project_id]
+            if value:
+                project_counts[kind][key] = value
+                project_counts[f'{kind}_total'] += value
+            if project_counts['last_activity_at'] is None or updated_at > project_counts['last_activity_at']:
+                project_counts['last_activity_at'] = updated_at
+        for project_counts in counts.values():
+            if project_counts['last_activity_at'] is not None:
+                project_counts['last_activity_at'] = project_counts['last_activity_at'].isoformat()
+        return counts
+
+    @staticmethod
+    def repair() -> int:
+        """
+        Recompute every project's counters from its documents and memberships, one batch of
+        projects per transaction. Returns the number of projects.
+        """
+        project_ids = list(db_session.scalars(select(Project.id).order_by(Project.id)))
+        for start in range(0, len(project_ids), ProjectCounterManager.REPAIR_BATCH_SIZE):
+            batch = project_ids[start:start + ProjectCounterManager.REPAIR_BATCH_SIZE]
+            documents = select(
+                ProjectDocument.project_id,
+                literal(ProjectCounter.DOCUMENTS),
+                ProjectDocument.status,
+                func.count(),
+                func.max(ProjectDocument.created_at),
+            ).where(ProjectDocument.project_id.in_(batch)).group_by(ProjectDocument.project_id, ProjectDocument.status)
+            professionals = select(
+                ProjectProfessional.project_id,
+                literal(ProjectCounter.PROFESSIONALS),
+                Professional.professional_type,
+                func.count(),
+                func.max(ProjectProfessional.created_at),
+            ).join(
+                Professional, Professional.id == ProjectProfessional.professional_id
+            ).where(
+                ProjectProfessional.project_id.in_(batch)
+            ).group_by(ProjectProfessional.project_id, Professional.professional_type)
+            db_session.execute(delete(ProjectCounter).where(ProjectCounter.project_id.in_(batch)))
+            db_session.execute(insert(ProjectCounter).from_select(
+                ['project_id', 'kind', 'key', 'value', 'updated_at'], union_all(documents, professionals)
+            ))
+            db_session.commit()
+        return len(project_ids)
+
+
 def is_document_professional_related(project_id: str, document_type: ProjectDocumentType) -> bool:
-    doc_professionals_types = ProjectDocumentManager.get_document_professionals_types(document_type)
-    project_professionals = ProjectManager.get_project_professionals(project_id=project_id)
-    project_prof_types = [ProfessionalManager.get_professional_type_by_value(p_professional.professional_type).name for p_professional in project_professionals]
-    for doc_professional_type in doc_professionals_types:
-        if doc_professional_type not in project_prof_types:
-            return False
-    return True
+    doc_professionals_types = DocumentMap.DOCUMENT_PROFESSIONAL_TYPES.get(document_type.name, [])
+    if not doc_professionals_types:
+        return True
+    attached_types = db_session.query(Professional.professional_type).join(
+        ProjectProfessional, Professional.id == ProjectProfessional.professional_id
+    ).filter(
+        ProjectProfessional.project_id == project_id,
+        Professional.professional_type.in_(doc_professionals_types)
+    ).distinct().all()
+    return {professional_type for professional_type, in attached_types} >= set(doc_professionals_types)
+
+
+def store_document_file(key: str, file_path: str) -> None:
+    """Store a document's file, removing it again if the transaction that records it rolls back."""
+    storage = get_storage()
+    if not storage.exists(key):
+        # A key that already exists belongs to an earlier upload and is left alone
+        after_rollback(storage.delete, key)
+    storage.save(key, file_path)
+
+
+def queue_file_deletions(file_paths: Select) -> None:
+    """Queue the storage keys selected by file_paths for the reclaimer, in the current transaction."""
+    selected = file_paths.subquery()
+    file_path = selected.c[0]
+    statement = dialect_insert(PendingFileDeletion.__table__).from_select(
+        ['file_path', 'created_at'],
+        select(file_path, db_now()).where(file_path.isnot(None), file_path != ''),
+    ).on_conflict_do_nothing()
+    db_session.execute(statement)
+
+
+def remove_document_ingests(document_ids) -> None:
+    """
+    Delete the ingest records of the given documents and queue the originals they kept. The
+    caller locks the documents first: a normalize task records its ingest under the same lock.
+    """
+    queue_file_deletions(select(DocumentIngest.original_file_path).where(DocumentIngest.document_id.in_(document_ids)))
+    db_session.execute(delete(DocumentIngest).where(DocumentIngest.document_id.in_(document_ids)))
 
 
 def save_file_to_temp(file):
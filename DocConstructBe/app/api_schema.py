@@ -1,11 +1,31 @@
 from marshmallow import Schema, fields, validate
-from data_model.enum import ProjectDocumentType, ProfessionalDocumentType, ProfessionalType, ProjectStatus
+from data_model.enum import ProjectDocumentType, ProfessionalDocumentType, ProfessionalType, ProjectStatus, DocumentStatus, ProfessionalStatus
+from utils.pagination import MAX_PAGE_SIZE
+
+# Ranked results past this point are not worth paging to
+MAX_SEARCH_OFFSET = 1000
+MAX_BULK_PROFESSIONALS = 500
+MAX_EXPIRY_NOTICE_DAYS = 365
+
+SORT_ORDERS = ['asc', 'desc']
 
 # Project Schemas
 
 
 class ProjectGetAllSchema(Schema):
-    pass
+    limit = fields.Int(required=False, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = fields.Str(required=False)
+    sort = fields.Str(required=False, load_default='name',
+                      validate=validate.OneOf(['name', 'status_due_date', 'created_at']))
+    order = fields.Str(required=False, load_default='asc', validate=validate.OneOf(SORT_ORDERS))
+    status = fields.Enum(ProjectStatus, by_value=True, required=False)
+    permit_owner_id = fields.UUID(required=False)
+    due_date_from = fields.Date(required=False)
+    due_date_to = fields.Date(required=False)
+
+
+class ProjectComplianceSchema(ProjectGetAllSchema):
+    incomplete_only = fields.Bool(required=False, load_default=False)
 
 
 class ProjectGetByIdSchema(Schema):
@@ -24,7 +44,7 @@ class ProjectCreateSchema(Schema):
     status = fields.Enum(ProjectStatus, by_value=True, required=False)
     status_due_date = fields.Date(required=False)
     docs_path = fields.Str(required=False)
-    professionals = fields.List(fields.UUID(), required=False)
+    professionals = fields.List(fields.UUID(), required=False, validate=validate.Length(max=MAX_BULK_PROFESSIONALS))
 
 
 class ProjectUpdateSchema (Schema):
@@ -64,11 +84,25 @@ class ProjectProfessionalRemoveSchema(Schema):
     professional_id = fields.UUID(required=True)
 
 
+class ProjectProfessionalsUpdateSchema(Schema):
+    project_id = fields.UUID(required=True)
+    attach = fields.List(fields.UUID(), required=False, load_default=list,
+                         validate=validate.Length(max=MAX_BULK_PROFESSIONALS))
+    detach = fields.List(fields.UUID(), required=False, load_default=list,
+                         validate=validate.Length(max=MAX_BULK_PROFESSIONALS))
+
+
 class ProjectDocumentDownloadSchema(Schema):
     document_id = fields.UUID(required=True)
     project_id = fields.UUID(required=True)
 
 
+class ProjectDocumentsExportSchema(Schema):
+    project_id = fields.UUID(required=True)
+    document_type = fields.Enum(ProjectDocumentType, by_value=True, required=False)
+    status = fields.Enum(DocumentStatus, by_value=True, required=False)
+
+
 class ProjectDocumentUploadSchema(Schema):
     project_id = fields.UUID(required=True)
     document_type = fields.Enum(ProjectDocumentType, by_value=True, required=False)
@@ -90,7 +124,17 @@ class ProjectDocumentTypesSchema(Schema):
 
 
 class ProfessionalsGetSchema(Schema):
-    pass
+    limit = fields.Int(required=False, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = fields.Str(required=False)
+    sort = fields.Str(required=False, load_default='name',
+                      validate=validate.OneOf(['name', 'license_expiration_date', 'created_at']))
+    order = fields.Str(required=False, load_default='asc', validate=validate.OneOf(SORT_ORDERS))
+    professional_type = fields.Enum(ProfessionalType, by_value=True, required=False)
+    status = fields.Enum(ProfessionalStatus, by_value=True, required=False)
+
+
+class ExpiringProfessionalsSchema(Schema):
+    days = fields.Int(required=False, validate=validate.Range(min=1, max=MAX_EXPIRY_NOTICE_DAYS))
 
 
 class ProfessionalGetSchema(Schema):
@@ -160,6 +204,29 @@ class ProfessionalImportSchema(Schema):
     file = fields.Raw(required=True)
 
 
+class ProfessionalsBulkImportSchema(Schema):
+    file = fields.Raw(required=True)
+
+# Metrics Schemas
+
+
+class DbPoolMetricsSchema(Schema):
+    pass
+
+# Search Schemas
+
+
+class SearchSchema(Schema):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+    type = fields.Str(required=False, validate=validate.OneOf(['projects', 'professionals']))
+    limit = fields.Int(required=False, load_default=20, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    offset = fields.Int(required=False, load_default=0, validate=validate.Range(min=0, max=MAX_SEARCH_OFFSET))
+
+
+class SyncSchema(Schema):
+    since = fields.Str(required=False)
+
+
 class Endpoints:
     GET_PROJECTS = "get_projects"
     GET_PROJECT = "get_project"
@@ -167,11 +234,15 @@ class Endpoints:
     UPDATE_PROJECT = "update_project"
     DELETE_PROJECT = "delete_project"
     GET_PROJECT_STATUSES = "get_project_statuses"
+    GET_PROJECTS_COMPLIANCE = "get_projects_compliance"
 
     ADD_PROJECT_PROFESSIONAL = "add_project_professional"
     REMOVE_PROJECT_PROFESSIONAL = "remove_project_professional"
+    UPDATE_PROJECT_PROFESSIONALS = "update_project_professionals"
 
     DOWNLOAD_PROJECT_DOCUMENT = "download_project_document"
+    EXPORT_PROJECT_DOCUMENTS = "export_project_documents"
+    GET_PROJECT_DOCUMENT_THUMBNAIL = "get_project_document_thumbnail"
     UPLOAD_PROJECT_DOCUMENT = "upload_project_document"
     REMOVE_PROJECT_DOCUMENT = "remove_project_document"
     GET_PROJECT_DOCUMENT_TYPES = "get_project_document_types"
@@ -180,16 +251,24 @@ class Endpoints:
     GET_PROFESSIONAL = "get_professional"
     CREATE_PROFESSIONAL = "create_professional"
     IMPORT_PROFESSIONAL_FILE = "import_professional_file"
+    IMPORT_PROFESSIONALS = "import_professionals"
     UPDATE_PROFESSIONAL = "update_professional"
     DELETE_PROFESSIONAL = "delete_professional"
     GET_PROFESSIONAL_TYPES = "get_professional_types"
     GET_PROFESSIONAL_STATUSES = "get_professional_statuses"
+    GET_EXPIRING_PROFESSIONALS = "get_expiring_professionals"
 
     DOWNLOAD_PROFESSIONAL_DOCUMENT = "download_professional_document"
+    GET_PROFESSIONAL_DOCUMENT_THUMBNAIL = "get_professional_document_thumbnail"
     ADD_PROFESSIONAL_DOCUMENT = "add_professional_document"
     REMOVE_PROFESSIONAL_DOCUMENT = "remove_professional_document"
     GET_PROFESSIONAL_DOCUMENT_TYPES = "get_professional_document_types"
 
+    SEARCH = "search"
+    SYNC = "sync"
+
+    GET_DB_POOL_METRICS = "get_db_pool_metrics"
+
 
 API_ENDPOINTS = {
     Endpoints.GET_PROJECTS: {
@@ -197,6 +276,11 @@ API_ENDPOINTS = {
         'schema': ProjectGetAllSchema,
         'description': 'Get all projects'
     },
+    Endpoints.GET_PROJECTS_COMPLIANCE: {
+        'method': 'GET',
+        'schema': ProjectComplianceSchema,
+        'description': 'Required documents and professionals of each project and what is missing'
+    },
     Endpoints.GET_PROJECT: {
         'method': 'GET',
         'schema': ProjectGetByIdSchema,
@@ -232,11 +316,26 @@ API_ENDPOINTS = {
         'schema': ProjectProfessionalRemoveSchema,
         'description': 'Remove a professional from a project'
     },
+    Endpoints.UPDATE_PROJECT_PROFESSIONALS: {
+        'method': 'PUT',
+        'schema': ProjectProfessionalsUpdateSchema,
+        'description': 'Attach and detach many professionals of a project at once'
+    },
     Endpoints.DOWNLOAD_PROJECT_DOCUMENT: {
         'method': 'GET',
         'schema': ProjectDocumentDownloadSchema,
         'description': 'Download a project document'
     },
+    Endpoints.EXPORT_PROJECT_DOCUMENTS: {
+        'method': 'GET',
+        'schema': ProjectDocumentsExportSchema,
+        'description': 'Download a zip of the project documents'
+    },
+    Endpoints.GET_PROJECT_DOCUMENT_THUMBNAIL: {
+        'method': 'GET',
+        'schema': ProjectDocumentDownloadSchema,
+        'description': 'Get a first-page preview of a project document'
+    },
     Endpoints.UPLOAD_PROJECT_DOCUMENT: {
         'method': 'POST',
         'schema': ProjectDocumentUploadSchema,
@@ -257,6 +356,11 @@ API_ENDPOINTS = {
         'schema': ProfessionalsGetSchema,
         'description': 'Get all professionals'
     },
+    Endpoints.GET_EXPIRING_PROFESSIONALS: {
+        'method': 'GET',
+        'schema': ExpiringProfessionalsSchema,
+        'description': 'Professionals on active projects whose licence expires soon'
+    },
     Endpoints.GET_PROFESSIONAL: {
         'method': 'GET',
         'schema': ProfessionalGetSchema,
@@ -272,6 +376,11 @@ API_ENDPOINTS = {
         'schema': ProfessionalImportSchema,
         'description': 'Import professional data from file'
     },
+    Endpoints.IMPORT_PROFESSIONALS: {
+        'method': 'POST',
+        'schema': ProfessionalsBulkImportSchema,
+        'description': 'Create professionals in bulk from a CSV or XLSX registry'
+    },
     Endpoints.UPDATE_PROFESSIONAL: {
         'method': 'PUT',
         'schema': ProfessionalUpdateSchema,
@@ -297,6 +406,11 @@ API_ENDPOINTS = {
         'schema': ProfessionalDocumentDownloadSchema,
         'description': 'Download a professional document'
     },
+    Endpoints.GET_PROFESSIONAL_DOCUMENT_THUMBNAIL: {
+        'method': 'GET',
+        'schema': ProfessionalDocumentDownloadSchema,
+        'description': 'Get a first-page preview of a professional document'
+    },
     Endpoints.ADD_PROFESSIONAL_DOCUMENT: {
         'method': 'POST',
         'schema': ProfessionalDocumentAddSchema,
@@ -312,4 +426,19 @@ API_ENDPOINTS = {
         'schema': ProfessionalDocumentTypesSchema,
         'description': 'Get all professional document types'
     },
+    Endpoints.SEARCH: {
+        'method': 'GET',
+        'schema': SearchSchema,
+        'description': 'Ranked search over projects and professionals'
+    },
+    Endpoints.SYNC: {
+        'method': 'GET',
+        'schema': SyncSchema,
+        'description': 'Projects and professionals changed or deleted since a cursor'
+    },
+    Endpoints.GET_DB_POOL_METRICS: {
+        'method': 'GET',
+        'schema': DbPoolMetricsSchema,
+        'description': 'Connection pool usage of the worker serving the request'
+    },
 }
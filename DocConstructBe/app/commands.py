@@ -0,0 +1,60 @@
+import click
+
+from app.api import ComplianceManager, LicenseExpiryManager, ProfessionalManager, ProjectCounterManager, SyncManager
+from config.sys_config import COMPLIANCE_SUMMARY, LICENSE_EXPIRY_NOTICE_DAYS
+from database.database import unit_of_work
+from app.tasks import reclaim_files
+
+
+def init_commands(app):
+
+    @app.cli.command('refresh-professional-statuses')
+    def refresh_professional_statuses():
+        """Recompute licence statuses; meant to run from cron shortly after midnight."""
+        updated = ProfessionalManager.refresh_statuses()
+        click.echo(f"Updated {updated} professional statuses")
+
+    @app.cli.command('import-professionals')
+    @click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+    def import_professionals(file_path):
+        """Create professionals from a CSV or XLSX registry and print the rejected rows."""
+        with unit_of_work():
+            report = ProfessionalManager.bulk_import(file_path)
+        for row_error in report['errors']:
+            click.echo(f"Row {row_error['row']}: {row_error['errors']}")
+        click.echo(f"Created {report['created']} of {report['total']} professionals")
+
+    @app.cli.command('reclaim-files')
+    def reclaim_deleted_files():
+        """Remove the stored files of deleted documents that are still queued."""
+        reclaimed = reclaim_files()
+        click.echo(f"Removed {reclaimed} files")
+
+    @app.cli.command('prune-sync-tombstones')
+    def prune_sync_tombstones():
+        """Delete change feed tombstones past their retention period."""
+        pruned = SyncManager.prune_tombstones()
+        click.echo(f"Pruned {pruned} tombstones")
+
+    @app.cli.command('refresh-compliance-summary')
+    def refresh_compliance_summary():
+        """Rebuild the stored compliance summary of every project."""
+        if not COMPLIANCE_SUMMARY:
+            click.echo("COMPLIANCE_SUMMARY is disabled, nothing to refresh")
+            return
+        refreshed = ComplianceManager.rebuild_summary()
+        click.echo(f"Refreshed the compliance summary of {refreshed} projects")
+
+    @app.cli.command('notify-license-expiries')
+    @click.option('--days', type=click.IntRange(min=1), default=LICENSE_EXPIRY_NOTICE_DAYS,
+                  help='Report licences expiring within this many days.')
+    def notify_license_expiries(days):
+        """Refresh licence statuses and send the expiry digests; meant to run from cron once a day."""
+        sent = LicenseExpiryManager.notify(days=days)
+        click.echo(f"Notified {sent['upcoming_expiries']} upcoming expiries and {sent['status_changes']} status changes")
+
+    @app.cli.command('repair-project-counters')
+    def repair_project_counters():
+        """Recompute the project list counters from scratch; best run while writes are quiet."""
+        repaired = ProjectCounterManager.repair()
+        click.echo(f"Recomputed the counters of {repaired} projects")
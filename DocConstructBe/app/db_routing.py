@@ -0,0 +1,64 @@
+import os
+import time
+
+from flask import request
+
+from app.errors import handle_error
+from database.database import EngineSession, db_session
+
+# Carries the time until which a client must keep reading from the primary, as a cookie
+# for the browser and as a header for API clients that echo it back
+RECENT_WRITE_COOKIE = 'recent_write'
+RECENT_WRITE_HEADER = 'X-Recent-Write'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def _recent_write_seconds() -> int:
+    # Should comfortably exceed DB_REPLICA_MAX_LAG_SECONDS
+    return int(os.environ.get('DB_RECENT_WRITE_SECONDS', '10'))
+
+
+def _has_recent_write() -> bool:
+    token = request.headers.get(RECENT_WRITE_HEADER) or request.cookies.get(RECENT_WRITE_COOKIE)
+    try:
+        return float(token) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+def init_db_routing(app):
+
+    @app.before_request
+    def route_reads_to_replicas():
+        db_session.info[EngineSession.READ_REPLICA] = request.method in READ_METHODS and not _has_recent_write()
+
+    @app.after_request
+    def mark_recent_write(response):
+        if db_session.info.get(EngineSession.WROTE):
+            write_seconds = _recent_write_seconds()
+            token = str(time.time() + write_seconds)
+            response.set_cookie(RECENT_WRITE_COOKIE, token, max_age=write_seconds, httponly=True, samesite='Lax')
+            response.headers[RECENT_WRITE_HEADER] = token
+        return response
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        # Managers only flush, so everything a request wrote commits here at once, or none of it does.
+        # Registered last, so it runs before mark_recent_write.
+        if response.status_code >= 400:
+            db_session.rollback()
+            return response
+        try:
+            db_session.commit()
+        except Exception as error:
+            db_session.rollback()
+            return handle_error(error)
+        return response
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        if exception is not None:
+            # Runs the rollback callbacks that removing the session would otherwise drop
+            db_session.rollback()
+        # A fresh session per request, so routing state and replica connections never leak into the next one
+        db_session.remove()
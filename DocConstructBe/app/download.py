@@ -0,0 +1,96 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import Response, redirect, request, send_file
+from werkzeug.exceptions import NotFound
+
+from config.sys_config import DOCUMENTS_FOLDER, DOWNLOAD_MODE, X_ACCEL_LOCATION
+from app.http_codes import HttpCodes
+from storage.storage import get_storage
+from utils.thumbnail import get_thumbnail
+from utils.zip_stream import stream_zip, unique_arcnames
+from app.errors import DocumentPreviewNotAvailable
+
+X_ACCEL_MODE = 'x-accel'
+
+
+def content_disposition(download_name: str) -> str:
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        return f"attachment; filename*=UTF-8''{quote(download_name)}"
+    return f'attachment; filename="{download_name}"'
+
+
+def _x_accel_path(file_path: str) -> str | None:
+    documents_folder = os.path.realpath(DOCUMENTS_FOLDER)
+    real_path = os.path.realpath(file_path)
+    if os.path.commonpath([documents_folder, real_path]) != documents_folder:
+        return None
+    relative_path = os.path.relpath(real_path, documents_folder)
+    return f"{X_ACCEL_LOCATION.rstrip('/')}/{quote(relative_path)}"
+
+
+def send_document(file_path: str, download_name: str) -> Response:
+    """
+    Send a stored document with a strong ETag, honouring If-None-Match and Range.
+    In x-accel mode only the headers are produced here and nginx streams the body;
+    object stores get a redirect to a presigned URL instead.
+    """
+    storage = get_storage()
+    download_url = storage.download_url(file_path, content_disposition(download_name))
+    if download_url:
+        return redirect(download_url, code=HttpCodes.REDIRECT_MOVED_TEMPORARY)
+
+    try:
+        stored_object = storage.stat(file_path)
+    except (FileNotFoundError, TypeError):
+        raise NotFound(description='Document file not found')
+    local_file = storage.local_file(file_path)
+
+    accel_path = _x_accel_path(local_file) if DOWNLOAD_MODE == X_ACCEL_MODE else None
+    if accel_path is None:
+        response = send_file(
+            local_file,
+            as_attachment=True,
+            download_name=download_name,
+            etag=stored_object.etag,
+            conditional=True
+        )
+    else:
+        response = Response(mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream')
+        response.set_etag(stored_object.etag)
+        response.last_modified = stored_object.modified_at
+        response.headers['Content-Disposition'] = content_disposition(download_name)
+        if request.if_none_match.contains(stored_object.etag):
+            response.status_code = HttpCodes.NOT_MODIFIED
+        else:
+            # nginx serves the body (including Range/If-Range) from the internal location
+            response.headers['X-Accel-Redirect'] = accel_path
+            response.status_code = HttpCodes.OK
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def send_zip(files: list[tuple[str, str]], download_name: str) -> Response:
+    """Stream (arcname, file_path) pairs as a zip built on the fly."""
+    arcnames = unique_arcnames(arcname for arcname, _ in files)
+    entries = [(arcname, file_path) for arcname, (_, file_path) in zip(arcnames, files)]
+    response = Response(stream_zip(entries, open_file=get_storage().open), mimetype='application/zip')
+    response.headers['Content-Disposition'] = content_disposition(download_name)
+    # Let nginx pass the chunks through instead of buffering the whole archive
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def send_thumbnail(file_path: str) -> Response:
+    thumbnail = get_thumbnail(file_path)
+    if thumbnail is None:
+        raise DocumentPreviewNotAvailable()
+    thumbnail_path, file_hash = thumbnail
+    response = send_file(thumbnail_path, mimetype='image/jpeg', etag=file_hash, conditional=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
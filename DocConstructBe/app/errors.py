@@ -192,3 +192,14 @@ class ProjectDocumentNotFound(ApiError):
 
     def http_code(self):
         return HttpCodes.NOT_FOUND
+
+
+class DocumentPreviewNotAvailable(ApiError):
+    def __init__(self):
+        super().__init__(
+            msg='Preview is not available for this document',
+            code='document_preview_not_available'
+        )
+
+    def http_code(self):
+        return HttpCodes.NOT_FOUND
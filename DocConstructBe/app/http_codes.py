@@ -3,6 +3,7 @@ class HttpCodes:
     NO_CONTENT = 204
     BAD_REQUEST = 400
     REDIRECT_MOVED_TEMPORARY = 302
+    NOT_MODIFIED = 304
     NOT_AUTHENTICATED = 401
     NOT_AUTHORIZED = 403
     NOT_FOUND = 404
@@ -1,20 +1,66 @@
 import os
+import shutil
 import tempfile
 
-from flask import send_file, request
+from flask import request
 
 from app.errors import ValidationError
 from app.api import (
     ProjectManager,
     ProfessionalManager,
     ProjectDocumentManager,
+    SyncManager,
+    ComplianceManager,
+    LicenseExpiryManager,
+    ProjectCounterManager,
     is_document_professional_related,
     save_file_to_temp
 )
 from app.response import SuccessResponse
+from app.download import send_document, send_thumbnail, send_zip
+from app.tasks import process_uploaded_document, schedule_file_reclaim
 from app.api_schema import API_ENDPOINTS, Endpoints
 from data_model.enum import enum_to_value, ProjectDocumentType
-from data_model.models import PermitOwner
+from data_model.models import PermitOwner, DocumentIngest
+from database.database import EngineSession, db_session, get_pool_metrics
+from cache.cache import get_cache
+
+def project_detail(project_id: str) -> dict:
+    """The GET /api/project payload, as stored in the read cache."""
+    # A lagging replica would store an old payload under the current version, so fills read the primary
+    db_session.info[EngineSession.READ_REPLICA] = False
+    project = ProjectManager().get_by_id(project_id=project_id, profile=ProjectManager.DETAIL_PROFILE)
+    return {
+        'id': project.id,
+        'name': project.name,
+        'request_number': project.request_number,
+        'permit_owner': project.permit_owner.name,
+        'permit_owner_address': project.permit_owner.address,
+        'permit_owner_phone': project.permit_owner.phone,
+        'permit_owner_email': project.permit_owner.email,
+        'status': enum_to_value(project.status),
+        'description': project.description,
+        'permit_number': project.permit_number,
+        'construction_supervision_number': project.construction_supervision_number,
+        'engineering_coordinator_number': project.engineering_coordinator_number,
+        'firefighting_number': project.firefighting_number,
+        'status_due_date': project.status_due_date.isoformat() if project.status_due_date else None,
+        'professionals': [{
+            'id': prof.professional_id,
+            'name': prof.professional.name,
+            'email': prof.professional.email,
+            'professional_type': prof.professional.professional_type,
+            'status': prof.professional.status
+        } for prof in project.professionals],
+        'documents': [{
+            'id': doc.id,
+            'name': doc.name,
+            'document_type': doc.document_type,
+            'status': doc.status,
+            'created_at': doc.created_at.isoformat(),
+        } for doc in project.documents]
+    }
+
 
 def validate_request(endpoint):
     """Validate request data against schema"""
@@ -66,8 +112,18 @@ def init_routes(app):
 
     @app.route('/api/projects', methods=['GET'])
     def get_projects():
-        validate_request(endpoint=Endpoints.GET_PROJECTS)
-        projects = ProjectManager().get_all()
+        data = validate_request(endpoint=Endpoints.GET_PROJECTS)
+        projects, next_cursor = ProjectManager.get_page(
+            limit=data.get('limit'),
+            cursor=data.get('cursor'),
+            sort=data.get('sort'),
+            descending=data.get('order') == 'desc',
+            status=data.get('status'),
+            permit_owner_id=str(data['permit_owner_id']) if data.get('permit_owner_id') else None,
+            due_date_from=data.get('due_date_from'),
+            due_date_to=data.get('due_date_to'),
+        )
+        counts = ProjectCounterManager.get_counts([project.id for project in projects])
         return SuccessResponse({
             'projects': [{
                 'id': project.id,
@@ -76,44 +132,44 @@ def init_routes(app):
                 'status': project.status,
                 'permit_owner': project.permit_owner.name,
                 'status_due_date': project.status_due_date.isoformat() if project.status_due_date else None,
-            } for project in projects]
+                'stats': counts[project.id],
+            } for project in projects],
+            'next_cursor': next_cursor,
         }).generate_response()
 
-    @app.route('/api/project', methods=['GET'])
-    def get_project():
-        data = validate_request(endpoint=Endpoints.GET_PROJECT)
-        project = ProjectManager().get_by_id(project_id=str(data.get('project_id')))
+    @app.route('/api/projects/compliance', methods=['GET'])
+    def get_projects_compliance():
+        data = validate_request(endpoint=Endpoints.GET_PROJECTS_COMPLIANCE)
+        projects, matrix, next_cursor = ComplianceManager.get_matrix(
+            limit=data.get('limit'),
+            cursor=data.get('cursor'),
+            sort=data.get('sort'),
+            descending=data.get('order') == 'desc',
+            incomplete_only=data.get('incomplete_only'),
+            status=data.get('status'),
+            permit_owner_id=str(data['permit_owner_id']) if data.get('permit_owner_id') else None,
+            due_date_from=data.get('due_date_from'),
+            due_date_to=data.get('due_date_to'),
+        )
         return SuccessResponse({
-            'project': {
+            'projects': [{
                 'id': project.id,
                 'name': project.name,
-                'request_number': project.request_number,
+                'status': project.status,
                 'permit_owner': project.permit_owner.name,
-                'permit_owner_address': project.permit_owner.address,
-                'permit_owner_phone': project.permit_owner.phone,
-                'permit_owner_email': project.permit_owner.email,
-                'status': enum_to_value(project.status),
-                'description': project.description,
-                'permit_number': project.permit_number,
-                'construction_supervision_number': project.construction_supervision_number,
-                'engineering_coordinator_number': project.engineering_coordinator_number,
-                'firefighting_number': project.firefighting_number,
-                'status_due_date': project.status_due_date.isoformat() if project.status_due_date else None,
-                'professionals': [{
-                    'id': prof.professional_id,
-                    'name': prof.professional.name,
-                    'email': prof.professional.email,
-                    'professional_type': prof.professional.professional_type,
-                    'status': prof.professional.status
-                } for prof in project.professionals],
-                'documents': [{
-                    'id': doc.id,
-                    'name': doc.name,
-                    'document_type': doc.document_type,
-                    'status': doc.status,
-                    'created_at': doc.created_at.isoformat(),
-                } for doc in project.documents]
-            }
+                **matrix[project.id],
+            } for project in projects],
+            'next_cursor': next_cursor,
+        }).generate_response()
+
+    @app.route('/api/project', methods=['GET'])
+    def get_project():
+        data = validate_request(endpoint=Endpoints.GET_PROJECT)
+        project_id = str(data.get('project_id'))
+        return SuccessResponse({
+            'project': get_cache().get_or_load(
+                ProjectManager.DETAIL_CACHE, project_id, lambda: project_detail(project_id)
+            )
         }).generate_response()
 
     @app.route('/api/project', methods=['POST'])
@@ -127,6 +183,7 @@ def init_routes(app):
             permit_owner=permit_owner,
             status=data.get('status'),
             status_due_date=data.get('status_due_date'),
+            professional_ids=[str(professional_id) for professional_id in data.get('professionals', [])],
         )
         return SuccessResponse({'id': str(project.id)}).generate_response()
 
@@ -165,6 +222,7 @@ def init_routes(app):
     def delete_project():
         data = validate_request(endpoint=Endpoints.DELETE_PROJECT)
         ProjectManager().delete(project_id=str(data.get('project_id')))
+        schedule_file_reclaim()
         return SuccessResponse().generate_response()
 
     @app.route('/api/project/statuses', methods=['GET'])
@@ -196,6 +254,16 @@ def init_routes(app):
         )
         return SuccessResponse().generate_response()
 
+    @app.route('/api/project/professionals', methods=['PUT'])
+    def update_project_professionals():
+        data = validate_request(Endpoints.UPDATE_PROJECT_PROFESSIONALS)
+        changes = ProjectManager.update_professionals(
+            project_id=str(data.get('project_id')),
+            attach=[str(professional_id) for professional_id in data.get('attach')],
+            detach=[str(professional_id) for professional_id in data.get('detach')],
+        )
+        return SuccessResponse(changes).generate_response()
+
     @app.route('/api/project/document', methods=['GET'])
     def download_project_document():
         data = validate_request(endpoint=Endpoints.DOWNLOAD_PROJECT_DOCUMENT)
@@ -203,12 +271,38 @@ def init_routes(app):
             project_id=str(data.get('project_id')),
             document_id=str(data.get('document_id'))
         )
-        return send_file(
-            project_document.file_path,
-            as_attachment=True,
+        return send_document(
+            file_path=project_document.file_path,
             download_name=project_document.name
         )
 
+    @app.route('/api/project/document/thumbnail', methods=['GET'])
+    def get_project_document_thumbnail():
+        data = validate_request(endpoint=Endpoints.GET_PROJECT_DOCUMENT_THUMBNAIL)
+        project_document = ProjectManager().get_document(
+            project_id=str(data.get('project_id')),
+            document_id=str(data.get('document_id'))
+        )
+        return send_thumbnail(file_path=project_document.file_path)
+
+    @app.route('/api/project/documents/export', methods=['GET'])
+    def export_project_documents():
+        data = validate_request(endpoint=Endpoints.EXPORT_PROJECT_DOCUMENTS)
+        project_id = str(data.get('project_id'))
+        project = ProjectManager().get_by_id(project_id=project_id)
+        documents = ProjectManager().get_documents(
+            project_id=project_id,
+            document_type=data.get('document_type'),
+            document_status=data.get('status')
+        )
+        files = []
+        for doc in documents:
+            name = doc.name
+            if not os.path.splitext(name)[1]:
+                name += os.path.splitext(doc.file_path)[1]
+            files.append((f"{doc.document_type}/{name}", doc.file_path))
+        return send_zip(files=files, download_name=f"{project.name}.zip")
+
     @app.route('/api/project/document', methods=['POST'])
     def upload_project_document():
         data = validate_request(endpoint=Endpoints.UPLOAD_PROJECT_DOCUMENT)
@@ -224,8 +318,7 @@ def init_routes(app):
             if not is_document_professional_related(project_id=project_id, document_type=document_type):
                 raise ValidationError(params={"error": f"Professional  {document_type.value} not related to project {project_id}"})
             permit_owner = ProjectManager().get_permit_owner(project_id=project_id)
-            project_professionals = ProjectManager.get_project_professionals(project_id=project_id)
-            document_professionals = ProjectDocumentManager.get_document_professionals(document_type=document_type,professionals=project_professionals)
+            document_professionals = ProjectDocumentManager.get_document_project_professionals(project_id=project_id,document_type=document_type)
             filled_pdf = ProjectDocumentManager.autofill_document(
                 document_type=document_type,
                 professionals=document_professionals,
@@ -242,6 +335,11 @@ def init_routes(app):
             document_name=data.get('document_name'),
             document_status=document_status
             )
+        process_uploaded_document(
+            document_id=project_document.id,
+            document_kind=DocumentIngest.PROJECT_DOCUMENT,
+            file_path=project_document.file_path
+        )
         return SuccessResponse({
             'id': project_document.id,
             'project_id': project_document.project_id,
@@ -265,6 +363,7 @@ def init_routes(app):
             project_id=str(data.get('project_id')),
             document_id=str(data.get('document_id'))
         )
+        schedule_file_reclaim()
         return SuccessResponse().generate_response()
 
     @app.route('/api/project/document/types', methods=['GET'])
@@ -282,8 +381,15 @@ def init_routes(app):
     ### Professionals ###
     @app.route('/api/professionals', methods=['GET'])
     def get_professionals():
-        validate_request(endpoint=Endpoints.GET_PROFESSIONALS)
-        professionals = ProfessionalManager.get_all()
+        data = validate_request(endpoint=Endpoints.GET_PROFESSIONALS)
+        professionals, next_cursor = ProfessionalManager.get_page(
+            limit=data.get('limit'),
+            cursor=data.get('cursor'),
+            sort=data.get('sort'),
+            descending=data.get('order') == 'desc',
+            professional_type=data.get('professional_type'),
+            status=data.get('status'),
+        )
         return SuccessResponse({
             'professionals': [{
                 'id': prof.id,
@@ -291,13 +397,24 @@ def init_routes(app):
                 'email': prof.email,
                 'professional_type': prof.professional_type,
                 'status': prof.status,
-            } for prof in professionals]
+            } for prof in professionals],
+            'next_cursor': next_cursor,
+        }).generate_response()
+
+    @app.route('/api/professionals/expiring', methods=['GET'])
+    def get_expiring_professionals():
+        data = validate_request(endpoint=Endpoints.GET_EXPIRING_PROFESSIONALS)
+        return SuccessResponse({
+            'professionals': LicenseExpiryManager.upcoming_expiries(days=data.get('days')),
         }).generate_response()
 
     @app.route('/api/professional', methods=['GET'])
     def get_professional():
         data = validate_request(endpoint=Endpoints.GET_PROFESSIONAL)
-        professional = ProfessionalManager.get_by_id(professional_id=str(data.get('professional_id')))
+        professional = ProfessionalManager.get_by_id(
+            professional_id=str(data.get('professional_id')),
+            profile=ProfessionalManager.DETAIL_PROFILE
+        )
         return SuccessResponse({
             'professional': {
                 'id': professional.id,
@@ -354,6 +471,19 @@ def init_routes(app):
         
         return SuccessResponse(license_data).generate_response()
 
+    @app.route('/api/professionals/import', methods=['POST'])
+    def import_professionals():
+        data = validate_request(endpoint=Endpoints.IMPORT_PROFESSIONALS)
+        file = data.get('file')
+        temp_dir = tempfile.mkdtemp()
+        temp_path = os.path.join(temp_dir, os.path.basename(file.filename))
+        file.save(temp_path)
+        try:
+            report = ProfessionalManager.bulk_import(temp_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return SuccessResponse(report).generate_response()
+
     @app.route('/api/professional', methods=['PUT'])
     def update_professional():
         data = validate_request(endpoint=Endpoints.UPDATE_PROFESSIONAL)
@@ -374,6 +504,7 @@ def init_routes(app):
     def delete_professional():
         data = validate_request(endpoint=Endpoints.DELETE_PROFESSIONAL)
         ProfessionalManager().delete(professional_id=str(data.get('professional_id')))
+        schedule_file_reclaim()
         return SuccessResponse().generate_response()
 
     @app.route('/api/professional/types', methods=['GET'])
@@ -393,12 +524,20 @@ def init_routes(app):
             professional_id=str(data.get('professional_id')),
             document_id=str(data.get('document_id'))
         )
-        return send_file(
-            professional_document.file_path,
-            as_attachment=True,
+        return send_document(
+            file_path=professional_document.file_path,
             download_name=professional_document.name
         )
 
+    @app.route('/api/professional/document/thumbnail', methods=['GET'])
+    def get_professional_document_thumbnail():
+        data = validate_request(endpoint=Endpoints.GET_PROFESSIONAL_DOCUMENT_THUMBNAIL)
+        professional_document = ProfessionalManager().get_document(
+            professional_id=str(data.get('professional_id')),
+            document_id=str(data.get('document_id'))
+        )
+        return send_thumbnail(file_path=professional_document.file_path)
+
     @app.route('/api/professional/document', methods=['POST'])
     def add_professional_document():
         data = validate_request(endpoint=Endpoints.ADD_PROFESSIONAL_DOCUMENT)
@@ -409,6 +548,11 @@ def init_routes(app):
             document_type=enum_to_value(data.get('document_type')),
             document_name=data.get('document_name')
         )
+        process_uploaded_document(
+            document_id=professional_document.id,
+            document_kind=DocumentIngest.PROFESSIONAL_DOCUMENT,
+            file_path=professional_document.file_path
+        )
         return SuccessResponse({
             'id': professional_document.id,
             'professional_id': professional_document.professional_id
@@ -421,6 +565,7 @@ def init_routes(app):
             professional_id=str(data.get('professional_id')),
             document_id=str(data.get('document_id'))
         )
+        schedule_file_reclaim()
         return SuccessResponse().generate_response()
 
     @app.route('/api/professional/document/types', methods=['GET'])
@@ -428,4 +573,63 @@ def init_routes(app):
         validate_request(endpoint=Endpoints.GET_PROFESSIONAL_DOCUMENT_TYPES)
         return SuccessResponse({
             'document_types': ProfessionalManager().get_document_types()
-        }).generate_response()
\ No newline at end of file
+        }).generate_response()
+
+    @app.route('/api/search', methods=['GET'])
+    def search():
+        data = validate_request(endpoint=Endpoints.SEARCH)
+        search_type = data.get('type')
+        projects, professionals = [], []
+        if search_type in (None, 'projects'):
+            projects = ProjectManager.search(data['q'], limit=data['limit'], offset=data['offset'])
+        if search_type in (None, 'professionals'):
+            professionals = ProfessionalManager.search(data['q'], limit=data['limit'], offset=data['offset'])
+        return SuccessResponse({
+            'projects': [{
+                'id': project.id,
+                'name': project.name,
+                'request_number': project.request_number,
+                'status': project.status,
+                'permit_owner': project.permit_owner.name,
+                'status_due_date': project.status_due_date.isoformat() if project.status_due_date else None,
+            } for project in projects],
+            'professionals': [{
+                'id': prof.id,
+                'name': prof.name,
+                'email': prof.email,
+                'national_id': prof.national_id,
+                'professional_type': prof.professional_type,
+                'status': prof.status,
+            } for prof in professionals],
+        }).generate_response()
+
+    @app.route('/api/sync', methods=['GET'])
+    def sync():
+        data = validate_request(endpoint=Endpoints.SYNC)
+        changes = SyncManager.get_changes(since=data.get('since'))
+        return SuccessResponse({
+            'projects': [{
+                'id': project.id,
+                'name': project.name,
+                'request_number': project.request_number,
+                'status': project.status,
+                'permit_owner': project.permit_owner.name,
+                'status_due_date': project.status_due_date.isoformat() if project.status_due_date else None,
+            } for project in changes['projects']],
+            'professionals': [{
+                'id': prof.id,
+                'name': prof.name,
+                'email': prof.email,
+                'professional_type': prof.professional_type,
+                'status': prof.status,
+            } for prof in changes['professionals']],
+            'deleted_projects': changes['deleted_projects'],
+            'deleted_professionals': changes['deleted_professionals'],
+            'reset': changes['reset'],
+            'cursor': changes['cursor'],
+        }).generate_response()
+
+    @app.route('/api/metrics/db-pool', methods=['GET'])
+    def get_db_pool_metrics():
+        validate_request(endpoint=Endpoints.GET_DB_POOL_METRICS)
+        return SuccessResponse({'db_pool': get_pool_metrics()}).generate_response()
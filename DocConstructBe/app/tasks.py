@@ -0,0 +1,140 @@
+import logging
+import os
+import posixpath
+
+from app import executor
+from app.errors import DocumentPreviewNotAvailable
+from config.sys_config import INGEST_NORMALIZE, INGEST_KEEP_ORIGINAL
+from sqlalchemy import select, union
+
+from data_model.models import (
+    DocumentIngest,
+    PendingFileDeletion,
+    ProfessionalDocument,
+    ProjectDocument,
+)
+from database.database import after_commit, dialect_insert, session_scope
+from storage.storage import get_storage
+from utils.ingest import normalize_file
+from utils.thumbnail import get_thumbnail
+
+ORIGINALS_PREFIX = 'originals'
+RECLAIM_BATCH_SIZE = 100
+
+DOCUMENT_MODELS = {
+    DocumentIngest.PROJECT_DOCUMENT: ProjectDocument,
+    DocumentIngest.PROFESSIONAL_DOCUMENT: ProfessionalDocument,
+}
+
+
+def generate_thumbnail(file_path: str) -> None:
+    try:
+        get_thumbnail(file_path)
+    except DocumentPreviewNotAvailable:
+        # The render error is already logged; the document keeps no preview
+        pass
+    except Exception as e:
+        # A missing preview is not worth failing anything for; it is retried on first view
+        logging.warning(f"Error generating thumbnail for {file_path}: {e}")
+
+
+def normalize_document(document_id: str, document_kind: str, file_path: str) -> None:
+    storage = get_storage()
+    try:
+        with storage.local_path(file_path) as local_path:
+            original_size = os.path.getsize(local_path)
+            normalized_path = normalize_file(local_path)
+            if normalized_path is None:
+                return
+            original_file_path = None
+            if INGEST_KEEP_ORIGINAL:
+                original_file_path = posixpath.join(ORIGINALS_PREFIX, storage.normalize_key(file_path))
+                storage.save(original_file_path, local_path)
+        try:
+            stored_size = os.path.getsize(normalized_path)
+            storage.save(file_path, normalized_path)
+        finally:
+            os.remove(normalized_path)
+        with session_scope() as session:
+            # Deletes lock the document before reading its ingests, so either the delete sees
+            # this record or this sees the document gone
+            document = DOCUMENT_MODELS[document_kind]
+            if session.scalar(select(document.id).where(document.id == document_id).with_for_update()) is None:
+                # Deleted while it was being normalized; the files just written go with it
+                session.execute(dialect_insert(PendingFileDeletion.__table__).values([
+                    {'file_path': key} for key in (file_path, original_file_path) if key
+                ]).on_conflict_do_nothing())
+                return
+            session.add(DocumentIngest(
+                document_id=document_id,
+                document_kind=document_kind,
+                original_size=original_size,
+                stored_size=stored_size,
+                original_file_path=original_file_path,
+            ))
+    except Exception as e:
+        # The original upload is already stored, so it is kept as is
+        logging.warning(f"Error normalizing document {file_path}: {e}")
+
+
+def _process_uploaded_document(document_id: str, document_kind: str, file_path: str) -> None:
+    if INGEST_NORMALIZE:
+        normalize_document(document_id, document_kind, file_path)
+    generate_thumbnail(file_path)
+
+
+def process_uploaded_document(document_id: str, document_kind: str, file_path: str) -> None:
+    """Post-upload work that should not add to the upload request's latency, started once the upload commits."""
+    after_commit(executor.submit, _process_uploaded_document, document_id, document_kind, file_path)
+
+
+def _keys_in_use(session, keys: list[str]) -> set[str]:
+    # A new upload may have been stored under a key queued by an earlier delete
+    return set(session.scalars(union(
+        select(ProjectDocument.file_path).where(ProjectDocument.file_path.in_(keys)),
+        select(ProfessionalDocument.file_path).where(ProfessionalDocument.file_path.in_(keys)),
+        select(DocumentIngest.original_file_path).where(DocumentIngest.original_file_path.in_(keys)),
+    )))
+
+
+def reclaim_files() -> int:
+    """
+    Remove the files queued by document, project and professional deletes from storage.
+    Returns how many were removed; files that fail stay queued for the next run.
+    """
+    storage = get_storage()
+    reclaimed = 0
+    while True:
+        with session_scope() as session:
+            pending = session.query(PendingFileDeletion).order_by(
+                PendingFileDeletion.created_at
+            ).limit(RECLAIM_BATCH_SIZE).with_for_update(skip_locked=True).all()
+            if not pending:
+                return reclaimed
+            in_use = _keys_in_use(session, [entry.file_path for entry in pending])
+            failed = False
+            for entry in pending:
+                if entry.file_path not in in_use:
+                    try:
+                        storage.delete(entry.file_path)
+                        reclaimed += 1
+                    except Exception as e:
+                        logging.warning(f"Error removing file {entry.file_path}: {e}")
+                        failed = True
+                        continue
+                session.delete(entry)
+        if failed:
+            return reclaimed
+
+
+def _reclaim_files() -> None:
+    try:
+        reclaim_files()
+    except Exception as e:
+        # Whatever is left stays queued for the next delete or `flask reclaim-files`
+        logging.warning(f"Error reclaiming deleted files: {e}")
+
+
+def schedule_file_reclaim() -> None:
+    """Remove the files of the current transaction's deletes in the background once it commits."""
+    after_commit(executor.submit, _reclaim_files)
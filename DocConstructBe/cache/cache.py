@@ -0,0 +1,252 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+from config.sys_config import (
+    CACHE_BACKEND,
+    CACHE_DISK_MAX_BYTES,
+    CACHE_FOLDER,
+    CACHE_REDIS_URL,
+    CACHE_TTL_SECONDS,
+    CACHE_LOCAL_MAX_ENTRIES,
+)
+
+"""
+Read Cache Module
+
+Read endpoints cache their payloads per entity, e.g. the project detail page, in an
+in-process LRU and optionally in a store shared by every worker. Each entity has a version
+token kept in the shared store; the manager write paths invalidate an entity by minting a
+new token, which retires the copies held by every worker at once.
+
+The shared stores hold JSON: the payloads are the JSON bodies of the responses anyway, and
+an entry read back from a shared folder or server is only ever parsed, never executed.
+An entry comes back as a [version, payload] list.
+"""
+
+VERSION_SUFFIX = '#version'
+
+
+class CacheStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+
+class LocalStore(CacheStore):
+    """Least-recently-used entries of this process."""
+
+    def __init__(self, max_entries: int = CACHE_LOCAL_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class DiskStore(CacheStore):
+    """JSON entries in CACHE_FOLDER, shared by the workers of one host."""
+    # Every this many writes a worker prunes the folder back under max_bytes
+    PRUNE_EVERY = 100
+
+    def __init__(self, folder: str = CACHE_FOLDER, ttl: int = CACHE_TTL_SECONDS,
+                 max_bytes: int = CACHE_DISK_MAX_BYTES):
+        self.folder = folder
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.writes = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def get(self, key: str) -> Any:
+        try:
+            with open(self._path(key), 'rb') as f:
+                if os.fstat(f.fileno()).st_mtime + self.ttl >= time.time():
+                    return json.load(f)
+        except FileNotFoundError:
+            return None
+        self._remove(self._path(key))
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        # Written aside and renamed, so readers see the old entry or the new one, never half of it
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, separators=(',', ':'))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.writes += 1
+        if self.writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """Remove the expired entries, then the least recently written until the folder fits max_bytes."""
+        expired_before = time.time() - self.ttl
+        entries = []
+        total_size = 0
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                try:
+                    stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                # Includes the .tmp files of writers that died before renaming them
+                if stat_result.st_mtime < expired_before:
+                    self._remove(entry.path)
+                    continue
+                entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+                total_size += stat_result.st_size
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another worker got to it first
+            pass
+
+
+class RedisStore(CacheStore):
+    """Entries in a Redis-protocol server, shared by every worker of every host."""
+
+    def __init__(self, url: str = CACHE_REDIS_URL, ttl: int = CACHE_TTL_SECONDS):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Any:
+        value = self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(key, json.dumps(value, separators=(',', ':')), ex=self.ttl)
+
+
+class ReadCache:
+    def __init__(self, local: LocalStore, shared: CacheStore = None):
+        self.local = local
+        self.shared = shared
+        # Without a shared store there is a single process, which then holds the versions too
+        self.versions = shared or local
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def _version(self, key: str) -> str:
+        version = self.versions.get(key + VERSION_SUFFIX)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.versions.set(key + VERSION_SUFFIX, version)
+        return version
+
+    def get_or_load(self, kind: str, entity_id: str, loader: Callable[[], Any]) -> Any:
+        """
+        The cached payload of an entity, or loader()'s result stored for the next read. A payload
+        loaded while a write commits is stored under the version read before loading it, so it is
+        never served once that write has invalidated the entity.
+        """
+        key = f'{kind}:{entity_id}'
+        try:
+            version = self._version(key)
+            entry = self.local.get(key)
+            if (entry is None or entry[0] != version) and self.shared is not None:
+                entry = self.shared.get(key)
+                if entry is not None and entry[0] == version:
+                    self.local.set(key, entry)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        except Exception as e:
+            # An unreachable shared store costs the cache, not the request
+            logging.warning(f"Error reading cache entry {key}: {e}")
+            return loader()
+        payload = loader()
+        try:
+            self.local.set(key, (version, payload))
+            if self.shared is not None:
+                self.shared.set(key, (version, payload))
+        except Exception as e:
+            logging.warning(f"Error writing cache entry {key}: {e}")
+        return payload
+
+    def invalidate(self, kind: str, entity_ids: Iterable[str]) -> None:
+        """Retire the cached payloads of the given entities; call it after the write commits."""
+        for entity_id in entity_ids:
+            key = f'{kind}:{entity_id}'
+            try:
+                self.versions.set(key + VERSION_SUFFIX, uuid.uuid4().hex)
+            except Exception as e:
+                logging.error(f"Error invalidating cache entry {key}, it may be served stale: {e}")
+
+
+class NullCache(ReadCache):
+    def __init__(self):
+        super().__init__(local=None)
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def get_or_load(self, kind: str, entity_id: str, loader: Callable[[], Any]) -> Any:
+        return loader()
+
+    def invalidate(self, kind: str, entity_ids: Iterable[str]) -> None:
+        pass
+
+
+SHARED_STORES = {
+    'local': None,
+    'disk': DiskStore,
+    'redis': RedisStore,
+}
+
+
+@functools.cache
+def get_cache() -> ReadCache:
+    if CACHE_BACKEND == 'none':
+        return NullCache()
+    shared_store = SHARED_STORES[CACHE_BACKEND]
+    return ReadCache(LocalStore(), shared_store() if shared_store is not None else None)
@@ -14,6 +14,53 @@ APP_PATH = os.getenv('APP_PATH')
 
 DOCUMENTS_FOLDER = os.path.join(APP_PATH, "documents")
 
+# Where document bytes live: "local" (DOCUMENTS_FOLDER) or "s3" (any S3-compatible store)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+S3_BUCKET = os.getenv('S3_BUCKET')
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL')
+S3_REGION = os.getenv('S3_REGION')
+S3_PREFIX = os.getenv('S3_PREFIX', '')
+S3_PRESIGNED_URL_EXPIRES = int(os.getenv('S3_PRESIGNED_URL_EXPIRES', '300'))
+
+# Local document downloads: "direct" streams the file from Flask, "x-accel" hands the
+# transfer to nginx through an internal location that aliases DOCUMENTS_FOLDER.
+# The s3 backend always redirects to a presigned URL.
+DOWNLOAD_MODE = os.getenv('DOWNLOAD_MODE', 'direct')
+X_ACCEL_LOCATION = os.getenv('X_ACCEL_LOCATION', '/protected-documents')
+
+# First-page previews, cached on disk by content hash and evicted least-recently-used first
+THUMBNAILS_FOLDER = os.path.join(APP_PATH, "thumbnails")
+THUMBNAIL_WIDTH = int(os.getenv('THUMBNAIL_WIDTH', '240'))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Optional post-upload recompression of oversized images and PDFs
+INGEST_NORMALIZE = os.getenv('INGEST_NORMALIZE', 'false').lower() == 'true'
+INGEST_KEEP_ORIGINAL = os.getenv('INGEST_KEEP_ORIGINAL', 'false').lower() == 'true'
+INGEST_MIN_SIZE_BYTES = int(os.getenv('INGEST_MIN_SIZE_KB', '256')) * 1024
+INGEST_IMAGE_MAX_DIMENSION = int(os.getenv('INGEST_IMAGE_MAX_DIMENSION', '2480'))
+INGEST_IMAGE_QUALITY = int(os.getenv('INGEST_IMAGE_QUALITY', '85'))
+
+# Per-project compliance counts kept up to date by every write, for the incomplete-projects filter
+COMPLIANCE_SUMMARY = os.getenv('COMPLIANCE_SUMMARY', 'false').lower() == 'true'
+
+# Read endpoint payload cache: "none", "local" (this process only, for a single worker),
+# "disk" (shared by the workers of one host through CACHE_FOLDER) or "redis" (CACHE_REDIS_URL).
+# Every backend but "none" keeps an in-process LRU of CACHE_LOCAL_MAX_ENTRIES in front.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'none')
+CACHE_FOLDER = os.path.join(APP_PATH, "cache")
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '3600'))
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '1024'))
+# The disk backend drops expired entries and then the least recently written past this size
+CACHE_DISK_MAX_BYTES = int(os.getenv('CACHE_DISK_MAX_MB', '256')) * 1024 * 1024
+
+# Licence expiry digests: "log", "file" (one JSON digest per line in NOTIFICATIONS_FILE)
+# or "webhook" (POSTed as JSON to NOTIFIER_WEBHOOK_URL)
+NOTIFIER_BACKEND = os.getenv('NOTIFIER_BACKEND', 'log')
+NOTIFICATIONS_FILE = os.getenv('NOTIFICATIONS_FILE') or os.path.join(APP_PATH, "notifications", "license_digests.jsonl")
+NOTIFIER_WEBHOOK_URL = os.getenv('NOTIFIER_WEBHOOK_URL')
+LICENSE_EXPIRY_NOTICE_DAYS = int(os.getenv('LICENSE_EXPIRY_NOTICE_DAYS', '30'))
+
 CONFIG = os.path.join(APP_CODE, "config")
 TTF_PATH = os.path.join(CONFIG, "Alef-Regular.ttf")
 
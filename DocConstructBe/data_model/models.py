@@ -1,12 +1,13 @@
-from datetime import date, datetime, UTC
+from datetime import date, timedelta
 import re
-from sqlalchemy import Column, String, Date, ForeignKey, UniqueConstraint, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Date, ForeignKey, UniqueConstraint, DateTime, BigInteger, Integer, Index, bindparam, case, text
+from sqlalchemy.orm import column_property, relationship
 
 from app.errors import ValidationError
+from data_model.enum import ProfessionalStatus
 from database.base_model import Base
-from database.database import engine
-from database.database import UUID_F
+from database.database import UUID_F, db_now
+from utils.pagination import sort_expression
 
 
 class PermitOwner(Base):
@@ -17,8 +18,8 @@ class PermitOwner(Base):
     phone = Column(String, nullable=False)
     email = Column(String, nullable=True)
     signature_file_path = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
+    updated_at = Column(DateTime, server_default=db_now(), onupdate=db_now(), nullable=False)
   
     def __init__(self, name: str, address: str, phone: str, email: str = None, signature_file_path: str = None):
         super().__init__()
@@ -35,11 +36,11 @@ class PermitOwner(Base):
 class Project(Base):
     __tablename__ = 'projects'
     id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
-    permit_owner_id = Column(UUID_F(), ForeignKey('permit_owners.id'), nullable=False)
+    permit_owner_id = Column(UUID_F(), ForeignKey('permit_owners.id'), nullable=False, index=True)
     name = Column(String, nullable=False)
     request_number = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    status = Column(String, nullable=True)
+    status = Column(String, nullable=True, index=True)
     status_due_date = Column(Date, nullable=True)
     docs_path = Column(String, nullable=True)
     permit_number = Column(String, nullable=True)
@@ -47,16 +48,27 @@ class Project(Base):
     engineering_coordinator_number = Column(String, nullable=True)
     firefighting_number = Column(String, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
+    updated_at = Column(DateTime, server_default=db_now(), onupdate=db_now(), nullable=False)
 
     
     __table_args__ = (
         UniqueConstraint('request_number', name='uix_request_number'),
+        Index('uix_projects_name', 'name', unique=True),
+        # Keyset pagination sort keys, id breaks ties
+        Index('ix_projects_name_id', 'name', 'id'),
+        Index('ix_projects_status_due_date_id', 'status_due_date', 'id'),
+        # status_due_date is nullable and pages on coalesce(), once per direction; see utils.pagination
+        Index('ix_projects_status_due_date_asc_id', sort_expression(status_due_date), 'id'),
+        Index('ix_projects_status_due_date_desc_id', sort_expression(status_due_date, descending=True), 'id'),
+        Index('ix_projects_created_at_id', 'created_at', 'id'),
+        # Change feed, see SyncManager
+        Index('ix_projects_updated_at_id', 'updated_at', 'id'),
     )
 
-    documents = relationship("ProjectDocument", backref="project", cascade="all,delete")
-    professionals = relationship("ProjectProfessional", backref="project", cascade="all,delete")
+    # The database deletes the children (ON DELETE CASCADE), they are never loaded for it
+    documents = relationship("ProjectDocument", backref="project", cascade="all,delete", passive_deletes=True)
+    professionals = relationship("ProjectProfessional", backref="project", cascade="all,delete", passive_deletes=True)
     permit_owner = relationship("PermitOwner", backref="projects")
 
 
@@ -88,6 +100,14 @@ class Project(Base):
         return f"<Project(name='{self.name}', request_number='{self.request_number}', status='{self.status}', permit_owner='{self.permit_owner.name}')>"
 
 
+# Licences expiring within this many days are reported with the WARNING status
+LICENSE_WARNING_DAYS = 30
+
+
+def license_warning_date() -> date:
+    return date.today() + timedelta(days=LICENSE_WARNING_DAYS)
+
+
 class Professional(Base):
     __tablename__ = 'professionals'
     id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
@@ -98,14 +118,37 @@ class Professional(Base):
     address = Column(String, nullable=False)
     license_number = Column(String, nullable=False)
     license_expiration_date = Column(Date, nullable=False)
-    professional_type = Column(String, nullable=False)
-    status = Column(String, nullable=False)
+    professional_type = Column(String, nullable=False, index=True)
+    # Status as of the last scheduled refresh, which compares it with the current one to
+    # record licence status changes; everything else reads the derived status below
+    stored_status = Column('status', String, nullable=False)
     license_file_path = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
-    updated_at = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
+    updated_at = Column(DateTime, server_default=db_now(), onupdate=db_now(), nullable=False)
 
-    documents = relationship("ProfessionalDocument", backref="professional", cascade="all,delete")
-    projects = relationship("ProjectProfessional", backref="professional", cascade="all,delete")
+    __table_args__ = (
+        Index('uix_professionals_national_id', 'national_id', unique=True),
+        Index('uix_professionals_email', 'email', unique=True),
+        # Keyset pagination sort keys, id breaks ties
+        Index('ix_professionals_name_id', 'name', 'id'),
+        Index('ix_professionals_license_expiration_date_id', 'license_expiration_date', 'id'),
+        Index('ix_professionals_created_at_id', 'created_at', 'id'),
+        # Change feed, see SyncManager
+        Index('ix_professionals_updated_at_id', 'updated_at', 'id'),
+    )
+
+    documents = relationship("ProfessionalDocument", backref="professional", cascade="all,delete", passive_deletes=True)
+    projects = relationship("ProjectProfessional", backref="professional", cascade="all,delete", passive_deletes=True)
+
+    # Derived in the SELECT that loads the row, relationship loads included, so it is exact
+    # on every read without anything being written; the dates are bound per execution
+    status = column_property(case(
+        (license_expiration_date < bindparam('license_status_today', callable_=date.today, type_=Date),
+         ProfessionalStatus.EXPIRED.value),
+        (license_expiration_date < bindparam('license_status_warning_date', callable_=license_warning_date, type_=Date),
+         ProfessionalStatus.WARNING.value),
+        else_=ProfessionalStatus.ACTIVE.value
+    ))
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -138,9 +181,9 @@ class Professional(Base):
 class ProjectProfessional(Base):
     __tablename__ = 'project_professionals'
     id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
-    project_id = Column(UUID_F(), ForeignKey('projects.id'), nullable=False)
-    professional_id = Column(UUID_F(), ForeignKey('professionals.id'), nullable=False)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
+    project_id = Column(UUID_F(), ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    professional_id = Column(UUID_F(), ForeignKey('professionals.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
 
     __table_args__ = (
         UniqueConstraint('project_id', 'professional_id', name='uix_project_professional'),
@@ -153,12 +196,12 @@ class ProjectProfessional(Base):
 class ProjectDocument(Base):
     __tablename__ = 'project_documents'
     id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
-    project_id = Column(UUID_F(), ForeignKey('projects.id'), nullable=False)
+    project_id = Column(UUID_F(), ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
     document_type = Column(String, nullable=False)
     name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     status = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
 
     def __repr__(self):
         return f"<ProjectDocument(project_id='{self.project_id}', id='{self.id}'')>"
@@ -167,16 +210,105 @@ class ProjectDocument(Base):
 class ProfessionalDocument(Base):
     __tablename__ = 'professional_documents'
     id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
-    professional_id = Column(UUID_F(), ForeignKey('professionals.id'), nullable=False)
+    professional_id = Column(UUID_F(), ForeignKey('professionals.id', ondelete='CASCADE'), nullable=False, index=True)
     document_type = Column(String, nullable=False)
     name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     status = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(UTC), nullable=False)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
 
     def __repr__(self):
         return f"<ProfessionalDocument(professional_id='{self.professional_id}', id='{self.id}'')>"
 
 
-def init_tables():
-    Base.metadata.create_all(engine)
+class DocumentIngest(Base):
+    __tablename__ = 'document_ingests'
+    PROJECT_DOCUMENT = 'project'
+    PROFESSIONAL_DOCUMENT = 'professional'
+
+    id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
+    document_id = Column(UUID_F(), nullable=False, index=True)
+    document_kind = Column(String, nullable=False)
+    original_size = Column(BigInteger, nullable=False)
+    stored_size = Column(BigInteger, nullable=False)
+    original_file_path = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
+
+    def __repr__(self):
+        return f"<DocumentIngest(document_id='{self.document_id}', original_size={self.original_size}, stored_size={self.stored_size})>"
+
+
+
+class PendingFileDeletion(Base):
+    """Storage key of a deleted document, kept until the reclaimer has removed the file."""
+    __tablename__ = 'pending_file_deletions'
+    file_path = Column(String, primary_key=True)
+    created_at = Column(DateTime, server_default=db_now(), nullable=False)
+
+    def __repr__(self):
+        return f"<PendingFileDeletion(file_path='{self.file_path}')>"
+
+
+class DeletedEntity(Base):
+    """Tombstone of a deleted project or professional, served by the change feed."""
+    __tablename__ = 'deleted_entities'
+    PROJECT = 'project'
+    PROFESSIONAL = 'professional'
+
+    id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(UUID_F(), nullable=False)
+    deleted_at = Column(DateTime, server_default=db_now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<DeletedEntity(entity_type='{self.entity_type}', entity_id='{self.entity_id}')>"
+
+
+class ProjectCompliance(Base):
+    """Per-project compliance counts, maintained by ComplianceManager when COMPLIANCE_SUMMARY is on."""
+    __tablename__ = 'project_compliance'
+    project_id = Column(UUID_F(), ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    missing_documents = Column(Integer, nullable=False)
+    missing_professionals = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, server_default=db_now(), onupdate=db_now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ProjectCompliance(project_id='{self.project_id}', missing_documents={self.missing_documents}, missing_professionals={self.missing_professionals})>"
+
+
+class LicenseStatusChange(Base):
+    """A professional's stored licence status moving across a threshold, kept until it is notified."""
+    __tablename__ = 'license_status_changes'
+    id = Column(UUID_F(), primary_key=True, default=UUID_F.uuid_allocator, unique=True, nullable=False)
+    professional_id = Column(UUID_F(), ForeignKey('professionals.id', ondelete='CASCADE'), nullable=False, index=True)
+    old_status = Column(String, nullable=False)
+    new_status = Column(String, nullable=False)
+    license_expiration_date = Column(Date, nullable=False)
+    changed_at = Column(DateTime, server_default=db_now(), nullable=False)
+    notified_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only the changes still waiting for a digest are ever scanned
+        Index('ix_license_status_changes_pending', 'changed_at',
+              postgresql_where=text('notified_at IS NULL'), sqlite_where=text('notified_at IS NULL')),
+    )
+
+    def __repr__(self):
+        return f"<LicenseStatusChange(professional_id='{self.professional_id}', old_status='{self.old_status}', new_status='{self.new_status}')>"
+
+
+class ProjectCounter(Base):
+    """One denormalized count of a project, e.g. its signed documents, kept current by ProjectCounterManager."""
+    __tablename__ = 'project_counters'
+    DOCUMENTS = 'documents'
+    PROFESSIONALS = 'professionals'
+
+    project_id = Column(UUID_F(), ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    # documents -> document status, professionals -> professional type
+    kind = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, server_default=db_now(), onupdate=db_now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ProjectCounter(project_id='{self.project_id}', kind='{self.kind}', key='{self.key}', value={self.value})>"
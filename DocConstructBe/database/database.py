@@ -1,31 +1,347 @@
+import logging
 import os
+import random
+import threading
+import time
 import uuid
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, String, create_engine, event, func, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session, scoped_session, sessionmaker
-from sqlalchemy import String
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from sqlalchemy import Uuid
 
 
 def get_db_conn_string():
     if os.environ.get('DATABASE_URL'):
         return os.environ.get('DATABASE_URL')
+    if os.environ.get('DB_ENGINE', 'postgresql') == 'sqlite':
+        return get_sqlite_conn_string()
     db_name = os.environ.get('DB_NAME')
     host = os.environ.get('DB_HOST')
     port = os.environ.get('DB_PORT')
     user = os.environ.get('DB_USER')
     password = os.environ.get('DB_PASS')
-    
+
     # Handle None port value
     if port == 'None' or port is None:
         port = '5432'  # Use default PostgreSQL port
-        
+
     return f'postgresql://{user}:{password}@{host}:{port}/{db_name}'
 
 
+def get_sqlite_conn_string():
+    """
+    Embedded database for local development, tests and benchmarks: DB_SQLITE_PATH is a
+    file, by default doc_construct.db under APP_PATH, or ":memory:" for a private
+    database that lives as long as the process.
+    """
+    path = os.environ.get('DB_SQLITE_PATH') or os.path.join(os.environ.get('APP_PATH') or '.', 'doc_construct.db')
+    if path == ':memory:':
+        return 'sqlite://'
+    return f'sqlite:///{os.path.abspath(path)}'
+
+
+def is_in_memory(conn_string: str) -> bool:
+    url = make_url(conn_string)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def get_replica_conn_strings() -> list[str]:
+    return [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+
+def get_migration_conn_string():
+    # Behind PgBouncer the migrations need a direct connection for their session-level lock
+    return os.environ.get('MIGRATION_DATABASE_URL') or get_db_conn_string()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+class PoolMetrics:
+    """Checkout counters of this process's pool, updated by InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless asked per connection
+    dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    # Readers no longer wait for a writer, which the executor threads and the request compete with
+    dbapi_connection.execute('PRAGMA journal_mode = WAL')
+    dbapi_connection.execute('PRAGMA synchronous = NORMAL')
+
+
+def _create_sqlite_engine(url) -> Engine:
+    if is_in_memory(url):
+        # Every connection to :memory: opens a new, empty database, so the whole process,
+        # migrations and executor threads included, shares the one connection. It does not
+        # survive a fork: run a single process, e.g. the Flask test client or one worker.
+        engine = create_engine(url, echo=False, poolclass=StaticPool,
+                               connect_args={'check_same_thread': False})
+    else:
+        engine = create_engine(url, echo=False, connect_args={'timeout': 30})
+        event.listen(engine, 'connect', _enable_sqlite_wal)
+    event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
+    return engine
+
+
+def _create_engine(conn_string: str, connect_args: dict = None) -> Engine:
+    url = make_url(conn_string)
+    if url.get_backend_name() == 'sqlite':
+        return _create_sqlite_engine(url)
+
+    engine_options = {'echo': False, 'pool_pre_ping': True, 'connect_args': dict(connect_args or {})}
+    if _env_flag('DB_PGBOUNCER'):
+        # PgBouncer owns the pooling; in transaction mode a server connection may change
+        # between statements, so nothing may be prepared on it. psycopg2 never prepares,
+        # psycopg 3 does after a few executions unless told not to.
+        engine_options['poolclass'] = NullPool
+        if url.get_driver_name() == 'psycopg':
+            engine_options['connect_args']['prepare_threshold'] = None
+    else:
+        engine_options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.environ.get('DB_POOL_SIZE', '5')),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', '10')),
+            pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', '30')),
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+        )
+    return create_engine(url, **engine_options)
+
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    This process's engine, created on first use. gunicorn --preload imports the app in
+    the master, so the engine must not exist until each worker asks for it.
+    """
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        with _engine_lock:
+            if _engine is None or _engine_pid != os.getpid():
+                _engine = _create_engine(get_db_conn_string())
+                _engine_pid = os.getpid()
+    return _engine
+
+
+class Replica:
+    """A read replica engine and its last health check."""
+
+    # Replay lag in seconds, or 0 when the replica has replayed everything it received
+    LAG_QUERY = text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )
+
+    def __init__(self, conn_string: str):
+        # A replica that is down must fail fast, the primary is there to fall back to
+        self.engine = _create_engine(conn_string, connect_args={'connect_timeout': 2})
+        self.checked_at = 0.0
+        self.healthy = False
+        self.lag_seconds = None
+
+    def is_usable(self) -> bool:
+        if time.monotonic() - self.checked_at > float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', '5')):
+            self.check()
+        max_lag = float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+        return self.healthy and self.lag_seconds <= max_lag
+
+    def check(self) -> None:
+        self.checked_at = time.monotonic()
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    self.lag_seconds = float(connection.execute(self.LAG_QUERY).scalar() or 0)
+                else:
+                    # No streaming replication to lag behind, e.g. a SQLite copy standing in for tests
+                    connection.execute(text('SELECT 1'))
+                    self.lag_seconds = 0.0
+            self.healthy = True
+        except Exception as e:
+            logging.warning(f"Read replica {self.engine.url.host}:{self.engine.url.port} is unavailable: {e}")
+            self.healthy = False
+
+
+_replicas = None
+_replicas_pid = None
+
+
+def get_replicas() -> list[Replica]:
+    global _replicas, _replicas_pid
+    if _replicas is None or _replicas_pid != os.getpid():
+        with _engine_lock:
+            if _replicas is None or _replicas_pid != os.getpid():
+                _replicas = [Replica(conn_string) for conn_string in get_replica_conn_strings()]
+                _replicas_pid = os.getpid()
+    return _replicas
+
+
+def choose_replica_engine() -> Engine | None:
+    """A random healthy replica that is not lagging too far behind, or None to use the primary."""
+    replicas = get_replicas()
+    for replica in random.sample(replicas, len(replicas)):
+        if replica.is_usable():
+            return replica.engine
+    return None
+
+
+def _reset_after_fork():
+    global _engine, _engine_lock, _replicas, pool_metrics
+    _engine_lock = threading.Lock()
+    pool_metrics = PoolMetrics()
+    # The sockets belong to the parent; forget them without closing them under it
+    if _engine is not None:
+        _engine.dispose(close=False)
+        _engine = None
+    for replica in _replicas or []:
+        replica.engine.dispose(close=False)
+    _replicas = None
+    db_session.registry.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_pool_metrics() -> dict:
+    pool = get_engine().pool
+    metrics = {'pid': os.getpid(), 'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+        })
+    metrics.update(pool_metrics.to_dict())
+    return metrics
+
+
+class EngineSession(Session):
+    """
+    Session that resolves its engine per call instead of capturing one at import time.
+    With info[READ_REPLICA] set, reads go to a replica until the session writes anything;
+    from then on it stays on the primary so it always reads its own writes.
+    """
+    READ_REPLICA = 'read_replica'
+    REPLICA_ENGINE = 'replica_engine'
+    WROTE = 'wrote'
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[self.WROTE] = True
+        elif self.info.get(self.READ_REPLICA) and not self.info.get(self.WROTE):
+            # One replica per session, so lazy loads see the same snapshot as the query before them
+            if self.REPLICA_ENGINE not in self.info:
+                self.info[self.REPLICA_ENGINE] = choose_replica_engine()
+            if self.info[self.REPLICA_ENGINE] is not None:
+                return self.info[self.REPLICA_ENGINE]
+        return get_engine()
+
+
+def dialect_insert(table):
+    """INSERT construct of the primary's dialect, which is where ON CONFLICT lives."""
+    inserts = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+    return inserts[get_engine().dialect.name](table)
+
+
+class db_now(FunctionElement):
+    """
+    The database clock, for timestamp defaults and stamps: now() on PostgreSQL. SQLite's
+    CURRENT_TIMESTAMP has whole seconds while datetimes are bound back with microseconds,
+    so a stamped value would never equal itself as a keyset cursor; there the clock is
+    rendered in the bound format instead.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(db_now)
+def _compile_db_now(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(db_now, 'sqlite')
+def _compile_db_now_sqlite(element, compiler, **kw):
+    # %f is seconds with milliseconds, padded to the six fractional digits SQLAlchemy writes
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def insert_unless_conflicting(instance):
+    """
+    Insert a new, unsaved instance with a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Returns the stored copy, or None when a unique key of the instance was already taken.
+    """
+    mapper = inspect(type(instance))
+    values = {
+        attribute.key: getattr(instance, attribute.key)
+        for attribute in mapper.column_attrs
+        if getattr(instance, attribute.key) is not None
+    }
+    statement = dialect_insert(mapper.class_).values(**values).on_conflict_do_nothing().returning(mapper.class_)
+    return db_session.scalars(statement).first()
+
+
 @contextmanager
-def session_scope(engine):
+def session_scope(engine: Engine = None):
     """Provide a transactional scope around a series of operations."""
-    session = Session(bind=engine)
+    session = Session(bind=engine or get_engine())
     try:
         yield session
         session.commit()
@@ -36,30 +352,84 @@ def session_scope(engine):
         session.close()
 
 
-engine = create_engine(
-    get_db_conn_string(),
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=200,
-    max_overflow=0
-)
-
-
 db_session = scoped_session(
     sessionmaker(
+        class_=EngineSession,
         autocommit=False,
         autoflush=False,
-        bind=engine
     )
 )
 
+# db_session.info keys of the callbacks waiting for its current transaction to end
+AFTER_COMMIT = 'after_commit'
+AFTER_ROLLBACK = 'after_rollback'
+
+
+def after_commit(callback, *args) -> None:
+    """Run callback(*args) once db_session's current transaction commits; dropped if it rolls back."""
+    db_session.info.setdefault(AFTER_COMMIT, []).append((callback, args))
+
+
+def after_rollback(callback, *args) -> None:
+    """Run callback(*args) if db_session's current transaction rolls back, e.g. to remove a stored file."""
+    db_session.info.setdefault(AFTER_ROLLBACK, []).append((callback, args))
+
+
+def _run_callbacks(callbacks: list) -> None:
+    for callback, args in callbacks:
+        try:
+            callback(*args)
+        except Exception as e:
+            # The transaction is over either way, one failed follow-up must not skip the others
+            logging.warning(f"Error running {callback} after the transaction ended: {e}")
+
 
-class UUID_F(String):
-    UUID_SIZE = 36
+@event.listens_for(EngineSession, 'after_commit')
+def _run_after_commit(session):
+    session.info.pop(AFTER_ROLLBACK, None)
+    _run_callbacks(session.info.pop(AFTER_COMMIT, []))
+
+
+@event.listens_for(EngineSession, 'after_soft_rollback')
+def _run_after_rollback(session, previous_transaction):
+    # Nothing was written after all, so there is no write to read back from the primary
+    session.info.pop(EngineSession.WROTE, None)
+    session.info.pop(AFTER_COMMIT, None)
+    _run_callbacks(session.info.pop(AFTER_ROLLBACK, []))
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Commit every write made on db_session inside the block at once, or roll all of them back.
+    Requests get this from app.db_routing; managers only flush, so use it to call them elsewhere.
+    """
+    try:
+        yield db_session
+        db_session.commit()
+    except BaseException:
+        db_session.rollback()
+        raise
+
+
+class UUID_F(Uuid):
+    """
+    Native uuid on PostgreSQL, 32-character hex elsewhere.
+    Values stay plain strings in Python so the API keeps emitting the usual form.
+    """
 
     def __init__(self):
-        super().__init__(self.UUID_SIZE)
+        super().__init__(as_uuid=False)
 
     @staticmethod
     def uuid_allocator():
         return str(uuid.uuid4())
+
+
+@compiles(UUID_F)
+def _compile_uuid_f(type_, compiler, **kw):
+    if compiler.dialect.supports_native_uuid:
+        return compiler.visit_uuid(type_, **kw)
+    # The hex is kept in the VARCHAR(36) the baseline created, which migration 0003 left in
+    # place outside PostgreSQL and the later migrations declare too, rather than Uuid's CHAR(32)
+    return compiler.process(String(36), **kw)
@@ -0,0 +1,17 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+
+MIGRATIONS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def get_alembic_config() -> Config:
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS_FOLDER)
+    return config
+
+
+def upgrade_database(revision: str = 'head') -> None:
+    """Bring the schema up to date in place; safe to call on every startup."""
+    command.upgrade(get_alembic_config(), revision)
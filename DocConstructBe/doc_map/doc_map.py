@@ -1,4 +1,4 @@
-from data_model.enum import ProjectDocumentType
+from data_model.enum import ProjectDocumentType, ProfessionalType
 from data_model.models import Professional, PermitOwner
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
@@ -26,6 +26,11 @@ class DocumentMap:
     PROF_DOC_CONFIG = load_prof_doc_config()
     DOCUMENT_FIELD_COORDINATE_MAP = PROF_DOC_CONFIG.get('DOCUMENT_FIELD_COORDINATE_MAP')
     DOCUMENT_PROFESSIONAL_MAP = PROF_DOC_CONFIG.get('DOCUMENT_PROFESSIONAL_MAP')
+    # Document type name -> stored professional_type values, ready for an SQL IN (...)
+    DOCUMENT_PROFESSIONAL_TYPES = {
+        document_type: [ProfessionalType[professional_type].value for professional_type in professional_types]
+        for document_type, professional_types in DOCUMENT_PROFESSIONAL_MAP.items()
+    }
     TTF_PATH = TTF_PATH
 
 
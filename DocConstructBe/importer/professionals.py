@@ -0,0 +1,111 @@
+import csv
+import os
+from datetime import date, datetime
+from typing import Iterator
+
+from openpyxl import load_workbook
+
+from app.errors import InvalidFileFormat
+from data_model.enum import ProfessionalType
+
+"""
+Professional Registry Import Module
+
+Streams rows out of a CSV or XLSX registry export and normalizes them to the fields of
+ProfessionalManager.create(). Rows are yielded one at a time so a registry of any size
+is never held in memory at once.
+"""
+
+FIELDS = ['name', 'national_id', 'email', 'phone', 'address', 'license_number',
+          'license_expiration_date', 'professional_type']
+
+# Spreadsheet header row; data starts on the next line
+HEADER_ROW = 1
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d.%m.%Y']
+
+
+def _header_key(header) -> str:
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def _iter_csv(path: str) -> Iterator[list]:
+    # utf-8-sig drops the BOM Excel puts in front of "CSV UTF-8" exports
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+
+def _iter_xlsx(path: str) -> Iterator[tuple]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    raise ValueError('Expected a date such as 2030-12-31 or 31/12/2030')
+
+
+def _parse_professional_type(value) -> str:
+    value = str(value).strip()
+    if value in ProfessionalType.__members__:
+        return ProfessionalType[value].value
+    professional_type = ProfessionalType.map_to_value(value)
+    if not isinstance(professional_type, ProfessionalType):
+        raise ValueError(f"Unknown professional type '{value}'")
+    return professional_type.value
+
+
+def normalize_row(values: dict) -> tuple[dict, dict]:
+    """Return (fields, errors) for one raw row keyed by field name."""
+    fields, errors = {}, {}
+    for field in FIELDS:
+        value = values.get(field)
+        if value is None or str(value).strip() == '':
+            errors[field] = 'Missing value'
+            continue
+        try:
+            if field == 'license_expiration_date':
+                fields[field] = _parse_date(value)
+            elif field == 'professional_type':
+                fields[field] = _parse_professional_type(value)
+            else:
+                # Spreadsheets hand back numeric IDs and phones as numbers
+                fields[field] = str(int(value) if isinstance(value, float) and value.is_integer() else value).strip()
+        except ValueError as e:
+            errors[field] = str(e)
+    return fields, errors
+
+
+def read_professional_rows(path: str) -> Iterator[tuple[int, dict, dict]]:
+    """Yield (line number, fields, errors) for every non-empty data row of a CSV or XLSX file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        rows = _iter_csv(path)
+    elif extension == '.xlsx':
+        rows = _iter_xlsx(path)
+    else:
+        raise InvalidFileFormat(extension or path)
+
+    header = next(rows, None)
+    if header is None:
+        return
+    keys = [_header_key(column) for column in header]
+    missing_columns = [field for field in FIELDS if field not in keys]
+    if missing_columns:
+        raise InvalidFileFormat(f"missing columns {', '.join(missing_columns)}")
+
+    for line_number, row in enumerate(rows, start=HEADER_ROW + 1):
+        if not any(value not in (None, '') for value in row):
+            continue
+        yield (line_number, *normalize_row(dict(zip(keys, row))))
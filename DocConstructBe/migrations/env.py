@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from database.base_model import Base
+from database.database import get_engine, get_migration_conn_string, is_in_memory
+import data_model.models  # noqa: F401 - registers the tables on Base.metadata
+
+# Arbitrary key so only one process (replica or worker) migrates at a time
+MIGRATION_LOCK_ID = 7262910
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=get_migration_conn_string(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    conn_string = get_migration_conn_string()
+    if is_in_memory(conn_string):
+        # A separate connection would migrate a separate, empty database
+        engine = get_engine()
+    else:
+        # A throwaway engine, so a preloading master process keeps no pooled connections
+        engine = create_engine(conn_string, poolclass=NullPool)
+    with engine.connect() as connection:
+        is_postgresql = connection.dialect.name == 'postgresql'
+        if is_postgresql:
+            connection.execute(text('SELECT pg_advisory_lock(:lock_id)'), {'lock_id': MIGRATION_LOCK_ID})
+            connection.commit()
+        try:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                transaction_per_migration=True,
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if is_postgresql:
+                connection.execute(text('SELECT pg_advisory_unlock(:lock_id)'), {'lock_id': MIGRATION_LOCK_ID})
+                connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
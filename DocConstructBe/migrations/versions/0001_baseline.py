@@ -0,0 +1,125 @@
+"""Baseline schema
+
+Creates the tables that init_tables() used to create with create_all. Databases that
+already have them (everything deployed before migrations existed) are left untouched
+and simply get stamped with this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+UUID_SIZE = 36
+
+
+def _uuid(**kwargs):
+    return sa.Column(kwargs.pop('name'), sa.String(UUID_SIZE), **kwargs)
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade():
+    _create_table(
+        'permit_owners',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('signature_file_path', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    _create_table(
+        'projects',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        _uuid(name='permit_owner_id', nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('request_number', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('status_due_date', sa.Date(), nullable=True),
+        sa.Column('docs_path', sa.String(), nullable=True),
+        sa.Column('permit_number', sa.String(), nullable=True),
+        sa.Column('construction_supervision_number', sa.String(), nullable=True),
+        sa.Column('engineering_coordinator_number', sa.String(), nullable=True),
+        sa.Column('firefighting_number', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['permit_owner_id'], ['permit_owners.id']),
+        sa.UniqueConstraint('request_number', name='uix_request_number'),
+    )
+    _create_table(
+        'professionals',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('national_id', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('phone', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('license_number', sa.String(), nullable=False),
+        sa.Column('license_expiration_date', sa.Date(), nullable=False),
+        sa.Column('professional_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('license_file_path', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    _create_table(
+        'project_professionals',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        _uuid(name='project_id', nullable=False),
+        _uuid(name='professional_id', nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+        sa.ForeignKeyConstraint(['professional_id'], ['professionals.id']),
+        sa.UniqueConstraint('project_id', 'professional_id', name='uix_project_professional'),
+    )
+    _create_table(
+        'project_documents',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        _uuid(name='project_id', nullable=False),
+        sa.Column('document_type', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id']),
+    )
+    _create_table(
+        'professional_documents',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        _uuid(name='professional_id', nullable=False),
+        sa.Column('document_type', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['professional_id'], ['professionals.id']),
+    )
+    _create_table(
+        'document_ingests',
+        _uuid(name='id', primary_key=True, unique=True, nullable=False),
+        _uuid(name='document_id', nullable=False, index=True),
+        sa.Column('document_kind', sa.String(), nullable=False),
+        sa.Column('original_size', sa.BigInteger(), nullable=False),
+        sa.Column('stored_size', sa.BigInteger(), nullable=False),
+        sa.Column('original_file_path', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    for table in ('document_ingests', 'professional_documents', 'project_documents',
+                  'project_professionals', 'professionals', 'projects', 'permit_owners'):
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""Foreign-key and lookup indexes
+
+On PostgreSQL the indexes are built CONCURRENTLY so a live database keeps taking
+writes while they are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_project_documents_project_id', 'project_documents', ['project_id']),
+    ('ix_project_professionals_professional_id', 'project_professionals', ['professional_id']),
+    ('ix_professional_documents_professional_id', 'professional_documents', ['professional_id']),
+    ('ix_professionals_national_id', 'professionals', ['national_id']),
+    ('ix_professionals_email', 'professionals', ['email']),
+    ('ix_projects_name', 'projects', ['name']),
+    ('ix_projects_permit_owner_id', 'projects', ['permit_owner_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,185 @@
+"""Native UUID keys
+
+Primary and foreign keys move from VARCHAR(36) to the native uuid type on PostgreSQL.
+The conversion runs online: shadow uuid columns are added and kept in sync by a
+trigger, back-filled in small batches, indexed CONCURRENTLY and only then swapped in
+with one short transaction. Foreign keys are re-added NOT VALID and validated
+afterwards, so no step holds an exclusive lock while scanning a table.
+
+Other engines keep their character column and store the 32-character hex form that
+the Uuid type uses there.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+SHADOW_SUFFIX = '__uuid'
+
+# table -> uuid columns
+UUID_COLUMNS = {
+    'permit_owners': ['id'],
+    'projects': ['id', 'permit_owner_id'],
+    'professionals': ['id'],
+    'project_professionals': ['id', 'project_id', 'professional_id'],
+    'project_documents': ['id', 'project_id'],
+    'professional_documents': ['id', 'professional_id'],
+    'document_ingests': ['id', 'document_id'],
+}
+
+# (table, constraint name, columns)
+PRIMARY_KEYS = [(table, f'{table}_pkey', ['id']) for table in UUID_COLUMNS]
+UNIQUE_CONSTRAINTS = [
+    ('project_professionals', 'uix_project_professional', ['project_id', 'professional_id']),
+]
+INDEXES = [
+    ('projects', 'ix_projects_permit_owner_id', ['permit_owner_id']),
+    ('project_professionals', 'ix_project_professionals_professional_id', ['professional_id']),
+    ('project_documents', 'ix_project_documents_project_id', ['project_id']),
+    ('professional_documents', 'ix_professional_documents_professional_id', ['professional_id']),
+    ('document_ingests', 'ix_document_ingests_document_id', ['document_id']),
+]
+
+# (table, column, referenced table)
+FOREIGN_KEYS = [
+    ('projects', 'permit_owner_id', 'permit_owners'),
+    ('project_professionals', 'project_id', 'projects'),
+    ('project_professionals', 'professional_id', 'professionals'),
+    ('project_documents', 'project_id', 'projects'),
+    ('professional_documents', 'professional_id', 'professionals'),
+]
+
+
+def _shadow(column):
+    return f'{column}{SHADOW_SUFFIX}'
+
+
+def _fk_name(table, column):
+    return f'{table}_{column}_fkey'
+
+
+def _sync_function(table):
+    return f'{table}_uuid_sync'
+
+
+def _add_shadow_columns(table, columns):
+    for column in columns:
+        op.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {_shadow(column)} uuid')
+    # Rows written while the back-fill runs are converted by the trigger
+    assignments = ' '.join(f'NEW.{_shadow(c)} := NEW.{c}::uuid;' for c in columns)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {_sync_function(table)}() RETURNS trigger AS $$
+        BEGIN {assignments} RETURN NEW; END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f'DROP TRIGGER IF EXISTS {_sync_function(table)} ON {table}')
+    op.execute(f"""
+        CREATE TRIGGER {_sync_function(table)} BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {_sync_function(table)}()
+    """)
+
+
+def _backfill(table, columns):
+    connection = op.get_bind()
+    assignments = ', '.join(f'{_shadow(c)} = {c}::uuid' for c in columns)
+    pending = ' OR '.join(f'({_shadow(c)} IS NULL AND {c} IS NOT NULL)' for c in columns)
+    statement = sa.text(f"""
+        UPDATE {table} SET {assignments}
+        WHERE ctid IN (SELECT ctid FROM {table} WHERE {pending} LIMIT :batch_size)
+    """)
+    while connection.execute(statement, {'batch_size': BATCH_SIZE}).rowcount:
+        pass
+
+
+def _shadow_index(name, table, columns, unique=False):
+    shadow_columns = ', '.join(_shadow(c) for c in columns)
+    unique_sql = 'UNIQUE ' if unique else ''
+    op.execute(f'CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name}{SHADOW_SUFFIX} '
+               f'ON {table} ({shadow_columns})')
+
+
+def _prepare_postgresql():
+    with op.get_context().autocommit_block():
+        for table, columns in UUID_COLUMNS.items():
+            _add_shadow_columns(table, columns)
+            _backfill(table, columns)
+            for column in columns:
+                # A validated CHECK lets SET NOT NULL skip its full-table scan during the swap
+                op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_shadow(column)}_not_null')
+                op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {_shadow(column)}_not_null '
+                           f'CHECK ({_shadow(column)} IS NOT NULL) NOT VALID')
+                op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {_shadow(column)}_not_null')
+        for table, name, columns in PRIMARY_KEYS + UNIQUE_CONSTRAINTS:
+            _shadow_index(name, table, columns, unique=True)
+        for table, name, columns in INDEXES:
+            _shadow_index(name, table, columns)
+
+
+def _swap_postgresql():
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    for table, column, _ in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_fk_name(table, column)}')
+    for table, columns in UUID_COLUMNS.items():
+        op.execute(f'DROP TRIGGER {_sync_function(table)} ON {table}')
+        op.execute(f'DROP FUNCTION {_sync_function(table)}()')
+        for column in columns:
+            # Drops the old primary key, unique constraint and indexes along with it
+            op.execute(f'ALTER TABLE {table} DROP COLUMN {column} CASCADE')
+            op.execute(f'ALTER TABLE {table} RENAME COLUMN {_shadow(column)} TO {column}')
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT {_shadow(column)}_not_null')
+    for table, name, _ in PRIMARY_KEYS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} PRIMARY KEY USING INDEX {name}{SHADOW_SUFFIX}')
+    for table, name, _ in UNIQUE_CONSTRAINTS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}{SHADOW_SUFFIX}')
+    for _, name, _ in INDEXES:
+        op.execute(f'ALTER INDEX {name}{SHADOW_SUFFIX} RENAME TO {name}')
+    for table, column, referenced_table in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {_fk_name(table, column)} '
+                   f'FOREIGN KEY ({column}) REFERENCES {referenced_table} (id) NOT VALID')
+
+
+def _validate_foreign_keys():
+    with op.get_context().autocommit_block():
+        for table, column, _ in FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {_fk_name(table, column)}')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        for table, columns in UUID_COLUMNS.items():
+            for column in columns:
+                op.execute(f"UPDATE {table} SET {column} = replace({column}, '-', '')")
+        return
+
+    _prepare_postgresql()
+    _swap_postgresql()
+    _validate_foreign_keys()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        for table, columns in UUID_COLUMNS.items():
+            for column in columns:
+                op.execute(
+                    f"UPDATE {table} SET {column} = substr({column}, 1, 8) || '-' || substr({column}, 9, 4) "
+                    f"|| '-' || substr({column}, 13, 4) || '-' || substr({column}, 17, 4) "
+                    f"|| '-' || substr({column}, 21) WHERE length({column}) = 32"
+                )
+        return
+
+    for table, column, _ in FOREIGN_KEYS:
+        op.drop_constraint(_fk_name(table, column), table, type_='foreignkey')
+    for table, columns in UUID_COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=sa.String(36), postgresql_using=f'{column}::text')
+    for table, column, referenced_table in FOREIGN_KEYS:
+        op.create_foreign_key(_fk_name(table, column), table, referenced_table, [column], ['id'])
@@ -0,0 +1,41 @@
+"""List endpoint sort and filter indexes
+
+Composite (sort key, id) indexes back keyset pagination of the project and professional
+lists. ix_projects_name_id also serves the name lookups ix_projects_name was added for,
+so that index is dropped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_projects_name_id', 'projects', ['name', 'id']),
+    ('ix_projects_status_due_date_id', 'projects', ['status_due_date', 'id']),
+    ('ix_projects_created_at_id', 'projects', ['created_at', 'id']),
+    ('ix_projects_status', 'projects', ['status']),
+    ('ix_professionals_name_id', 'professionals', ['name', 'id']),
+    ('ix_professionals_license_expiration_date_id', 'professionals', ['license_expiration_date', 'id']),
+    ('ix_professionals_created_at_id', 'professionals', ['created_at', 'id']),
+    ('ix_professionals_professional_type', 'professionals', ['professional_type']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index('ix_projects_name', table_name='projects', if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_projects_name', 'projects', ['name'], if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,71 @@
+"""Search indexes
+
+Expression GIN indexes over the text that utils.search matches against: a tsvector
+index for word-prefix search and, where the pg_trgm extension can be installed, a
+trigram index for fuzzy and substring search. Only PostgreSQL gets them; other engines
+search with a plain scan.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TEXT_SEARCH_CONFIG = 'simple'
+
+# Must stay identical to utils.search.search_document() for the planner to use the indexes
+SEARCH_DOCUMENTS = {
+    'projects': ['name', 'request_number', 'description'],
+    'professionals': ['name', 'national_id', 'license_number', 'email'],
+}
+
+
+def _document(columns):
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def _create_trigram_extension():
+    connection = op.get_bind()
+    available = connection.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).first()
+    if not available:
+        logging.warning("pg_trgm is not available, search will not be typo tolerant")
+        return False
+    try:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except sa.exc.DBAPIError as e:
+        logging.warning(f"Could not create the pg_trgm extension, search will not be typo tolerant: {e}")
+        return False
+    return True
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        trigram = _create_trigram_extension()
+        for table, columns in SEARCH_DOCUMENTS.items():
+            document = _document(columns)
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_tsv ON {table} "
+                       f"USING gin (to_tsvector('{TEXT_SEARCH_CONFIG}', {document}))")
+            if trigram:
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_trgm ON {table} "
+                           f"USING gin (({document}) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for table in SEARCH_DOCUMENTS:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search_trgm')
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search_tsv')
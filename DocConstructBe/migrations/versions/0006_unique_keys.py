@@ -0,0 +1,77 @@
+"""Unique project names and professional identities
+
+Project names, professional national IDs and professional emails become unique, so
+creates can rely on INSERT ... ON CONFLICT instead of looking for duplicates first. The
+unique indexes replace the plain lookup indexes on the professional columns.
+
+Rows that already break a rule are not merged or renamed automatically; the upgrade
+stops and lists them so they can be resolved by hand.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+UNIQUE_INDEXES = [
+    ('uix_projects_name', 'projects', 'name'),
+    ('uix_professionals_national_id', 'professionals', 'national_id'),
+    ('uix_professionals_email', 'professionals', 'email'),
+]
+
+REPLACED_INDEXES = [
+    ('ix_professionals_national_id', 'professionals', 'national_id'),
+    ('ix_professionals_email', 'professionals', 'email'),
+]
+
+
+def _find_duplicates(table, column):
+    return op.get_bind().execute(sa.text(
+        f'SELECT {column}, count(*) FROM {table} GROUP BY {column} HAVING count(*) > 1 ORDER BY {column} LIMIT 20'
+    )).all()
+
+
+def _drop_invalid_index(name):
+    # A CONCURRENTLY build that failed halfway leaves an invalid index that IF NOT EXISTS would keep
+    invalid = op.get_bind().execute(sa.text(
+        'SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid '
+        'WHERE pg_class.relname = :name AND NOT pg_index.indisvalid'
+    ), {'name': name}).first()
+    if invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+def upgrade():
+    duplicates = {
+        f'{table}.{column}': rows
+        for _, table, column in UNIQUE_INDEXES
+        if (rows := _find_duplicates(table, column))
+    }
+    if duplicates:
+        details = '; '.join(
+            f"{key}: " + ', '.join(f"'{value}' x{count}" for value, count in rows)
+            for key, rows in duplicates.items()
+        )
+        raise RuntimeError(f"Resolve duplicate values before adding unique keys - {details}")
+
+    with op.get_context().autocommit_block():
+        for name, table, column in UNIQUE_INDEXES:
+            if op.get_bind().dialect.name == 'postgresql':
+                _drop_invalid_index(name)
+            op.create_index(name, table, [column], unique=True, if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, column in REPLACED_INDEXES:
+            op.create_index(name, table, [column], if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _ in UNIQUE_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,76 @@
+"""Cascading deletes and the file deletion queue
+
+The foreign keys from documents and memberships to their project or professional get
+ON DELETE CASCADE, so deleting a parent is a single statement and the database removes
+the children itself. On PostgreSQL the keys are swapped in one short transaction,
+re-added NOT VALID and validated afterwards without blocking writes. SQLite cannot alter a
+constraint, so those tables are rebuilt.
+
+pending_file_deletions holds the storage keys of deleted documents until the reclaimer
+has removed the files.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table)
+CASCADING_FOREIGN_KEYS = [
+    ('project_professionals', 'project_id', 'projects'),
+    ('project_professionals', 'professional_id', 'professionals'),
+    ('project_documents', 'project_id', 'projects'),
+    ('professional_documents', 'professional_id', 'professionals'),
+]
+
+# Names reflected SQLite foreign keys get inside batch mode, matching PostgreSQL's defaults
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _fk_name(table, column):
+    return f'{table}_{column}_fkey'
+
+
+def _replace_foreign_keys(on_delete):
+    ondelete_sql = f' ON DELETE {on_delete}' if on_delete else ''
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SET LOCAL lock_timeout = '5s'")
+        for table, column, referenced_table in CASCADING_FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {_fk_name(table, column)}')
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {_fk_name(table, column)} '
+                       f'FOREIGN KEY ({column}) REFERENCES {referenced_table} (id){ondelete_sql} NOT VALID')
+        with op.get_context().autocommit_block():
+            for table, column, _ in CASCADING_FOREIGN_KEYS:
+                op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {_fk_name(table, column)}')
+        return
+
+    tables = {}
+    for table, column, referenced_table in CASCADING_FOREIGN_KEYS:
+        tables.setdefault(table, []).append((column, referenced_table))
+    for table, foreign_keys in tables.items():
+        with op.batch_alter_table(table, recreate='always', naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referenced_table in foreign_keys:
+                batch_op.drop_constraint(_fk_name(table, column), type_='foreignkey')
+                batch_op.create_foreign_key(_fk_name(table, column), referenced_table, [column], ['id'],
+                                            ondelete=on_delete)
+
+
+def upgrade():
+    op.create_table(
+        'pending_file_deletions',
+        sa.Column('file_path', sa.String(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
+    op.drop_table('pending_file_deletions', if_exists=True)
@@ -0,0 +1,68 @@
+"""Server-side timestamps and the change feed
+
+created_at and updated_at get now() as their database default, so rows are stamped by
+the database clock instead of a value the application computed once at import time.
+(sort key, id) indexes on updated_at and the deleted_entities tombstone table back the
+/api/sync change feed.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+UUID_SIZE = 36
+
+TIMESTAMP_COLUMNS = {
+    'permit_owners': ['created_at', 'updated_at'],
+    'projects': ['created_at', 'updated_at'],
+    'professionals': ['created_at', 'updated_at'],
+    'project_professionals': ['created_at'],
+    'project_documents': ['created_at'],
+    'professional_documents': ['created_at'],
+}
+
+INDEXES = [
+    ('ix_projects_updated_at_id', 'projects', ['updated_at', 'id']),
+    ('ix_professionals_updated_at_id', 'professionals', ['updated_at', 'id']),
+]
+
+
+def _set_defaults(server_default):
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        # SQLite cannot alter a column default in place, batch mode rebuilds the table there
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.DateTime(), existing_nullable=False,
+                                      server_default=server_default)
+
+
+def upgrade():
+    _set_defaults(sa.func.now())
+    if not sa.inspect(op.get_bind()).has_table('deleted_entities'):
+        id_type = sa.Uuid() if op.get_bind().dialect.name == 'postgresql' else sa.String(UUID_SIZE)
+        op.create_table(
+            'deleted_entities',
+            sa.Column('id', id_type, primary_key=True, nullable=False),
+            sa.Column('entity_type', sa.String(), nullable=False),
+            sa.Column('entity_id', id_type, nullable=False),
+            sa.Column('deleted_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index('ix_deleted_entities_deleted_at', 'deleted_entities', ['deleted_at'])
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    op.drop_table('deleted_entities', if_exists=True)
+    _set_defaults(None)
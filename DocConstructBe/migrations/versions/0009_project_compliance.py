@@ -0,0 +1,37 @@
+"""Project compliance summary
+
+project_compliance holds the number of missing required documents and professional
+types of each project. It is only written when COMPLIANCE_SUMMARY is on; run
+`flask refresh-compliance-summary` to fill it after switching it on.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+UUID_SIZE = 36
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('project_compliance'):
+        return
+    id_type = sa.Uuid() if op.get_bind().dialect.name == 'postgresql' else sa.String(UUID_SIZE)
+    op.create_table(
+        'project_compliance',
+        sa.Column('project_id', id_type, sa.ForeignKey('projects.id', name='project_compliance_project_id_fkey',
+                                                       ondelete='CASCADE'), primary_key=True),
+        sa.Column('missing_documents', sa.Integer(), nullable=False),
+        sa.Column('missing_professionals', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('project_compliance', if_exists=True)
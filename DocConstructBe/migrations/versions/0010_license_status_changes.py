@@ -0,0 +1,43 @@
+"""Licence status changes
+
+license_status_changes records every stored licence status the daily refresh moves
+across a threshold, until `flask notify-license-expiries` has sent it in a digest.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+UUID_SIZE = 36
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('license_status_changes'):
+        return
+    id_type = sa.Uuid() if op.get_bind().dialect.name == 'postgresql' else sa.String(UUID_SIZE)
+    op.create_table(
+        'license_status_changes',
+        sa.Column('id', id_type, primary_key=True, nullable=False),
+        sa.Column('professional_id', id_type,
+                  sa.ForeignKey('professionals.id', name='license_status_changes_professional_id_fkey',
+                                ondelete='CASCADE'), nullable=False),
+        sa.Column('old_status', sa.String(), nullable=False),
+        sa.Column('new_status', sa.String(), nullable=False),
+        sa.Column('license_expiration_date', sa.Date(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('notified_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_license_status_changes_professional_id', 'license_status_changes', ['professional_id'])
+    op.create_index('ix_license_status_changes_pending', 'license_status_changes', ['changed_at'],
+                    postgresql_where=sa.text('notified_at IS NULL'), sqlite_where=sa.text('notified_at IS NULL'))
+
+
+def downgrade():
+    op.drop_table('license_status_changes', if_exists=True)
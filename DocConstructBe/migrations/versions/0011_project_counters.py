@@ -0,0 +1,52 @@
+"""Project counters
+
+project_counters holds the number of documents per status and professionals per type of
+each project, adjusted by every write that changes them. It is filled from the existing
+rows here; `flask repair-project-counters` recomputes it the same way.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+UUID_SIZE = 36
+
+BACKFILL = """
+INSERT INTO project_counters (project_id, kind, key, value, updated_at)
+SELECT project_id, 'documents', status, COUNT(*), MAX(created_at)
+FROM project_documents
+GROUP BY project_id, status
+UNION ALL
+SELECT project_professionals.project_id, 'professionals', professionals.professional_type, COUNT(*),
+       MAX(project_professionals.created_at)
+FROM project_professionals
+JOIN professionals ON professionals.id = project_professionals.professional_id
+GROUP BY project_professionals.project_id, professionals.professional_type
+"""
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('project_counters'):
+        return
+    id_type = sa.Uuid() if op.get_bind().dialect.name == 'postgresql' else sa.String(UUID_SIZE)
+    op.create_table(
+        'project_counters',
+        sa.Column('project_id', id_type, sa.ForeignKey('projects.id', name='project_counters_project_id_fkey',
+                                                       ondelete='CASCADE'), primary_key=True),
+        sa.Column('kind', sa.String(), primary_key=True),
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    op.drop_table('project_counters', if_exists=True)
@@ -0,0 +1,38 @@
+"""Server-side timestamps for the file bookkeeping tables
+
+document_ingests and pending_file_deletions were still stamped by the application, one
+in UTC and the other in local time, while every other table takes now() from the database
+since 0008. They get the same database default so their ages compare like the rest.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_COLUMNS = {
+    'document_ingests': 'created_at',
+    'pending_file_deletions': 'created_at',
+}
+
+
+def _set_defaults(server_default):
+    for table, column in TIMESTAMP_COLUMNS.items():
+        # SQLite cannot alter a column default in place, batch mode rebuilds the table there
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), existing_nullable=False,
+                                  server_default=server_default)
+
+
+def upgrade():
+    _set_defaults(sa.func.now())
+
+
+def downgrade():
+    _set_defaults(None)
@@ -0,0 +1,65 @@
+"""Sub-second timestamps on SQLite
+
+SQLite's CURRENT_TIMESTAMP, which now() renders as there, stamps whole seconds as
+"YYYY-MM-DD HH:MM:SS", while datetimes are bound back as "YYYY-MM-DD HH:MM:SS.ffffff".
+The two never compare equal, so a created_at cursor could not find its own row again.
+The timestamp defaults switch to a clock in the bound format and the stored stamps are
+padded to it. PostgreSQL stores real timestamps and is left alone.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+SQLITE_NOW = sa.text("(strftime('%Y-%m-%d %H:%M:%f000', 'now'))")
+
+TIMESTAMP_COLUMNS = {
+    'permit_owners': ['created_at', 'updated_at'],
+    'projects': ['created_at', 'updated_at'],
+    'professionals': ['created_at', 'updated_at'],
+    'project_professionals': ['created_at'],
+    'project_documents': ['created_at'],
+    'professional_documents': ['created_at'],
+    'document_ingests': ['created_at'],
+    'pending_file_deletions': ['created_at'],
+    'deleted_entities': ['deleted_at'],
+    'project_compliance': ['updated_at'],
+    'license_status_changes': ['changed_at'],
+    'project_counters': ['updated_at'],
+}
+
+# Stamped with now() by the application, without a default of their own
+STAMPED_COLUMNS = {
+    'license_status_changes': ['notified_at'],
+}
+
+
+def _set_defaults(server_default):
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.DateTime(), existing_nullable=False,
+                                      server_default=server_default)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _set_defaults(SQLITE_NOW)
+    for column_map in (TIMESTAMP_COLUMNS, STAMPED_COLUMNS):
+        for table, columns in column_map.items():
+            for column in columns:
+                op.execute(f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _set_defaults(sa.func.now())
@@ -0,0 +1,37 @@
+"""Due date sort indexes
+
+Projects sorted by the nullable status_due_date page on coalesce(status_due_date, <end of
+the range>), so NULLs come last in both directions and the next page is a single
+(sort key, id) row-value range. Each direction coalesces to a different end and gets its
+own expression index. ix_projects_status_due_date_id stays for the due date filters.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+# Must repeat utils.pagination.sort_expression() exactly for the planner to use them
+INDEXES = [
+    ('ix_projects_status_due_date_asc_id', "coalesce(status_due_date, '9999-12-31')"),
+    ('ix_projects_status_due_date_desc_id', "coalesce(status_due_date, '0001-01-01')"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, expression in INDEXES:
+            op.create_index(name, 'projects', [sa.text(expression), 'id'], if_not_exists=True,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='projects', if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,69 @@
+import functools
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+
+import requests
+
+from config.sys_config import NOTIFIER_BACKEND, NOTIFICATIONS_FILE, NOTIFIER_WEBHOOK_URL
+
+"""
+Notification Module
+
+Digests built by scheduled jobs go out through a Notifier. A digest is a JSON-serializable
+dict; how it reaches people (a log line, a file, a webhook into mail or chat) is the
+backend's concern, so jobs never change when the delivery channel does.
+"""
+
+WEBHOOK_TIMEOUT_SECONDS = 10
+
+
+class Notifier(ABC):
+    @abstractmethod
+    def send(self, digest: dict) -> None:
+        """Deliver one digest; raises when it could not be delivered."""
+
+
+class LogNotifier(Notifier):
+    def send(self, digest: dict) -> None:
+        logging.warning(f"Notification {digest['kind']}: {json.dumps(digest, ensure_ascii=False, default=str)}")
+
+
+class FileNotifier(Notifier):
+    """Appends each digest as one JSON line, for local runs and tests."""
+
+    def __init__(self, path: str = NOTIFICATIONS_FILE):
+        self.path = path
+
+    def send(self, digest: dict) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as sink:
+            sink.write(json.dumps(digest, ensure_ascii=False, default=str) + '\n')
+
+
+class WebhookNotifier(Notifier):
+    def __init__(self, url: str = NOTIFIER_WEBHOOK_URL):
+        self.url = url
+        self.session = requests.Session()
+
+    def send(self, digest: dict) -> None:
+        response = self.session.post(
+            self.url,
+            data=json.dumps(digest, ensure_ascii=False, default=str).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            timeout=WEBHOOK_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+
+
+NOTIFIER_BACKENDS = {
+    'log': LogNotifier,
+    'file': FileNotifier,
+    'webhook': WebhookNotifier,
+}
+
+
+@functools.cache
+def get_notifier() -> Notifier:
+    return NOTIFIER_BACKENDS[NOTIFIER_BACKEND]()
@@ -5,7 +5,7 @@ from flask_cors import CORS
 app = create_app()
 
 app.config['DEBUG'] = True
-CORS(app, expose_headers=["Content-Disposition"])
+CORS(app, expose_headers=["Content-Disposition", "X-Recent-Write"])
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
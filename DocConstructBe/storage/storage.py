@@ -0,0 +1,255 @@
+import functools
+import os
+import posixpath
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, NamedTuple
+
+from config.sys_config import (
+    DOCUMENTS_FOLDER,
+    STORAGE_BACKEND,
+    S3_BUCKET,
+    S3_ENDPOINT_URL,
+    S3_REGION,
+    S3_PREFIX,
+    S3_PRESIGNED_URL_EXPIRES,
+)
+
+"""
+Document Storage Module
+
+Every document byte goes through a Storage, addressed by a relative key such as
+"projects/<project_id>/<file name>". Rows written before keys existed hold absolute
+paths under DOCUMENTS_FOLDER; those are mapped onto the same key layout.
+"""
+
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class StoredObject(NamedTuple):
+    size: int
+    modified_at: datetime
+    etag: str
+
+
+def document_key(*parts: str) -> str:
+    # Names come from user input, keep them from escaping their folder
+    return posixpath.join(*(part.replace('/', '_').replace('\\', '_') for part in parts))
+
+
+class Storage(ABC):
+    def normalize_key(self, key: str) -> str:
+        if os.path.isabs(key):
+            key = os.path.relpath(key, DOCUMENTS_FOLDER)
+        return key.replace(os.sep, '/')
+
+    def save(self, key: str, src_path: str) -> None:
+        with open(src_path, 'rb') as src:
+            self.save_stream(key, src)
+
+    @abstractmethod
+    def save_stream(self, key: str, stream: BinaryIO) -> None:
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> StoredObject:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """Yield a filesystem path with the object's content, for tools that need one."""
+        fd, tmp_path = tempfile.mkstemp(suffix=posixpath.splitext(key)[1])
+        try:
+            with os.fdopen(fd, 'wb') as dest, self.open(key) as src:
+                shutil.copyfileobj(src, dest, MULTIPART_CHUNK_SIZE)
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def local_file(self, key: str) -> str | None:
+        """Path of the object on this host, if the backend keeps it on the local filesystem."""
+        return None
+
+    def download_url(self, key: str, content_disposition: str) -> str | None:
+        """A URL the client can fetch the object from directly, bypassing the backend."""
+        return None
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str = DOCUMENTS_FOLDER):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *self.normalize_key(key).split('/'))
+
+    @contextmanager
+    def _replacing(self, key: str) -> Iterator[BinaryIO]:
+        """
+        A file written next to the key's path and renamed over it once complete, so a
+        download, thumbnail or normalization reading the key never sees a partial file
+        and a crash mid-write leaves the previous content in place.
+        """
+        dest_path = self.path(key)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as dest:
+                yield dest
+            # mkstemp creates 0600 files; nginx must be able to read them in x-accel mode
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def save(self, key: str, src_path: str) -> None:
+        with self._replacing(key) as dest, open(src_path, 'rb') as src:
+            shutil.copyfileobj(src, dest, MULTIPART_CHUNK_SIZE)
+
+    def save_stream(self, key: str, stream: BinaryIO) -> None:
+        with self._replacing(key) as dest:
+            shutil.copyfileobj(stream, dest, MULTIPART_CHUNK_SIZE)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), 'rb')
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def stat(self, key: str) -> StoredObject:
+        stat_result = os.stat(self.path(key))
+        return StoredObject(
+            size=stat_result.st_size,
+            modified_at=datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc),
+            # Same "<mtime>-<size>" format nginx uses for static files
+            etag=f"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}",
+        )
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+    def local_file(self, key: str) -> str | None:
+        return self.path(key)
+
+
+class S3Storage(Storage):
+    """
+    S3-compatible object store. Point S3_ENDPOINT_URL at MinIO (or any other stand-in)
+    to run it locally.
+    """
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: str = S3_ENDPOINT_URL,
+                 region: str = S3_REGION, prefix: str = S3_PREFIX):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(s3={'addressing_style': 'path' if endpoint_url else 'auto'}),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+        )
+
+    def object_key(self, key: str) -> str:
+        key = self.normalize_key(key)
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def save(self, key: str, src_path: str) -> None:
+        self.client.upload_file(src_path, self.bucket, self.object_key(key), Config=self.transfer_config)
+
+    def save_stream(self, key: str, stream: BinaryIO) -> None:
+        # upload_fileobj switches to a multipart upload past the threshold and only keeps
+        # a few chunks in memory at a time
+        self.client.upload_fileobj(stream, self.bucket, self.object_key(key), Config=self.transfer_config)
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.stat(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def stat(self, key: str) -> StoredObject:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key)
+            raise
+        return StoredObject(
+            size=head['ContentLength'],
+            modified_at=head['LastModified'],
+            etag=head['ETag'].strip('"'),
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        fd, tmp_path = tempfile.mkstemp(suffix=posixpath.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self.object_key(key), tmp_path, Config=self.transfer_config)
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def download_url(self, key: str, content_disposition: str) -> str | None:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self.object_key(key),
+                'ResponseContentDisposition': content_disposition,
+            },
+            ExpiresIn=S3_PRESIGNED_URL_EXPIRES,
+        )
+
+
+STORAGE_BACKENDS = {
+    'local': LocalStorage,
+    's3': S3Storage,
+}
+
+
+@functools.cache
+def get_storage() -> Storage:
+    return STORAGE_BACKENDS[STORAGE_BACKEND]()
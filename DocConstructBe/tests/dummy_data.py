@@ -1,7 +1,7 @@
 from datetime import date, timedelta
 from app.api import ProjectManager, ProfessionalManager, ProfessionalType, ProjectStatus
 from data_model.models import PermitOwner
-from database.database import db_session
+from database.database import db_session, unit_of_work
 
 PROFESSIONALS = [
     {
@@ -117,16 +117,17 @@ def create_professionals():
     created_professionals = []
     for prof_data in PROFESSIONALS:
         try:
-            professional = ProfessionalManager().create(
-                name=prof_data["name"],
-                national_id=prof_data["national_id"],
-                email=prof_data["email"],
-                phone=prof_data["phone"],
-                address=prof_data["address"],
-                license_number=prof_data["license_number"],
-                license_expiration_date=prof_data["license_expiration_date"],
-                professional_type=prof_data["professional_type"]
-            )
+            with unit_of_work():
+                professional = ProfessionalManager().create(
+                    name=prof_data["name"],
+                    national_id=prof_data["national_id"],
+                    email=prof_data["email"],
+                    phone=prof_data["phone"],
+                    address=prof_data["address"],
+                    license_number=prof_data["license_number"],
+                    license_expiration_date=prof_data["license_expiration_date"],
+                    professional_type=prof_data["professional_type"]
+                )
             created_professionals.append(professional)
             print(f"Created professional: {professional.name} (ID: {professional.id})")
         except Exception as e:
@@ -143,8 +144,8 @@ def create_permit_owners():
                 email=owner_data["email"],
                 signature_file_path=owner_data["signature_file_path"]
             )
-            db_session.add(owner)
-            db_session.commit()
+            with unit_of_work():
+                db_session.add(owner)
             print(f"Created permit owner: {owner.name} (ID: {owner.id})")
         except Exception as e:
             print(f"Error creating permit owner {owner_data['name']}: {str(e)}")
@@ -156,13 +157,14 @@ def create_projects():
     created_projects = []
     for idx, proj_data in enumerate(PROJECTS):
         try:
-            project = ProjectManager.create(
-                name=proj_data["name"],
-                request_number=proj_data["request_number"],
-                description=proj_data["description"],
-                permit_owner=permit_owners[0] if idx // 2 == 0 else permit_owners[1],
-                status=proj_data["status"]
-            )
+            with unit_of_work():
+                project = ProjectManager.create(
+                    name=proj_data["name"],
+                    request_number=proj_data["request_number"],
+                    description=proj_data["description"],
+                    permit_owner=permit_owners[0] if idx // 2 == 0 else permit_owners[1],
+                    status=proj_data["status"]
+                )
             created_projects.append(project)
             print(f"Created project: {project.name} (ID: {project.id})")
         except Exception as e:
@@ -179,7 +181,8 @@ def attach_professionals_to_projects():
     for project in projects:
         for professional in professionals[:3]:
             try:
-                ProjectManager().attach_professional(str(project.id), str(professional.id))
+                with unit_of_work():
+                    ProjectManager().attach_professional(str(project.id), str(professional.id))
                 print(f"Attached professional {professional.name} to project {project.name}")
             except Exception as e:
                 print(f"Error attaching professional {professional.name} to project {project.name}: {str(e)}")
@@ -193,14 +196,16 @@ def delete_all():
     professionals = professional_manager.get_all()
     for project in projects:
         try:
-            project_manager.delete(project.id)
+            with unit_of_work():
+                project_manager.delete(project.id)
             print(f"Deleted project: {project.name} (ID: {project.id})")
         except Exception as e:
             print(f"Error deleting project {project.name}: {str(e)}")
 
     for professional in professionals:
         try:
-            professional_manager.delete(professional.id)
+            with unit_of_work():
+                professional_manager.delete(professional.id)
             print(f"Deleted professional: {professional.name} (ID: {professional.id})")
         except Exception as e:
             print(f"Error deleting professional {professional.name}: {str(e)}")
@@ -0,0 +1,114 @@
+import os
+import time
+
+import pytest
+
+"""
+The shared stores of the read cache: DiskStore keeps JSON entries in a folder shared by the
+workers of a host, deletes an entry it finds expired and prunes the folder back under its
+size cap; RedisStore keeps the same JSON in a Redis-protocol server.
+"""
+
+ENTRY = ['5f0c', {'id': 'p1', 'name': 'Tower', 'status_due_date': None, 'professionals': [{'id': 'a1'}]}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    from cache.cache import DiskStore
+
+    return DiskStore(folder=str(tmp_path), ttl=60, max_bytes=10_000)
+
+
+def age(path: str, seconds: float) -> None:
+    moment = time.time() - seconds
+    os.utime(path, (moment, moment))
+
+
+def test_entries_round_trip_as_json(store):
+    store.set('project:p1', ENTRY)
+    assert store.get('project:p1') == ENTRY
+    with open(store._path('project:p1'), encoding='utf-8') as f:
+        assert f.read().startswith('["5f0c",')
+    assert store.get('project:p2') is None
+
+
+def test_expired_entry_is_deleted_on_read(store):
+    store.set('project:p1', ENTRY)
+    age(store._path('project:p1'), 61)
+    assert store.get('project:p1') is None
+    assert not os.path.exists(store._path('project:p1'))
+
+
+def test_prune_drops_expired_entries_and_leftovers(store, tmp_path):
+    store.set('project:p1', ENTRY)
+    store.set('project:p2', ENTRY)
+    age(store._path('project:p1'), 61)
+    leftover = tmp_path / 'abandoned.tmp'
+    leftover.write_text('[')
+    age(str(leftover), 61)
+
+    store.prune()
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(store._path('project:p2'))]
+
+
+def test_prune_caps_the_folder_oldest_first(store, tmp_path):
+    payload = ['v', 'x' * 1000]
+    keys = [f'project:p{index}' for index in range(20)]
+    for index, key in enumerate(keys):
+        store.set(key, payload)
+        # Written one after the other, a second apart
+        age(store._path(key), len(keys) - index)
+
+    store.prune()
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path)) <= store.max_bytes
+    kept = [key for key in keys if store.get(key) is not None]
+    assert kept == keys[-len(kept):] and 0 < len(kept) < len(keys)
+
+
+def test_writes_prune_periodically(store, tmp_path, monkeypatch):
+    from cache.cache import DiskStore
+
+    monkeypatch.setattr(DiskStore, 'PRUNE_EVERY', 5)
+    store.max_bytes = 3 * len('["v","xxxxxxxxxx"]')
+    for index in range(5):
+        store.set(f'project:p{index}', ['v', 'x' * 10])
+    assert len(os.listdir(tmp_path)) <= 3
+
+
+def test_read_cache_over_the_disk_store(store):
+    from cache.cache import LocalStore, ReadCache
+
+    loads = []
+    cache = ReadCache(LocalStore(), store)
+    loader = lambda: loads.append(1) or ENTRY[1]
+    assert cache.get_or_load('project', 'p1', loader) == ENTRY[1]
+    # Another worker reads the shared entry without loading it again
+    other_worker = ReadCache(LocalStore(), store)
+    assert other_worker.get_or_load('project', 'p1', loader) == ENTRY[1]
+    assert len(loads) == 1
+
+    cache.invalidate('project', ['p1'])
+    assert other_worker.get_or_load('project', 'p1', loader) == ENTRY[1]
+    assert len(loads) == 2
+
+
+def test_redis_store_serializes_json():
+    pytest.importorskip('redis')
+    from cache.cache import RedisStore
+
+    class Server:
+        def __init__(self):
+            self.values = {}
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def set(self, key, value, ex=None):
+            self.values[key] = value.encode() if isinstance(value, str) else value
+
+    store = RedisStore(url='redis://localhost:6379/0', ttl=60)
+    store.client = Server()
+    store.set('project:p1', ENTRY)
+    assert store.client.values['project:p1'].startswith(b'["5f0c",')
+    assert store.get('project:p1') == ENTRY
+    assert store.get('project:p2') is None
@@ -0,0 +1,237 @@
+import pytest
+
+from tests.test_project_counters import attach, change_type
+from tests.test_query_counts import create_professional, create_project
+
+"""
+Project compliance: which required documents each project is missing and whether the
+professional types they need are attached, computed by one grouped union query, and the
+optional project_compliance summary rows the incomplete_only filter reads, which every
+document and membership write keeps in step with the computed matrix.
+"""
+
+
+@pytest.fixture
+def required(app) -> dict[str, list[str]]:
+    from app.api import ComplianceManager
+
+    return ComplianceManager.required_documents()
+
+
+@pytest.fixture
+def summary(monkeypatch):
+    monkeypatch.setattr('app.api.COMPLIANCE_SUMMARY', True)
+
+
+def upload(client, project_id: str, document_type: str, status: str, index: int = 0) -> str:
+    """
+    Adds the document record the way the upload route does after autofilling it; the route
+    itself needs the document type's real PDF form and its professionals to fill one in.
+    """
+    from app.api import ProjectManager
+    from database.database import unit_of_work
+
+    with client.application.app_context(), unit_of_work():
+        document = ProjectManager().add_document(
+            file_path='', project_id=project_id, document_type=document_type,
+            document_name=f'document{index}.pdf', document_status=status,
+        )
+        return document.id
+
+
+def compliance(client, **query_string) -> dict[str, dict]:
+    response = client.get('/api/projects/compliance', query_string=query_string)
+    assert response.status_code == 200, response.json
+    return {project['id']: project for project in response.json['projects']}
+
+
+def documents_by_type(project: dict) -> dict[str, dict]:
+    return {document['document_type']: document for document in project['documents']}
+
+
+def summary_rows(app) -> dict[str, tuple[int, int]]:
+    from database.database import db_session
+    from data_model.models import ProjectCompliance
+
+    with app.app_context():
+        return {
+            row.project_id: (row.missing_documents, row.missing_professionals)
+            for row in db_session.query(ProjectCompliance)
+        }
+
+
+def assert_summary_matches(client) -> None:
+    matrix = compliance(client)
+    assert summary_rows(client.application) == {
+        project_id: (project['missing_documents'], project['missing_professionals'])
+        for project_id, project in matrix.items()
+    }
+
+
+def test_new_project_misses_everything(client, required):
+    project_id = create_project(client)
+    project = compliance(client)[project_id]
+    professional_types = {t for types in required.values() for t in types}
+    assert project['missing_documents'] == len(required)
+    assert project['missing_professionals'] == len(professional_types)
+    assert not project['complete']
+    for document_type, document in documents_by_type(project).items():
+        assert document['status'] == 'Missing'
+        assert document['missing_professional_types'] == required[document_type]
+        assert document['professionals_attached'] is (not required[document_type])
+
+
+def test_document_takes_the_furthest_status_of_its_type(client, required):
+    project_id = create_project(client)
+    document_type = next(iter(required))
+    upload(client, project_id, document_type, 'Pending', 0)
+    assert documents_by_type(compliance(client)[project_id])[document_type]['status'] == 'Pending'
+    upload(client, project_id, document_type, 'Signed', 1)
+    upload(client, project_id, document_type, 'Pending', 2)
+
+    project = compliance(client)[project_id]
+    assert documents_by_type(project)[document_type]['status'] == 'Signed'
+    assert project['missing_documents'] == len(required) - 1
+
+
+def test_documents_outside_the_requirements_do_not_count(client, required):
+    from data_model.enum import ProjectDocumentType
+
+    project_id = create_project(client)
+    unrequired = [t.value for t in ProjectDocumentType if t.value not in required]
+    assert unrequired
+    upload(client, project_id, unrequired[0], 'Signed')
+    project = compliance(client)[project_id]
+    assert project['missing_documents'] == len(required)
+    assert unrequired[0] not in documents_by_type(project)
+
+
+def test_attached_professional_fills_its_type(client, required):
+    project_id = create_project(client)
+    document_type, professional_types = next((d, t) for d, t in required.items() if t)
+    professional_id = create_professional(client, 0, professional_type=professional_types[0])
+    attach(client, project_id, professional_id)
+
+    project = compliance(client)[project_id]
+    document = documents_by_type(project)[document_type]
+    assert professional_types[0] not in document['missing_professional_types']
+    assert document['professionals_attached'] is (len(professional_types) == 1)
+    # Every document requiring the type is filled by the one professional
+    for other_type, other_professional_types in required.items():
+        assert professional_types[0] not in documents_by_type(project)[other_type]['missing_professional_types']
+
+
+def test_project_with_everything_is_complete(client, required):
+    project_id = create_project(client)
+    for index, document_type in enumerate(required):
+        upload(client, project_id, document_type, 'Delivered', index)
+    professional_types = sorted({t for types in required.values() for t in types})
+    for index, professional_type in enumerate(professional_types):
+        attach(client, project_id, create_professional(client, index, professional_type=professional_type))
+
+    project = compliance(client)[project_id]
+    assert project['missing_documents'] == 0
+    assert project['missing_professionals'] == 0
+    assert project['complete']
+
+
+def test_matrix_covers_each_page(client, required):
+    project_ids = [create_project(client, index) for index in range(3)]
+    upload(client, project_ids[1], next(iter(required)), 'Signed')
+    first = client.get('/api/projects/compliance', query_string={'limit': 2}).json
+    second = client.get('/api/projects/compliance', query_string={'limit': 2, 'cursor': first['next_cursor']}).json
+    projects = {project['id']: project for project in first['projects'] + second['projects']}
+    assert set(projects) == set(project_ids)
+    assert projects[project_ids[1]]['missing_documents'] == len(required) - 1
+
+
+def test_incomplete_only_needs_the_summary(client):
+    create_project(client)
+    response = client.get('/api/projects/compliance', query_string={'incomplete_only': True})
+    assert response.status_code == 400
+
+
+def test_summary_follows_document_changes(client, required, summary):
+    project_id = create_project(client)
+    assert_summary_matches(client)
+
+    document_type = next(iter(required))
+    document_id = upload(client, project_id, document_type, 'Signed')
+    assert summary_rows(client.application)[project_id][0] == len(required) - 1
+    assert_summary_matches(client)
+
+    response = client.delete('/api/project/document', json={'project_id': project_id, 'document_id': document_id})
+    assert response.status_code == 200, response.json
+    assert summary_rows(client.application)[project_id][0] == len(required)
+    assert_summary_matches(client)
+
+
+def test_summary_follows_professional_changes(client, required, summary):
+    projects = [create_project(client, index) for index in range(2)]
+    professional_types = sorted({t for types in required.values() for t in types})
+    professional_id = create_professional(client, 0, professional_type=professional_types[0])
+    for project_id in projects:
+        attach(client, project_id, professional_id)
+    assert_summary_matches(client)
+    assert summary_rows(client.application)[projects[0]][1] == len(professional_types) - 1
+
+    response = client.delete('/api/project/professionals', json={
+        'project_id': projects[0], 'professional_id': professional_id,
+    })
+    assert response.status_code == 200, response.json
+    assert_summary_matches(client)
+
+    # A type change moves the professional to other requirements in every project it is in
+    change_type(client, professional_id, 0, professional_types[1])
+    assert_summary_matches(client)
+
+    response = client.put('/api/project/professionals', json={
+        'project_id': projects[0], 'attach': [professional_id], 'detach': [],
+    })
+    assert response.status_code == 200, response.json
+    assert_summary_matches(client)
+
+    response = client.delete('/api/professional', json={'professional_id': professional_id})
+    assert response.status_code == 200, response.json
+    assert_summary_matches(client)
+    assert summary_rows(client.application)[projects[1]][1] == len(professional_types)
+
+
+def test_summary_goes_with_its_project(client, summary):
+    project_id = create_project(client)
+    assert project_id in summary_rows(client.application)
+    response = client.delete('/api/project', json={'project_id': project_id})
+    assert response.status_code == 200, response.json
+    assert summary_rows(client.application) == {}
+
+
+def test_incomplete_only_reads_the_summary(client, required, summary):
+    incomplete_id = create_project(client, 0)
+    complete_id = create_project(client, 1)
+    for index, document_type in enumerate(required):
+        upload(client, complete_id, document_type, 'Signed', index)
+    professional_types = sorted({t for types in required.values() for t in types})
+    for index, professional_type in enumerate(professional_types):
+        attach(client, complete_id, create_professional(client, index, professional_type=professional_type))
+
+    assert set(compliance(client, incomplete_only=True)) == {incomplete_id}
+    assert set(compliance(client)) == {incomplete_id, complete_id}
+
+
+def test_rebuild_restores_the_summary(client, summary):
+    from sqlalchemy import delete
+
+    from app.api import ComplianceManager
+    from database.database import db_session, unit_of_work
+    from data_model.models import ProjectCompliance
+
+    create_project(client, 0)
+    create_project(client, 1)
+    with client.application.app_context():
+        db_session.execute(delete(ProjectCompliance))
+        db_session.commit()
+    assert summary_rows(client.application) == {}
+
+    with client.application.app_context(), unit_of_work():
+        assert ComplianceManager.rebuild_summary() == 2
+    assert_summary_matches(client)
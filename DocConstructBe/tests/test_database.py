@@ -0,0 +1,71 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import StaticPool
+
+from database.database import get_db_conn_string, get_engine, get_sqlite_conn_string, is_in_memory
+
+
+def test_sqlite_conn_strings(monkeypatch):
+    monkeypatch.setenv('DB_SQLITE_PATH', ':memory:')
+    assert get_sqlite_conn_string() == 'sqlite://'
+    monkeypatch.setenv('DB_SQLITE_PATH', '/tmp/docconstruct.db')
+    assert get_sqlite_conn_string() == 'sqlite:////tmp/docconstruct.db'
+    monkeypatch.setenv('DB_SQLITE_PATH', '')
+    monkeypatch.setenv('APP_PATH', '/srv/data')
+    assert get_sqlite_conn_string() == 'sqlite:////srv/data/doc_construct.db'
+
+
+def test_database_url_takes_precedence(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'postgresql://user@db/app')
+    assert get_db_conn_string() == 'postgresql://user@db/app'
+
+
+def test_in_memory_detection():
+    assert is_in_memory('sqlite://')
+    assert is_in_memory('sqlite:///:memory:')
+    assert not is_in_memory('sqlite:////tmp/docconstruct.db')
+    assert not is_in_memory('postgresql://user@db/app')
+
+
+def test_embedded_engine_is_migrated(app):
+    engine = get_engine()
+    assert is_in_memory(str(engine.url))
+    assert isinstance(engine.pool, StaticPool)
+    with engine.connect() as connection:
+        assert connection.execute(text('PRAGMA foreign_keys')).scalar() == 1
+        assert connection.execute(text('SELECT version_num FROM alembic_version')).scalar() == '0014'
+    assert {'projects', 'professionals', 'project_counters', 'license_status_changes'} <= set(inspect(engine).get_table_names())
+
+
+def test_uuid_keys_round_trip(client):
+    response = client.post('/api/project', json={
+        'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+    })
+    project_id = response.json['id']
+    assert len(project_id) == 36
+    assert client.get('/api/project', query_string={'project_id': project_id}).json['project']['id'] == project_id
+
+
+def test_uuid_columns_match_the_migrated_schema(app):
+    from database.base_model import Base
+    from database.database import UUID_F
+
+    engine = get_engine()
+    inspector = inspect(engine)
+    uuid_columns = [
+        (table.name, column) for table in Base.metadata.sorted_tables
+        for column in table.columns if isinstance(column.type, UUID_F)
+    ]
+    assert uuid_columns
+    for table, column in uuid_columns:
+        migrated = next(c['type'] for c in inspector.get_columns(table) if c['name'] == column.name)
+        declared = column.type.compile(dialect=engine.dialect)
+        assert migrated.compile(dialect=engine.dialect) == declared, f'{table}.{column.name}'
+
+
+def test_uuid_keys_are_stored_as_hex(client):
+    response = client.post('/api/project', json={
+        'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+    })
+    with get_engine().connect() as connection:
+        stored_id = connection.execute(text('SELECT id FROM projects')).scalar()
+    assert stored_id == response.json['id'].replace('-', '')
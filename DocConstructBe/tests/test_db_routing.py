@@ -0,0 +1,124 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.db_routing import RECENT_WRITE_COOKIE, RECENT_WRITE_HEADER
+from tests.test_query_counts import create_project
+
+"""
+Read routing between the primary and a read replica. The primary is the suite's in-memory
+database and the replica a separately migrated SQLite file that never receives the
+primary's writes, so which one served a read shows in what the read returns.
+"""
+
+
+@pytest.fixture
+def replica(app, monkeypatch, tmp_path):
+    from database import database
+    from database.migrations import upgrade_database
+
+    conn_string = f'sqlite:///{tmp_path / "replica.db"}'
+    monkeypatch.setenv('MIGRATION_DATABASE_URL', conn_string)
+    upgrade_database()
+    monkeypatch.delenv('MIGRATION_DATABASE_URL')
+    monkeypatch.setenv('DATABASE_REPLICA_URLS', conn_string)
+    monkeypatch.setenv('DB_REPLICA_CHECK_INTERVAL', '0')
+    monkeypatch.setattr(database, '_replicas', None)
+    yield database.get_replicas()[0]
+    database.db_session.remove()
+    for replica in database.get_replicas():
+        replica.engine.dispose()
+
+
+def project_names(response) -> list[str]:
+    assert response.status_code == 200, response.json
+    return [project['name'] for project in response.json['projects']]
+
+
+def test_reads_go_to_the_replica(client, replica):
+    create_project(client)
+    assert project_names(client.application.test_client().get('/api/projects')) == []
+
+
+def test_writes_go_to_the_primary_and_mark_a_recent_write(client, replica):
+    response = client.post('/api/project', json={
+        'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+    })
+    assert response.status_code == 200, response.json
+    assert float(response.headers[RECENT_WRITE_HEADER]) > 0
+    assert client.get_cookie(RECENT_WRITE_COOKIE) is not None
+
+    # The cookie keeps this browser on the primary, the header does the same for API clients
+    assert project_names(client.get('/api/projects')) == ['Tower']
+    api_client = client.application.test_client()
+    assert project_names(api_client.get('/api/projects')) == []
+    assert project_names(api_client.get('/api/projects', headers={
+        RECENT_WRITE_HEADER: response.headers[RECENT_WRITE_HEADER],
+    })) == ['Tower']
+
+
+def test_expired_recent_write_reads_from_the_replica(client, replica):
+    create_project(client)
+    assert project_names(client.application.test_client().get('/api/projects', headers={
+        RECENT_WRITE_HEADER: '1',
+    })) == []
+
+
+def test_lagging_replica_falls_back_to_the_primary(client, replica, monkeypatch):
+    create_project(client)
+    monkeypatch.setenv('DB_REPLICA_MAX_LAG_SECONDS', '-1')
+    assert project_names(client.application.test_client().get('/api/projects')) == ['Project 0']
+
+
+def test_unavailable_replica_falls_back_to_the_primary(client, replica, monkeypatch, tmp_path):
+    from database import database
+
+    create_project(client)
+    monkeypatch.setenv('DATABASE_REPLICA_URLS', f'sqlite:///{tmp_path / "missing" / "replica.db"}')
+    monkeypatch.setattr(database, '_replicas', None)
+    assert project_names(client.application.test_client().get('/api/projects')) == ['Project 0']
+    assert not database.get_replicas()[0].healthy
+
+
+def test_session_reads_its_own_writes_until_it_rolls_back(app, replica):
+    from sqlalchemy import delete, select
+
+    from database.database import db_session, get_engine
+    from data_model.models import Project
+
+    with app.test_request_context('/api/projects'):
+        app.preprocess_request()
+        assert db_session.get_bind(clause=select(Project)) is replica.engine
+        db_session.execute(delete(Project))
+        assert db_session.get_bind(clause=select(Project)) is get_engine()
+        # Nothing it wrote survives the rollback, so there is nothing left to read back from the primary
+        db_session.rollback()
+        assert db_session.get_bind(clause=select(Project)) is replica.engine
+
+
+def test_failed_commit_does_not_mark_a_recent_write(client, replica):
+    from database.database import get_engine
+
+    def fail_commit(connection):
+        raise RuntimeError('commit failed')
+
+    event.listen(get_engine(), 'commit', fail_commit)
+    try:
+        response = client.post('/api/project', json={
+            'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+        })
+    finally:
+        event.remove(get_engine(), 'commit', fail_commit)
+    assert response.status_code >= 500
+    assert RECENT_WRITE_HEADER not in response.headers
+    assert client.get_cookie(RECENT_WRITE_COOKIE) is None
+    # Nothing reached the primary either
+    assert project_names(client.get('/api/projects', headers={RECENT_WRITE_HEADER: str(time.time() + 60)})) == []
+
+
+def test_rejected_write_does_not_mark_a_recent_write(client, replica):
+    response = client.post('/api/project', json={'name': 'Tower'})
+    assert response.status_code == 400
+    assert RECENT_WRITE_HEADER not in response.headers
+    assert client.get_cookie(RECENT_WRITE_COOKIE) is None
@@ -0,0 +1,141 @@
+import os
+import tempfile
+
+import pytest
+
+from tests.conftest import wait_for_background_tasks
+from tests.test_query_counts import create_project, upload_project_document
+
+"""
+Post-upload normalization: the recompressed copy replaces the stored upload, the original
+is kept under originals/ when configured, and a DocumentIngest records both. A document
+deleted while it was being normalized leaves neither a record nor files behind.
+"""
+
+NORMALIZED = b'small'
+
+
+@pytest.fixture
+def normalize(monkeypatch) -> list:
+    """
+    Recompression stand-in: every file normalizes to a smaller copy, and originals are kept.
+    Callables appended to the returned list run while a file is being recompressed.
+    """
+    during = []
+
+    def normalize_file(src_path: str) -> str:
+        for callback in during:
+            callback()
+        fd, dest_path = tempfile.mkstemp(suffix=os.path.splitext(src_path)[1])
+        with os.fdopen(fd, 'wb') as f:
+            f.write(NORMALIZED)
+        return dest_path
+
+    monkeypatch.setattr('app.tasks.normalize_file', normalize_file)
+    monkeypatch.setattr('app.tasks.INGEST_KEEP_ORIGINAL', True)
+    return during
+
+
+def uploaded_document(client) -> tuple[str, str, str]:
+    from database.database import db_session
+    from data_model.models import ProjectDocument
+
+    project_id = create_project(client)
+    upload_project_document(client, project_id, 0)
+    wait_for_background_tasks(client.application)
+    with client.application.app_context():
+        document = db_session.query(ProjectDocument).one()
+        return project_id, document.id, document.file_path
+
+
+def run_normalize(app, document_id: str, file_path: str) -> None:
+    from app.tasks import normalize_document
+    from data_model.models import DocumentIngest
+
+    with app.app_context():
+        normalize_document(document_id, DocumentIngest.PROJECT_DOCUMENT, file_path)
+
+
+def ingests(app) -> list:
+    from database.database import db_session
+    from data_model.models import DocumentIngest
+
+    with app.app_context():
+        return [(ingest.document_id, ingest.original_file_path) for ingest in db_session.query(DocumentIngest)]
+
+
+def pending_deletions(app) -> set[str]:
+    from database.database import db_session
+    from data_model.models import PendingFileDeletion
+
+    with app.app_context():
+        return {entry.file_path for entry in db_session.query(PendingFileDeletion)}
+
+
+def read(key: str) -> bytes:
+    from storage.storage import get_storage
+
+    with get_storage().open(key) as stream:
+        return stream.read()
+
+
+def delete_document(client, project_id: str, document_id: str) -> None:
+    response = client.delete('/api/project/document', json={'project_id': project_id, 'document_id': document_id})
+    assert response.status_code == 200, response.json
+    wait_for_background_tasks(client.application)
+
+
+def test_normalized_copy_replaces_the_upload(client, normalize):
+    from storage.storage import get_storage
+
+    _, document_id, file_path = uploaded_document(client)
+    run_normalize(client.application, document_id, file_path)
+
+    [(ingested_id, original_file_path)] = ingests(client.application)
+    assert ingested_id == document_id
+    assert read(file_path) == NORMALIZED
+    assert read(original_file_path) == b'content'
+    assert get_storage().exists(original_file_path)
+
+
+def test_deleting_an_ingested_document_reclaims_the_original(client, normalize):
+    from storage.storage import get_storage
+
+    project_id, document_id, file_path = uploaded_document(client)
+    run_normalize(client.application, document_id, file_path)
+    [(_, original_file_path)] = ingests(client.application)
+
+    delete_document(client, project_id, document_id)
+    assert ingests(client.application) == []
+    assert not get_storage().exists(file_path)
+    assert not get_storage().exists(original_file_path)
+
+
+def test_document_deleted_during_normalization_leaves_nothing(client, normalize):
+    from app.tasks import reclaim_files
+    from storage.storage import get_storage
+    from app.tasks import reclaim_files
+    from storage.storage import get_storage
+
+    from app.api import ProjectManager
+    from database.database import unit_of_work
+
+    project_id, document_id, file_path = uploaded_document(client)
+
+    def delete_committed():
+        # Its files stay queued until the next reclaim
+        with unit_of_work():
+            ProjectManager.remove_document(project_id, document_id)
+
+    # The delete commits while the task is still recompressing
+    normalize.append(delete_committed)
+    run_normalize(client.application, document_id, file_path)
+
+    assert ingests(client.application) == []
+    # The copies it wrote back after the delete are queued in its place
+    assert file_path in pending_deletions(client.application)
+    assert len(pending_deletions(client.application)) == 2
+    with client.application.app_context():
+        assert reclaim_files() == 2
+    assert pending_deletions(client.application) == set()
+    assert not get_storage().exists(file_path)
@@ -0,0 +1,51 @@
+from tests.test_project_counters import attach
+from tests.test_query_counts import create_professional, create_project
+
+"""
+Licence expiry notices go to the professionals of every project still in progress: any
+project but a finished one, including a project whose status was never set.
+"""
+
+# create_professional() licences run out in a year, on the last day of the longest notice
+NOTICE_DAYS = 365
+
+
+def set_status(app, project_id: str, status: str | None) -> None:
+    from database.database import db_session
+    from data_model.models import Project
+
+    with app.app_context():
+        db_session.get(Project, project_id).status = status
+        db_session.commit()
+
+
+def expiring(client) -> dict[str, set[str]]:
+    response = client.get('/api/professionals/expiring', query_string={'days': NOTICE_DAYS})
+    assert response.status_code == 200, response.json
+    return {
+        professional['id']: {project['name'] for project in professional['projects']}
+        for professional in response.json['professionals']
+    }
+
+
+def test_every_unfinished_project_counts(client):
+    statuses = {'Project 0': 'Pre permit', 'Project 1': 'Post permit', 'Project 2': 'Final', 'Project 3': None}
+    professional_id = create_professional(client, 0)
+    for index, status in enumerate(statuses.values()):
+        project_id = create_project(client, index)
+        set_status(client.application, project_id, status)
+        attach(client, project_id, professional_id)
+
+    assert expiring(client) == {professional_id: {'Project 0', 'Project 1', 'Project 3'}}
+
+
+def test_professional_only_on_finished_projects_is_not_listed(client):
+    finished_id = create_project(client, 0)
+    set_status(client.application, finished_id, 'Final')
+    attach(client, finished_id, create_professional(client, 0))
+    unset_id = create_project(client, 1)
+    set_status(client.application, unset_id, None)
+    listed_id = create_professional(client, 1)
+    attach(client, unset_id, listed_id)
+
+    assert expiring(client) == {listed_id: {'Project 1'}}
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+import pytest
+
+from tests.test_query_counts import create_professional
+
+"""
+Keyset pagination of the list endpoints. Every sort key is walked page by page in both
+orders; each row must show up exactly once, in the order a single sorted query gives.
+Rows are created within the same second and share sort values, so ties on the sort key
+are broken by id across page boundaries, and some projects have no due date at all.
+"""
+
+ROWS = 12
+PAGE_SIZE = 5
+
+PROJECT_SORTS = ['name', 'status_due_date', 'created_at']
+PROFESSIONAL_SORTS = ['name', 'license_expiration_date', 'created_at']
+
+
+def walk(client, path: str, items_key: str, sort: str, order: str) -> list[dict]:
+    items, cursor = [], None
+    for _ in range(ROWS + 1):
+        query_string = {'sort': sort, 'order': order, 'limit': PAGE_SIZE}
+        if cursor:
+            query_string['cursor'] = cursor
+        response = client.get(path, query_string=query_string)
+        assert response.status_code == 200, response.json
+        items.extend(response.json[items_key])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return items
+    pytest.fail(f'{path} sorted by {sort} {order} did not reach its last page')
+
+
+def expected_ids(app, model, sort: str, order: str) -> list[str]:
+    """Ids in (sort NULLS LAST, id) order, ascending or descending on both."""
+    from database.database import db_session
+
+    with app.app_context():
+        rows = db_session.query(model.id, getattr(model, sort)).all()
+    descending = order == 'desc'
+    present = sorted(((value, row_id) for row_id, value in rows if value is not None), reverse=descending)
+    missing = sorted((row_id for row_id, value in rows if value is None), reverse=descending)
+    return [row_id for _, row_id in present] + missing
+
+
+def assert_walks_every_row(client, path: str, items_key: str, model, sort: str, order: str):
+    walked_ids = [item['id'] for item in walk(client, path, items_key, sort, order)]
+    assert walked_ids == expected_ids(client.application, model, sort, order)
+
+
+@pytest.fixture
+def projects(client):
+    ids = []
+    for index in range(ROWS):
+        # Three projects share each due date and the last three have none, so with pages of
+        # five a page ends inside a tie in both orders and the last one inside the NULLs
+        due_date = None if index >= 9 else (date.today() + timedelta(days=index // 3)).isoformat()
+        payload = {
+            'name': f'Project {index:02d}',
+            'request_number': f'R-{index}',
+            'permit_owner': 'Owner',
+            'status': 'Pre permit',
+        }
+        if due_date:
+            payload['status_due_date'] = due_date
+        response = client.post('/api/project', json=payload)
+        assert response.status_code == 200, response.json
+        ids.append(response.json['id'])
+    return ids
+
+
+@pytest.fixture
+def professionals(client):
+    return [create_professional(client, index) for index in range(ROWS)]
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort', PROJECT_SORTS)
+def test_project_pages(client, projects, sort, order):
+    from data_model.models import Project
+
+    assert len(projects) == ROWS
+    assert_walks_every_row(client, '/api/projects', 'projects', Project, sort, order)
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort', PROFESSIONAL_SORTS)
+def test_professional_pages(client, professionals, sort, order):
+    from data_model.models import Professional
+
+    assert len(professionals) == ROWS
+    assert_walks_every_row(client, '/api/professionals', 'professionals', Professional, sort, order)
+
+
+def test_cursor_of_another_sort_is_rejected(client, projects):
+    cursor = client.get('/api/projects', query_string={'sort': 'name', 'limit': PAGE_SIZE}).json['next_cursor']
+    response = client.get('/api/projects', query_string={'sort': 'created_at', 'limit': PAGE_SIZE, 'cursor': cursor})
+    assert response.status_code == 400
@@ -0,0 +1,164 @@
+import csv
+import io
+from datetime import date, datetime
+
+import pytest
+
+from tests.test_query_counts import create_professional
+
+"""
+Registry import through POST /api/professionals/import: every row of a CSV or XLSX file is
+validated like a single create, the valid ones are inserted in batches and committed with
+the request, and the report lists each rejected row by its line in the file.
+"""
+
+HEADER = ['Name', 'National ID', 'Email', 'Phone', 'Address', 'License Number',
+          'License Expiration Date', 'Professional Type']
+
+
+def row(index: int, **overrides) -> list:
+    values = {
+        'name': f'Imported {index}',
+        'national_id': f'{200000 + index}',
+        'email': f'imported{index}@example.com',
+        'phone': '0501234567',
+        'address': 'Herzl 1',
+        'license_number': f'IL-{index}',
+        'license_expiration_date': '2030-12-31',
+        'professional_type': 'אדריכל',
+    }
+    values.update(overrides)
+    return list(values.values())
+
+
+def csv_file(rows: list[list]) -> io.BytesIO:
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+    # Excel's "CSV UTF-8" puts a BOM in front of the header
+    return io.BytesIO(text.getvalue().encode('utf-8-sig'))
+
+
+def xlsx_file(rows: list[list]) -> io.BytesIO:
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.active.append(HEADER)
+    for values in rows:
+        workbook.active.append(values)
+    content = io.BytesIO()
+    workbook.save(content)
+    content.seek(0)
+    return content
+
+
+def import_file(client, content: io.BytesIO, filename: str):
+    return client.post('/api/professionals/import', data={'file': (content, filename)},
+                       content_type='multipart/form-data')
+
+
+def errors_by_row(report: dict) -> dict[int, dict]:
+    return {error['row']: error['errors'] for error in report['errors']}
+
+
+def stored(app) -> dict[str, tuple]:
+    from database.database import db_session
+    from data_model.models import Professional
+
+    with app.app_context():
+        return {
+            professional.national_id: (professional.email, professional.phone, professional.license_expiration_date,
+                                       professional.professional_type)
+            for professional in db_session.query(Professional)
+        }
+
+
+def test_csv_with_valid_and_invalid_rows(client):
+    create_professional(client, 0)
+    # The header is line 1, so row(n) is on line n + 1 until the blank line 9
+    response = import_file(client, csv_file([
+        row(1),
+        row(2, license_expiration_date='31/12/2030', professional_type='ARCHITECT'),
+        row(3, email=''),
+        row(4, license_expiration_date='next year'),
+        row(5, professional_type='Plumber'),
+        row(6, email='not-an-email'),
+        row(7, national_id='100000'),
+        [''] * len(HEADER),
+        row(8, national_id='200001'),
+        row(9, professional_type='קבלן ביצוע ראשי'),
+    ]), 'registry.csv')
+    assert response.status_code == 200, response.json
+    report = response.json
+    assert report['total'] == 9
+    assert report['created'] == 3
+    errors = errors_by_row(report)
+    assert sorted(errors) == [4, 5, 6, 7, 8, 10]
+    assert errors[4] == {'email': 'Missing value'}
+    assert set(errors[5]) == {'license_expiration_date'}
+    assert set(errors[6]) == {'professional_type'}
+    assert set(errors[7]) == {'email'}
+    # Line 8 is taken by an existing professional and line 10 repeats line 2
+    assert set(errors[8]) == set(errors[10]) == {'national_id'}
+    # Reported in file order
+    assert [error['row'] for error in report['errors']] == sorted(errors)
+
+    professionals = stored(client.application)
+    assert set(professionals) == {'100000', '200001', '200002', '200009'}
+    assert professionals['200002'][2] == date(2030, 12, 31)
+    assert professionals['200002'][3] == 'אדריכל'
+    assert professionals['200009'][3] == 'קבלן ביצוע'
+
+
+def test_xlsx_with_native_cell_types(client):
+    response = import_file(client, xlsx_file([
+        # Spreadsheets hand numbers and dates back as float/int and datetime
+        row(1, national_id=200001.0, phone=501234567, license_expiration_date=datetime(2031, 1, 15)),
+        row(2, license_expiration_date='15.01.2031'),
+        [None] * len(HEADER),
+        row(3, national_id='12'),
+    ]), 'registry.xlsx')
+    assert response.status_code == 200, response.json
+    report = response.json
+    assert report['total'] == 3
+    assert report['created'] == 2
+    assert set(errors_by_row(report)) == {5}
+    assert set(errors_by_row(report)[5]) == {'national_id'}
+
+    professionals = stored(client.application)
+    assert set(professionals) == {'200001', '200002'}
+    assert professionals['200001'][1:3] == ('501234567', date(2031, 1, 15))
+    assert professionals['200002'][2] == date(2031, 1, 15)
+
+
+def test_file_without_valid_rows_creates_nothing(client):
+    response = import_file(client, csv_file([row(1, email=''), row(2, phone='12')]), 'registry.csv')
+    assert response.status_code == 200, response.json
+    assert response.json['created'] == 0
+    assert set(errors_by_row(response.json)) == {2, 3}
+    assert stored(client.application) == {}
+
+
+@pytest.mark.parametrize('content, filename', [
+    (io.BytesIO(b'Name,Email\nDana,dana@example.com\n'), 'registry.csv'),
+    (io.BytesIO(b'name'), 'registry.txt'),
+])
+def test_unreadable_file_is_refused(client, content, filename):
+    response = import_file(client, content, filename)
+    assert response.status_code == 400
+    assert response.json['error_code'] == 'invalid_file_format'
+    assert stored(client.application) == {}
+
+
+def test_batches_are_committed_together(client, monkeypatch):
+    from app.api import ProfessionalManager
+
+    monkeypatch.setattr(ProfessionalManager, 'IMPORT_BATCH_SIZE', 2)
+    response = import_file(client, csv_file([row(index) for index in range(5)] + [row(5, national_id='200000')]),
+                           'registry.csv')
+    assert response.status_code == 200, response.json
+    # The duplicate in a later batch is still caught against the rows flushed before it
+    assert response.json['created'] == 5
+    assert set(errors_by_row(response.json)) == {7}
+    assert len(stored(client.application)) == 5
@@ -0,0 +1,196 @@
+from datetime import date, timedelta
+
+from tests.test_query_counts import create_professional, create_project, upload_project_document
+
+"""
+Project counters: the per-status document and per-type professional counts the project
+list shows. Every write that changes them adjusts them in its own transaction; after each
+one the stored counters must match what repair() recomputes from the rows themselves.
+"""
+
+ARCHITECT = 'אדריכל'
+CONTRACTOR = 'קבלן ביצוע'
+
+
+def stats(client, project_id: str) -> dict:
+    response = client.get('/api/projects')
+    assert response.status_code == 200, response.json
+    return next(project['stats'] for project in response.json['projects'] if project['id'] == project_id)
+
+
+def stored_counters(app) -> set[tuple]:
+    from database.database import db_session
+    from data_model.models import ProjectCounter
+
+    with app.app_context():
+        # A counter that dropped to zero may stay behind as a zero row; it counts nothing
+        return {
+            (counter.project_id, counter.kind, counter.key, counter.value)
+            for counter in db_session.query(ProjectCounter) if counter.value
+        }
+
+
+def assert_counters_repair_to_themselves(app) -> None:
+    from app.api import ProjectCounterManager
+    from database.database import unit_of_work
+
+    counters = stored_counters(app)
+    with app.app_context(), unit_of_work():
+        ProjectCounterManager.repair()
+    assert stored_counters(app) == counters
+
+
+def attach(client, project_id: str, professional_id: str) -> None:
+    response = client.post('/api/project/professionals', json={
+        'project_id': project_id, 'professional_id': professional_id,
+    })
+    assert response.status_code == 200, response.json
+
+
+def change_type(client, professional_id: str, index: int, professional_type: str) -> None:
+    response = client.put('/api/professional', json={
+        'id': professional_id,
+        'name': f'Professional {index}',
+        'national_id': f'{100000 + index}',
+        'email': f'professional{index}@example.com',
+        'phone': '0501234567',
+        'address': 'Herzl 1',
+        'license_number': f'L-{index}',
+        'license_expiration_date': (date.today() + timedelta(days=365)).isoformat(),
+        'professional_type': professional_type,
+    })
+    assert response.status_code == 200, response.json
+
+
+def test_new_project_has_no_counts(client):
+    project_id = create_project(client)
+    project_stats = stats(client, project_id)
+    assert project_stats['documents'] == {} and project_stats['documents_total'] == 0
+    assert project_stats['professionals'] == {} and project_stats['professionals_total'] == 0
+    assert project_stats['last_activity_at'] is None
+
+
+def test_documents_are_counted_per_status(client):
+    project_id = create_project(client)
+    upload_project_document(client, project_id, 0, status='Pending')
+    upload_project_document(client, project_id, 1, status='Pending')
+    upload_project_document(client, project_id, 2, status='Signed')
+    project_stats = stats(client, project_id)
+    assert project_stats['documents'] == {'Pending': 2, 'Signed': 1}
+    assert project_stats['documents_total'] == 3
+    assert project_stats['last_activity_at'] is not None
+    assert_counters_repair_to_themselves(client.application)
+
+    documents = client.get('/api/project', query_string={'project_id': project_id}).json['project']['documents']
+    pending = next(document for document in documents if document['status'] == 'Pending')
+    response = client.delete('/api/project/document', json={'project_id': project_id, 'document_id': pending['id']})
+    assert response.status_code == 200, response.json
+    project_stats = stats(client, project_id)
+    assert project_stats['documents'] == {'Pending': 1, 'Signed': 1}
+    assert project_stats['documents_total'] == 2
+    assert_counters_repair_to_themselves(client.application)
+
+
+def test_professionals_are_counted_per_type(client):
+    project_id = create_project(client)
+    architects = [create_professional(client, index) for index in range(2)]
+    contractor = create_professional(client, 2, professional_type=CONTRACTOR)
+    for professional_id in architects + [contractor]:
+        attach(client, project_id, professional_id)
+    assert stats(client, project_id)['professionals'] == {ARCHITECT: 2, CONTRACTOR: 1}
+    assert_counters_repair_to_themselves(client.application)
+
+    response = client.delete('/api/project/professionals', json={
+        'project_id': project_id, 'professional_id': architects[0],
+    })
+    assert response.status_code == 200, response.json
+    assert stats(client, project_id)['professionals'] == {ARCHITECT: 1, CONTRACTOR: 1}
+    assert stats(client, project_id)['professionals_total'] == 2
+    assert_counters_repair_to_themselves(client.application)
+
+
+def test_bulk_membership_changes_are_counted(client):
+    project_id = create_project(client)
+    professional_ids = [create_professional(client, index) for index in range(3)]
+    response = client.put('/api/project/professionals', json={
+        'project_id': project_id, 'attach': professional_ids, 'detach': [],
+    })
+    assert response.status_code == 200, response.json
+    assert stats(client, project_id)['professionals'] == {ARCHITECT: 3}
+
+    # Re-attaching an attached professional and detaching an unattached one change nothing
+    outsider = create_professional(client, 3)
+    response = client.put('/api/project/professionals', json={
+        'project_id': project_id, 'attach': professional_ids[:1], 'detach': professional_ids[1:] + [outsider],
+    })
+    assert response.status_code == 200, response.json
+    assert stats(client, project_id)['professionals'] == {ARCHITECT: 1}
+    assert_counters_repair_to_themselves(client.application)
+
+
+def test_type_change_moves_the_count(client):
+    projects = [create_project(client, index) for index in range(2)]
+    professional_id = create_professional(client, 0)
+    for project_id in projects:
+        attach(client, project_id, professional_id)
+
+    change_type(client, professional_id, 0, CONTRACTOR)
+    for project_id in projects:
+        assert stats(client, project_id)['professionals'] == {CONTRACTOR: 1}
+    assert_counters_repair_to_themselves(client.application)
+
+    # An update that keeps the type leaves the counts alone
+    change_type(client, professional_id, 0, CONTRACTOR)
+    for project_id in projects:
+        assert stats(client, project_id)['professionals'] == {CONTRACTOR: 1}
+
+
+def test_deleted_professional_leaves_every_project_count(client):
+    projects = [create_project(client, index) for index in range(2)]
+    professional_id = create_professional(client, 0)
+    staying = create_professional(client, 1)
+    for project_id in projects:
+        attach(client, project_id, professional_id)
+    attach(client, projects[0], staying)
+
+    response = client.delete('/api/professional', json={'professional_id': professional_id})
+    assert response.status_code == 200, response.json
+    assert stats(client, projects[0])['professionals'] == {ARCHITECT: 1}
+    assert stats(client, projects[1])['professionals'] == {}
+    assert_counters_repair_to_themselves(client.application)
+
+
+def test_deleted_project_takes_its_counters(client):
+    project_id = create_project(client)
+    upload_project_document(client, project_id, 0)
+    attach(client, project_id, create_professional(client, 0))
+    assert stored_counters(client.application)
+
+    response = client.delete('/api/project', json={'project_id': project_id})
+    assert response.status_code == 200, response.json
+    assert stored_counters(client.application) == set()
+
+
+def test_repair_recomputes_drifted_counters(client):
+    from sqlalchemy import update
+
+    from app.api import ProjectCounterManager
+    from database.database import db_session, unit_of_work
+    from data_model.models import ProjectCounter
+
+    project_id = create_project(client)
+    upload_project_document(client, project_id, 0, status='Signed')
+    attach(client, project_id, create_professional(client, 0))
+    expected = stored_counters(client.application)
+
+    with client.application.app_context():
+        db_session.execute(update(ProjectCounter).values(value=ProjectCounter.value + 5))
+        db_session.add(ProjectCounter(project_id=project_id, kind=ProjectCounter.DOCUMENTS, key='Missing', value=2))
+        db_session.commit()
+    assert stats(client, project_id)['documents'] == {'Signed': 6, 'Missing': 2}
+
+    with client.application.app_context(), unit_of_work():
+        assert ProjectCounterManager.repair() == 1
+    assert stored_counters(client.application) == expected
+    assert stats(client, project_id)['documents'] == {'Signed': 1}
+    assert stats(client, project_id)['professionals'] == {ARCHITECT: 1}
@@ -0,0 +1,125 @@
+from tests.test_project_counters import attach
+from tests.test_query_counts import create_professional, create_project
+
+"""
+Bulk membership changes through PUT /api/project/professionals: one set-based insert and
+one delete per request. Pairs already in the requested state are skipped and the response
+lists only the professionals whose membership changed; any unknown id refuses the whole
+request.
+"""
+
+UNKNOWN_ID = '00000000-0000-0000-0000-000000000000'
+
+
+def update(client, project_id: str, attach: list[str] = (), detach: list[str] = ()):
+    return client.put('/api/project/professionals', json={
+        'project_id': project_id, 'attach': list(attach), 'detach': list(detach),
+    })
+
+
+def members(client, project_id: str) -> set[str]:
+    response = client.get('/api/project', query_string={'project_id': project_id})
+    assert response.status_code == 200, response.json
+    return {professional['id'] for professional in response.json['project']['professionals']}
+
+
+def membership_rows(app, project_id: str) -> list[str]:
+    from database.database import db_session
+    from data_model.models import ProjectProfessional
+
+    with app.app_context():
+        return sorted(
+            professional_id for professional_id, in db_session.query(ProjectProfessional.professional_id).filter(
+                ProjectProfessional.project_id == project_id
+            )
+        )
+
+
+def test_attach_and_detach_return_what_changed(client):
+    project_id = create_project(client)
+    professional_ids = [create_professional(client, index) for index in range(3)]
+
+    response = update(client, project_id, attach=professional_ids)
+    assert response.status_code == 200, response.json
+    assert sorted(response.json['attached']) == sorted(professional_ids)
+    assert response.json['detached'] == []
+    assert members(client, project_id) == set(professional_ids)
+
+    response = update(client, project_id, detach=professional_ids[:2])
+    assert response.status_code == 200, response.json
+    assert response.json['attached'] == []
+    assert sorted(response.json['detached']) == sorted(professional_ids[:2])
+    assert members(client, project_id) == {professional_ids[2]}
+
+
+def test_duplicate_ids_change_the_pair_once(client):
+    project_id = create_project(client)
+    professional_id = create_professional(client, 0)
+
+    response = update(client, project_id, attach=[professional_id, professional_id])
+    assert response.status_code == 200, response.json
+    assert response.json['attached'] == [professional_id]
+    assert membership_rows(client.application, project_id) == [professional_id]
+
+    response = update(client, project_id, detach=[professional_id, professional_id])
+    assert response.status_code == 200, response.json
+    assert response.json['detached'] == [professional_id]
+    assert membership_rows(client.application, project_id) == []
+
+
+def test_pairs_already_in_place_are_skipped(client):
+    project_id = create_project(client)
+    attached_id = create_professional(client, 0)
+    new_id = create_professional(client, 1)
+    outsider_id = create_professional(client, 2)
+    attach(client, project_id, attached_id)
+
+    response = update(client, project_id, attach=[attached_id, new_id], detach=[outsider_id])
+    assert response.status_code == 200, response.json
+    assert response.json['attached'] == [new_id]
+    assert response.json['detached'] == []
+    assert membership_rows(client.application, project_id) == sorted([attached_id, new_id])
+
+
+def test_unknown_professional_refuses_the_whole_request(client):
+    project_id = create_project(client)
+    attached_id = create_professional(client, 0)
+    new_id = create_professional(client, 1)
+    attach(client, project_id, attached_id)
+
+    response = update(client, project_id, attach=[new_id, UNKNOWN_ID], detach=[attached_id])
+    assert response.status_code == 400
+    assert UNKNOWN_ID in str(response.json)
+    assert membership_rows(client.application, project_id) == [attached_id]
+
+
+def test_detaching_an_unknown_professional_changes_nothing(client):
+    project_id = create_project(client)
+    response = update(client, project_id, detach=[UNKNOWN_ID])
+    assert response.status_code == 200, response.json
+    assert response.json['attached'] == [] and response.json['detached'] == []
+
+
+def test_same_professional_on_both_sides_is_refused(client):
+    project_id = create_project(client)
+    professional_id = create_professional(client, 0)
+    response = update(client, project_id, attach=[professional_id], detach=[professional_id])
+    assert response.status_code == 400
+    assert membership_rows(client.application, project_id) == []
+
+
+def test_unknown_project_is_refused(client):
+    professional_id = create_professional(client, 0)
+    response = update(client, UNKNOWN_ID, attach=[professional_id])
+    assert response.status_code == 404
+    assert response.json['error_code'] == 'project_does_not_exist'
+
+
+def test_create_project_with_duplicate_professionals(client):
+    professional_id = create_professional(client, 0)
+    response = client.post('/api/project', json={
+        'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+        'professionals': [professional_id, professional_id],
+    })
+    assert response.status_code == 200, response.json
+    assert membership_rows(client.application, response.json['id']) == [professional_id]
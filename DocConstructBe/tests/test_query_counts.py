@@ -0,0 +1,139 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+
+"""
+Query counts of the read endpoints. Each endpoint loads what it serializes through the
+manager query profiles, so its statement count is fixed and does not grow with the number
+of professionals, documents or projects behind it.
+"""
+
+SIZES = [1, 8]
+
+
+def create_professional(client, index: int, professional_type: str = 'אדריכל') -> str:
+    response = client.post('/api/professional', json={
+        'name': f'Professional {index}',
+        'national_id': f'{100000 + index}',
+        'email': f'professional{index}@example.com',
+        'phone': '0501234567',
+        'address': 'Herzl 1',
+        'license_number': f'L-{index}',
+        'license_expiration_date': (date.today() + timedelta(days=365)).isoformat(),
+        'professional_type': professional_type,
+    })
+    assert response.status_code == 200, response.json
+    return response.json['id']
+
+
+def create_project(client, index: int = 0) -> str:
+    response = client.post('/api/project', json={
+        'name': f'Project {index}',
+        'request_number': f'R-{index}',
+        'permit_owner': f'Owner {index}',
+        'status': 'Pre permit',
+    })
+    assert response.status_code == 200, response.json
+    return response.json['id']
+
+
+def upload_project_document(client, project_id: str, index: int, status: str = 'Pending') -> None:
+    response = client.post('/api/project/document', data={
+        'project_id': project_id,
+        'document_type': 'כללי',
+        'document_name': f'document{index}.txt',
+        'status': status,
+        'file': (io.BytesIO(b'content'), f'document{index}.txt'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200, response.json
+
+
+def upload_professional_document(client, professional_id: str, index: int) -> None:
+    response = client.post('/api/professional/document', data={
+        'professional_id': professional_id,
+        'document_type': 'license',
+        'document_name': f'license{index}.txt',
+        'file': (io.BytesIO(b'content'), f'license{index}.txt'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200, response.json
+
+
+def seed_project(client, size: int) -> str:
+    project_id = create_project(client)
+    for index in range(size):
+        professional_id = create_professional(client, index)
+        response = client.post('/api/project/professionals', json={
+            'project_id': project_id, 'professional_id': professional_id,
+        })
+        assert response.status_code == 200, response.json
+        upload_project_document(client, project_id, index)
+    return project_id
+
+
+def count_queries(queries, request) -> int:
+    queries.reset()
+    response = request()
+    assert response.status_code == 200, response.json
+    return queries.count
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_project_list(client, queries, size):
+    for index in range(size):
+        project_id = create_project(client, index)
+        upload_project_document(client, project_id, index)
+    # The page, with the permit owner joined, and the counters of its projects
+    assert count_queries(queries, lambda: client.get('/api/projects')) == 2
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_project_detail(client, queries, size):
+    project_id = seed_project(client, size)
+    response = client.get('/api/project', query_string={'project_id': project_id})
+    assert len(response.json['project']['professionals']) == size
+    assert len(response.json['project']['documents']) == size
+    # The project with its permit owner, then its memberships with their professionals, then its documents
+    assert count_queries(queries, lambda: client.get('/api/project', query_string={'project_id': project_id})) == 3
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_project_document_download(client, queries, size):
+    project_id = seed_project(client, size)
+    document_id = client.get('/api/project', query_string={'project_id': project_id}).json['project']['documents'][0]['id']
+    assert count_queries(queries, lambda: client.get('/api/project/document', query_string={
+        'project_id': project_id, 'document_id': document_id,
+    })) == 1
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_professional_list(client, queries, size):
+    for index in range(size):
+        create_professional(client, index)
+    assert count_queries(queries, lambda: client.get('/api/professionals')) == 1
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_professional_detail(client, queries, size):
+    professional_id = create_professional(client, 0)
+    for index in range(size):
+        upload_professional_document(client, professional_id, index)
+    response = client.get('/api/professional', query_string={'professional_id': professional_id})
+    assert len(response.json['professional']['documents']) == size
+    # The professional, then its documents
+    assert count_queries(queries, lambda: client.get('/api/professional', query_string={
+        'professional_id': professional_id,
+    })) == 2
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_professional_document_download(client, queries, size):
+    professional_id = create_professional(client, 0)
+    for index in range(size):
+        upload_professional_document(client, professional_id, index)
+    document_id = client.get('/api/professional', query_string={
+        'professional_id': professional_id,
+    }).json['professional']['documents'][0]['id']
+    assert count_queries(queries, lambda: client.get('/api/professional/document', query_string={
+        'professional_id': professional_id, 'document_id': document_id,
+    })) == 1
@@ -0,0 +1,146 @@
+import functools
+import io
+import os
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from storage.storage import STORAGE_BACKENDS, LocalStorage, S3Storage, get_storage
+from tests.conftest import wait_for_background_tasks
+from tests.test_query_counts import create_project, upload_project_document
+
+"""
+Storage backends. S3Storage runs against moto's in-process S3, so the tests exercise the
+real boto3 calls without a bucket or credentials of their own.
+"""
+
+BUCKET = 'documents'
+PREFIX = 'tenant'
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    from moto import mock_aws
+
+    for name, value in {
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+    }.items():
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        storage = S3Storage(bucket=BUCKET, endpoint_url=None, region='us-east-1', prefix=PREFIX)
+        storage.client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+
+@pytest.fixture
+def s3_backend(app, s3, monkeypatch):
+    """Route every get_storage() call of the app to the mocked bucket."""
+    monkeypatch.setattr('storage.storage.STORAGE_BACKEND', 's3')
+    monkeypatch.setitem(STORAGE_BACKENDS, 's3', functools.partial(
+        S3Storage, bucket=BUCKET, endpoint_url=None, region='us-east-1', prefix=PREFIX,
+    ))
+    get_storage.cache_clear()
+    yield s3
+    # Thumbnails and ingest run in the background and must finish while S3 is still mocked
+    wait_for_background_tasks(app)
+    get_storage.cache_clear()
+
+
+def test_s3_round_trip(s3):
+    s3.save_stream('projects/1/plan.pdf', io.BytesIO(b'plan'))
+
+    assert s3.exists('projects/1/plan.pdf')
+    stored_object = s3.stat('projects/1/plan.pdf')
+    assert stored_object.size == 4
+    assert stored_object.etag and '"' not in stored_object.etag
+    assert stored_object.modified_at.tzinfo is not None
+    with s3.open('projects/1/plan.pdf') as stream:
+        assert stream.read() == b'plan'
+    assert [item['Key'] for item in s3.client.list_objects_v2(Bucket=BUCKET)['Contents']] == [
+        f'{PREFIX}/projects/1/plan.pdf',
+    ]
+
+    s3.delete('projects/1/plan.pdf')
+    assert not s3.exists('projects/1/plan.pdf')
+
+
+def test_s3_save_from_file(s3, tmp_path):
+    src_path = tmp_path / 'permit.pdf'
+    src_path.write_bytes(b'permit')
+    s3.save('projects/1/permit.pdf', str(src_path))
+
+    with s3.local_path('projects/1/permit.pdf') as path:
+        with open(path, 'rb') as local_file:
+            assert local_file.read() == b'permit'
+    assert not os.path.exists(path)
+
+
+def test_s3_missing_object(s3):
+    assert not s3.exists('projects/1/missing.pdf')
+    with pytest.raises(FileNotFoundError):
+        s3.stat('projects/1/missing.pdf')
+    with pytest.raises(FileNotFoundError):
+        s3.open('projects/1/missing.pdf')
+    # Deleting what is already gone is not an error
+    s3.delete('projects/1/missing.pdf')
+
+
+def test_s3_absolute_paths_map_onto_keys(s3):
+    from config.sys_config import DOCUMENTS_FOLDER
+
+    s3.save_stream(os.path.join(DOCUMENTS_FOLDER, 'projects', '1', 'plan.pdf'), io.BytesIO(b'plan'))
+    assert s3.exists('projects/1/plan.pdf')
+
+
+def test_send_document_redirects_to_a_presigned_url(app, s3, monkeypatch):
+    from app.download import send_document
+
+    s3.save_stream('projects/1/plan.pdf', io.BytesIO(b'plan'))
+    monkeypatch.setattr('app.download.get_storage', lambda: s3)
+    with app.test_request_context():
+        response = send_document('projects/1/plan.pdf', 'תוכנית.pdf')
+
+    assert response.status_code == 302
+    url = urlparse(response.location)
+    assert url.hostname.startswith(BUCKET)
+    assert url.path == f'/{PREFIX}/projects/1/plan.pdf'
+    query = parse_qs(url.query)
+    assert query['response-content-disposition'] == ["attachment; filename*=UTF-8''%D7%AA%D7%95%D7%9B%D7%A0%D7%99%D7%AA.pdf"]
+    assert 'Signature' in query and 'Expires' in query
+
+
+def test_document_download_redirects_to_the_bucket(client, s3_backend):
+    project_id = create_project(client)
+    upload_project_document(client, project_id, 0)
+    document = client.get('/api/project', query_string={'project_id': project_id}).json['project']['documents'][0]
+    keys = [item['Key'] for item in s3_backend.client.list_objects_v2(Bucket=BUCKET)['Contents']]
+    assert any(key.startswith(f'{PREFIX}/projects/{project_id}/') for key in keys)
+
+    response = client.get('/api/project/document', query_string={
+        'project_id': project_id, 'document_id': document['id'],
+    })
+    assert response.status_code == 302
+    assert f'{PREFIX}/projects/{project_id}/' in urlparse(response.location).path
+
+
+def test_local_save_replaces_the_file_whole(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    storage.save_stream('projects/1/plan.pdf', io.BytesIO(b'first'))
+    storage.save_stream('projects/1/plan.pdf', io.BytesIO(b'second'))
+    with storage.open('projects/1/plan.pdf') as stream:
+        assert stream.read() == b'second'
+    assert os.stat(storage.path('projects/1/plan.pdf')).st_mode & 0o777 == 0o644
+
+    class BrokenStream(io.BytesIO):
+        def read(self, *args):
+            raise OSError('connection reset')
+
+    with pytest.raises(OSError):
+        storage.save_stream('projects/1/plan.pdf', BrokenStream())
+    # The previous content survives a failed write, and no temporary file is left behind
+    with storage.open('projects/1/plan.pdf') as stream:
+        assert stream.read() == b'second'
+    assert os.listdir(tmp_path / 'projects' / '1') == ['plan.pdf']
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+from tests.test_query_counts import create_professional, create_project
+
+"""
+The /api/sync change feed: a full snapshot without a cursor, then the rows changed and
+the tombstones written since the cursor. Each poll looks back SyncManager.OVERLAP_SECONDS
+before its cursor, and a cursor older than the tombstone retention gets a fresh snapshot.
+"""
+
+
+def sync(client, since: str = None) -> dict:
+    response = client.get('/api/sync', query_string={'since': since} if since else {})
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def ids(items: list[dict]) -> set[str]:
+    return {item['id'] for item in items}
+
+
+def shift(app, column, delta: timedelta, *conditions) -> None:
+    """Move a timestamp column of the matching rows, as if they were written delta earlier or later."""
+    from database.database import db_session
+
+    with app.app_context():
+        # Shifted in Python: SQLite stores the timestamps as text and has no interval arithmetic
+        for row in db_session.query(column.class_).filter(*conditions):
+            setattr(row, column.key, getattr(row, column.key) + delta)
+        db_session.commit()
+
+
+def cursor_at(moment: datetime) -> str:
+    from app.api import SyncManager
+    from utils.pagination import encode_cursor
+
+    return encode_cursor(SyncManager.CURSOR_SORT, moment, None)
+
+
+def test_first_sync_is_a_snapshot(client):
+    project_id = create_project(client)
+    professional_id = create_professional(client, 0)
+    changes = sync(client)
+    assert changes['reset']
+    assert ids(changes['projects']) == {project_id}
+    assert ids(changes['professionals']) == {professional_id}
+    assert changes['deleted_projects'] == [] and changes['deleted_professionals'] == []
+    assert changes['cursor']
+
+
+def test_changes_since_the_cursor(client):
+    from data_model.models import Professional, Project
+
+    updated_id = create_project(client, 0)
+    unchanged_id = create_project(client, 1)
+    deleted_id = create_project(client, 2)
+    deleted_professional_id = create_professional(client, 0)
+    # Everything so far was synced long enough ago to be outside the next poll's overlap
+    shift(client.application, Project.updated_at, -timedelta(hours=1))
+    shift(client.application, Professional.updated_at, -timedelta(hours=1))
+    cursor = cursor_at(datetime.utcnow() - timedelta(minutes=30))
+
+    created_id = create_project(client, 3)
+    response = client.put('/api/project', json={
+        'id': updated_id, 'name': 'Renamed', 'request_number': 'R-0', 'permit_owner': 'Owner 0',
+        'status': 'Pre permit',
+    })
+    assert response.status_code == 200, response.json
+    assert client.delete('/api/project', json={'project_id': deleted_id}).status_code == 200
+    assert client.delete('/api/professional', json={'professional_id': deleted_professional_id}).status_code == 200
+
+    changes = sync(client, cursor)
+    assert not changes['reset']
+    assert ids(changes['projects']) == {created_id, updated_id}
+    assert unchanged_id not in ids(changes['projects'])
+    assert next(p for p in changes['projects'] if p['id'] == updated_id)['name'] == 'Renamed'
+    assert changes['professionals'] == []
+    assert changes['deleted_projects'] == [deleted_id]
+    assert changes['deleted_professionals'] == [deleted_professional_id]
+
+
+def test_cursor_round_trip(client):
+    from app.api import SyncManager
+    from data_model.models import Project
+
+    create_project(client, 0)
+    cursor = sync(client)['cursor']
+    # The next poll repeats what was written within the overlap before its cursor...
+    repeated = sync(client, cursor)
+    assert not repeated['reset']
+    assert len(repeated['projects']) == 1
+
+    # ...but not what is older than that
+    shift(client.application, Project.updated_at, -timedelta(seconds=SyncManager.OVERLAP_SECONDS * 2))
+    quiet = sync(client, cursor)
+    assert quiet['projects'] == [] and not quiet['reset']
+
+    created_id = create_project(client, 1)
+    assert ids(sync(client, quiet['cursor'])['projects']) == {created_id}
+
+
+def test_overlap_catches_rows_committed_after_the_cursor(client):
+    from app.api import SyncManager
+    from data_model.models import Project
+
+    cursor = sync(client)['cursor']
+    # A transaction that started before the poll stamps its rows earlier than the cursor
+    # but only commits after it
+    late_id = create_project(client)
+    shift(client.application, Project.updated_at, -timedelta(seconds=SyncManager.OVERLAP_SECONDS // 2),
+          Project.id == late_id)
+    assert ids(sync(client, cursor)['projects']) == {late_id}
+
+
+def test_stale_cursor_resets(client):
+    from app.api import SyncManager
+    from data_model.models import DeletedEntity, Project
+
+    kept_id = create_project(client, 0)
+    deleted_id = create_project(client, 1)
+    assert client.delete('/api/project', json={'project_id': deleted_id}).status_code == 200
+    shift(client.application, Project.updated_at, -timedelta(hours=1))
+    shift(client.application, DeletedEntity.deleted_at, -timedelta(hours=1))
+
+    stale = cursor_at(datetime.utcnow() - timedelta(days=SyncManager.TOMBSTONE_RETENTION_DAYS + 1))
+    changes = sync(client, stale)
+    # Tombstones that old may be pruned already, so the client starts over from a snapshot
+    assert changes['reset']
+    assert ids(changes['projects']) == {kept_id}
+    assert changes['deleted_projects'] == []
+
+
+def test_prune_tombstones(client):
+    from app.api import SyncManager
+    from data_model.models import DeletedEntity
+
+    expired_id = create_project(client, 0)
+    recent_id = create_project(client, 1)
+    for project_id in (expired_id, recent_id):
+        assert client.delete('/api/project', json={'project_id': project_id}).status_code == 200
+    shift(client.application, DeletedEntity.deleted_at,
+          -timedelta(days=SyncManager.TOMBSTONE_RETENTION_DAYS, hours=1), DeletedEntity.entity_id == expired_id)
+
+    with client.application.app_context():
+        assert SyncManager.prune_tombstones() == 1
+        assert SyncManager.prune_tombstones() == 0
+    cursor = cursor_at(datetime.utcnow() - timedelta(days=1))
+    assert sync(client, cursor)['deleted_projects'] == [recent_id]
+
+
+def test_invalid_cursor_is_rejected(client):
+    from utils.pagination import encode_cursor
+
+    assert client.get('/api/sync', query_string={'since': 'not-a-cursor'}).status_code == 400
+    other_sort = encode_cursor('name', 'Project 0', None)
+    assert client.get('/api/sync', query_string={'since': other_sort}).status_code == 400
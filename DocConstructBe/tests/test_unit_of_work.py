@@ -0,0 +1,104 @@
+import pytest
+
+from tests.test_query_counts import create_professional, create_project
+
+"""
+Managers only flush; whoever owns the unit of work commits or rolls it back. A manager
+that refuses a write raises its domain error and leaves the rollback to the request
+(commit_unit_of_work on a 4xx) or to unit_of_work(), which undoes everything the unit
+wrote, and a caller that wants to keep going wraps the attempt in a savepoint.
+"""
+
+
+def count_rows(app, model) -> int:
+    from database.database import db_session
+
+    with app.app_context():
+        return db_session.query(model).count()
+
+
+def create(name: str, request_number: str):
+    from app.api import ProjectManager
+    from data_model.enum import ProjectStatus
+    from data_model.models import PermitOwner
+
+    return ProjectManager.create(name=name, request_number=request_number, status=ProjectStatus.PRE_PERMIT,
+                                 permit_owner=PermitOwner(name='Dana', address='Herzl 1', phone='0501234567'))
+
+
+def test_conflicting_create_leaves_nothing_behind(client):
+    from data_model.models import PermitOwner, Project
+
+    create_project(client)
+    response = client.post('/api/project', json={
+        'name': 'Project 0', 'request_number': 'R-other', 'permit_owner': 'Another owner', 'status': 'Pre permit',
+    })
+    assert response.status_code == 400
+    # The permit owner flushed ahead of the refused project went with it
+    assert count_rows(client.application, Project) == 1
+    assert count_rows(client.application, PermitOwner) == 1
+
+
+def test_create_with_unknown_professionals_leaves_nothing_behind(client):
+    from data_model.models import PermitOwner, Project
+
+    response = client.post('/api/project', json={
+        'name': 'Tower', 'request_number': 'R-1', 'permit_owner': 'Dana', 'status': 'Pre permit',
+        'professionals': ['00000000-0000-0000-0000-000000000000'],
+    })
+    assert response.status_code == 400
+    assert count_rows(client.application, Project) == 0
+    assert count_rows(client.application, PermitOwner) == 0
+
+
+def test_conflicting_update_keeps_the_stored_project(client):
+    create_project(client, 0)
+    project_id = create_project(client, 1)
+    response = client.put('/api/project', json={
+        'id': project_id, 'name': 'Project 0', 'request_number': 'R-1', 'permit_owner': 'Owner 1',
+        'status': 'Pre permit',
+    })
+    assert response.status_code == 400
+    project = client.get('/api/project', query_string={'project_id': project_id}).json['project']
+    assert project['name'] == 'Project 1'
+
+
+def test_conflicting_professional_create_leaves_nothing_behind(client):
+    from data_model.models import Professional
+
+    create_professional(client, 0)
+    response = client.post('/api/professional', json={
+        'name': 'Twin', 'national_id': '100000', 'email': 'twin@example.com', 'phone': '0501234567',
+        'address': 'Herzl 1', 'license_number': 'L-twin', 'license_expiration_date': '2030-01-01',
+        'professional_type': 'אדריכל',
+    })
+    assert response.status_code == 400
+    assert count_rows(client.application, Professional) == 1
+
+
+def test_refused_write_rolls_back_the_whole_unit(app):
+    from app.errors import ProjectAlreadyExists
+    from data_model.models import Project
+    from database.database import unit_of_work
+
+    with app.app_context():
+        with pytest.raises(ProjectAlreadyExists):
+            with unit_of_work():
+                create('Tower', 'R-1')
+                create('Tower', 'R-2')
+    assert count_rows(app, Project) == 0
+
+
+def test_savepoint_keeps_the_progress_before_a_refused_write(app):
+    from app.errors import ProjectAlreadyExists
+    from data_model.models import Project
+    from database.database import db_session, unit_of_work
+
+    with app.app_context():
+        with unit_of_work():
+            create('Tower', 'R-1')
+            with pytest.raises(ProjectAlreadyExists):
+                with db_session.begin_nested():
+                    create('Tower', 'R-2')
+            create('Annex', 'R-3')
+    assert count_rows(app, Project) == 2
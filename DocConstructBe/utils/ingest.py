@@ -0,0 +1,90 @@
+import mimetypes
+import os
+import shutil
+import subprocess
+import tempfile
+
+from PIL import Image, ImageOps
+from PyPDF2 import PdfReader, PdfWriter
+
+from config.sys_config import INGEST_MIN_SIZE_BYTES, INGEST_IMAGE_MAX_DIMENSION, INGEST_IMAGE_QUALITY
+
+"""
+Upload Normalization Module
+
+Recompresses phone photos and scanner PDFs once at ingest time, so that every later
+download, preview and OCR pass works on the smaller file.
+"""
+
+IMAGE_FORMATS = {
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+}
+
+
+def _normalize_image(src_path: str, dest_path: str, image_format: str) -> None:
+    with Image.open(src_path) as image:
+        # Phones store rotation as EXIF; bake it in before the tag is dropped
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((INGEST_IMAGE_MAX_DIMENSION, INGEST_IMAGE_MAX_DIMENSION))
+        if image_format == 'JPEG':
+            image.convert('RGB').save(dest_path, format='JPEG', quality=INGEST_IMAGE_QUALITY,
+                                      optimize=True, progressive=True)
+        else:
+            image.save(dest_path, format='PNG', optimize=True)
+
+
+def _normalize_pdf(src_path: str, dest_path: str) -> bool:
+    qpdf = shutil.which('qpdf')
+    if qpdf:
+        # Linearized ("fast web view") so viewers can show page 1 before the download ends
+        subprocess.run(
+            [qpdf, '--linearize', '--object-streams=generate', '--recompress-flate',
+             '--compression-level=9', src_path, dest_path],
+            check=True,
+            capture_output=True,
+        )
+        return True
+    reader = PdfReader(src_path)
+    if '/AcroForm' in reader.trailer['/Root']:
+        # PyPDF2 rewrites pages but not the form tree, which the autofill relies on
+        return False
+    for page in reader.pages:
+        page.compress_content_streams()
+    # Appended whole rather than page by page, so the outline comes along too
+    writer = PdfWriter()
+    writer.append(reader)
+    if reader.metadata:
+        writer.add_metadata(reader.metadata)
+    with open(dest_path, 'wb') as f:
+        writer.write(f)
+    return True
+
+
+def normalize_file(src_path: str) -> str | None:
+    """
+    Write a recompressed copy of an image or PDF to a temporary file and return its path.
+    Returns None when the file is not worth touching or the copy would not be smaller.
+    """
+    original_size = os.path.getsize(src_path)
+    if original_size < INGEST_MIN_SIZE_BYTES:
+        return None
+    mime_type = mimetypes.guess_type(src_path)[0]
+    if mime_type not in IMAGE_FORMATS and mime_type != 'application/pdf':
+        return None
+
+    fd, dest_path = tempfile.mkstemp(suffix=os.path.splitext(src_path)[1])
+    os.close(fd)
+    try:
+        if mime_type == 'application/pdf':
+            normalized = _normalize_pdf(src_path, dest_path)
+        else:
+            _normalize_image(src_path, dest_path, IMAGE_FORMATS[mime_type])
+            normalized = True
+    except Exception:
+        os.remove(dest_path)
+        raise
+    if not normalized or os.path.getsize(dest_path) >= original_size:
+        os.remove(dest_path)
+        return None
+    return dest_path
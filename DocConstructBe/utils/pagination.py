@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, func, literal, tuple_
+from sqlalchemy.orm import Query
+
+from app.errors import ValidationError
+
+"""
+Keyset Pagination Module
+
+Pages are addressed by the (sort value, id) of the last row already seen rather than by
+an offset, so fetching any page is an index range scan that costs the same on page 1
+and page 1000, and rows inserted meanwhile do not shift later pages.
+
+The next page is the row-value range (sort value, id) > (last value, last id), or < when
+descending, which a (sort key, id) index serves directly in either direction. A nullable
+sort key has no such single range around its NULLs, so it is paged on
+coalesce(column, <end of the range>) instead: NULLs become the largest value ascending and
+the smallest descending, last either way, and each direction needs an expression index.
+"""
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _deserialize(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort: str, sort_value, row_id: str) -> str:
+    payload = json.dumps([sort, _serialize(sort_value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str, sort_column) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort:
+            raise ValueError('cursor belongs to a different sort order')
+        return _deserialize(sort_column, sort_value), row_id
+    except (ValueError, TypeError, binascii.Error):
+        raise ValidationError(params={"validation_errors": {"cursor": "Invalid cursor"}})
+
+
+# What a NULL sort value pages as: (ascending, descending), both past every real value
+NULL_SORT_VALUES = {
+    Date: (date.max, date.min),
+}
+
+
+def _null_sort_value(sort_column, descending: bool):
+    ascending_value, descending_value = NULL_SORT_VALUES[type(sort_column.type)]
+    return descending_value if descending else ascending_value
+
+
+def sort_expression(sort_column, descending: bool = False):
+    """The expression a sort key pages on, which its (expression, id) indexes must repeat."""
+    if not sort_column.nullable:
+        return sort_column
+    return func.coalesce(sort_column, literal(_null_sort_value(sort_column, descending), sort_column.type))
+
+
+def paginate(query: Query, sort: str, sort_column, id_column, limit: int, cursor: str = None,
+             descending: bool = False) -> tuple[list, str | None]:
+    """
+    Return one page of query ordered by (sort_column, id_column), NULLs last, and the cursor
+    for the next page, or None on the last page. The pair should be backed by a composite
+    index on (sort_expression(sort_column), id_column).
+    """
+    sort_key = sort_expression(sort_column, descending)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort, sort_column)
+        if sort_value is None and sort_column.nullable:
+            sort_value = _null_sort_value(sort_column, descending)
+        after = tuple_(sort_key, id_column)
+        last_seen = tuple_(literal(sort_value, sort_column.type), literal(row_id, id_column.type))
+        query = query.filter(after < last_seen if descending else after > last_seen)
+    if descending:
+        query = query.order_by(sort_key.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_key.asc(), id_column.asc())
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        sort_value = getattr(last_row, sort_column.key)
+        if sort_value is None:
+            sort_value = _null_sort_value(sort_column, descending)
+        next_cursor = encode_cursor(sort, sort_value, getattr(last_row, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,75 @@
+import functools
+
+from sqlalchemy import case, func, literal, or_, text
+from sqlalchemy.orm import Query
+
+"""
+Search Module
+
+Ranked, typo-tolerant matching of free text against a few columns of one table. On
+PostgreSQL the match runs against expression GIN indexes (tsvector for word prefixes,
+pg_trgm for fuzzy and substring matches) created in migration 0005. Other engines fall
+back to a plain case-insensitive substring match.
+"""
+
+# Hebrew has no stemmer, so documents are tokenized without language rules
+TEXT_SEARCH_CONFIG = 'simple'
+
+
+def search_document(*columns):
+    """The indexed text: columns joined with spaces, in the exact form used by the index expressions."""
+    document = func.coalesce(columns[0], literal(''))
+    for column in columns[1:]:
+        document = document + literal(' ') + func.coalesce(column, literal(''))
+    return document
+
+
+@functools.cache
+def has_trigram(bind) -> bool:
+    if bind.dialect.name != 'postgresql':
+        return False
+    with bind.connect() as connection:
+        return connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def _like_pattern(search_text: str) -> str:
+    escaped = search_text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _prefix_tsquery(search_text: str) -> str | None:
+    # Every word must appear, as a prefix since the last one may still be being typed.
+    # Quoting hands each word to the same parser that built the index, so "REQ-2002" or
+    # an email address is split there exactly as it was in the document.
+    words = [word.replace('\\', '\\\\').replace("'", "''") for word in search_text.split()]
+    if not words:
+        return None
+    return ' & '.join(f"'{word}':*" for word in words)
+
+
+def ranked_search(query: Query, id_column, columns: list, search_text: str) -> Query:
+    """Filter query to rows matching search_text and order them best match first."""
+    search_text = search_text.strip()
+    document = search_document(*columns)
+    substring_match = document.ilike(_like_pattern(search_text), escape='\\')
+    bind = query.session.get_bind()
+
+    if bind.dialect.name != 'postgresql':
+        rank = case((or_(*[column.ilike(f'{search_text}%') for column in columns]), 1), else_=0)
+        return query.filter(substring_match).order_by(rank.desc(), id_column)
+
+    conditions = []
+    ranks = []
+    tsquery_text = _prefix_tsquery(search_text)
+    if tsquery_text:
+        tsvector = func.to_tsvector(literal(TEXT_SEARCH_CONFIG), document)
+        tsquery = func.to_tsquery(literal(TEXT_SEARCH_CONFIG), tsquery_text)
+        conditions.append(tsvector.op('@@')(tsquery))
+        ranks.append(func.ts_rank(tsvector, tsquery))
+    if has_trigram(bind):
+        # Both are served by the trigram index, so the OR stays a bitmap index scan
+        conditions += [substring_match, document.op('%>')(search_text)]
+        ranks.append(func.word_similarity(search_text, document))
+    if not conditions:
+        return query.filter(substring_match).order_by(id_column)
+    return query.filter(or_(*conditions)).order_by(sum(ranks[1:], ranks[0]).desc(), id_column)
@@ -0,0 +1,116 @@
+import functools
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+
+import pdf2image
+from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError, PDFPopplerTimeoutError, PDFSyntaxError
+from PIL import Image
+
+from app.errors import DocumentPreviewNotAvailable
+from config.sys_config import THUMBNAILS_FOLDER, THUMBNAIL_WIDTH, THUMBNAIL_CACHE_MAX_BYTES
+from storage.storage import get_storage
+
+THUMBNAIL_QUALITY = 70
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# What a corrupt, truncated or oversized upload, or a missing poppler, raises while rendering;
+# PIL's UnidentifiedImageError and truncated-file errors are OSErrors
+RENDER_ERRORS = (
+    PDFInfoNotInstalledError,
+    PDFPageCountError,
+    PDFPopplerTimeoutError,
+    PDFSyntaxError,
+    Image.DecompressionBombError,
+    OSError,
+    ValueError,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _hash_object(key: str, etag: str, size: int) -> str:
+    # The storage etag and size are part of the cache key so a rewritten file is hashed again
+    digest = hashlib.sha256()
+    with get_storage().open(key) as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(key: str) -> str:
+    stored_object = get_storage().stat(key)
+    return _hash_object(key, stored_object.etag, stored_object.size)
+
+
+def is_previewable(file_path: str) -> bool:
+    mime_type = mimetypes.guess_type(file_path)[0] or ''
+    return mime_type == 'application/pdf' or mime_type.startswith('image/')
+
+
+def _render_first_page(file_path: str) -> Image.Image:
+    if mimetypes.guess_type(file_path)[0] == 'application/pdf':
+        pages = pdf2image.convert_from_path(file_path, first_page=1, last_page=1, size=(THUMBNAIL_WIDTH, None))
+        if not pages:
+            raise PDFPageCountError(f"{file_path} has no pages")
+        return pages[0].convert('RGB')
+    with Image.open(file_path) as image:
+        image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 4))
+        # Decoded here, so a truncated image fails with the other render errors
+        return image.convert('RGB')
+
+
+def _evict(max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES) -> None:
+    entries = []
+    total_size = 0
+    with os.scandir(THUMBNAILS_FOLDER) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                stat_result = entry.stat()
+                entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+                total_size += stat_result.st_size
+    for _, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+        except FileNotFoundError:
+            pass
+
+
+def get_thumbnail(key: str) -> tuple[str, str] | None:
+    """
+    Return (thumbnail_path, content_hash) for the first page of a stored document, rendering
+    it on a cache miss. Cache hits refresh the entry's mtime, which is what eviction orders by.
+    Raises DocumentPreviewNotAvailable when the document cannot be rendered.
+    """
+    if not key or not is_previewable(key):
+        return None
+    try:
+        file_hash = content_hash(key)
+    except FileNotFoundError:
+        return None
+    thumbnail_path = os.path.join(THUMBNAILS_FOLDER, f"{file_hash}.jpg")
+    if os.path.exists(thumbnail_path):
+        os.utime(thumbnail_path)
+        return thumbnail_path, file_hash
+
+    try:
+        with get_storage().local_path(key) as file_path:
+            image = _render_first_page(file_path)
+    except RENDER_ERRORS as e:
+        logging.warning(f"Error rendering a preview of {key}: {e}")
+        raise DocumentPreviewNotAvailable()
+    os.makedirs(THUMBNAILS_FOLDER, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=THUMBNAILS_FOLDER, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        os.replace(tmp_path, thumbnail_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    _evict()
+    return thumbnail_path, file_hash
@@ -0,0 +1,79 @@
+import os
+import time
+import zipfile
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+# Formats that are already compressed; deflating them again only burns CPU.
+# Scanned PDFs are mostly JPEG/CCITT image streams, so they are stored as well.
+STORED_EXTENSIONS = {
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.tif', '.tiff',
+    '.zip', '.gz', '.7z', '.rar', '.docx', '.xlsx', '.pptx', '.mp4',
+}
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable sink: zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _compress_type(arcname: str) -> int:
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def stream_zip(files: Iterable[tuple[str, str]], open_file: Callable[[str], BinaryIO]) -> Iterator[bytes]:
+    """
+    Generate a zip archive from (arcname, file_path) pairs chunk by chunk.
+    Neither the archive nor a whole member is ever held in memory or written to disk.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w') as archive:
+        for arcname, file_path in files:
+            try:
+                source = open_file(file_path)
+            except FileNotFoundError:
+                continue
+            zip_info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            zip_info.compress_type = _compress_type(arcname)
+            with source, archive.open(zip_info, mode='w', force_zip64=True) as member:
+                while chunk := source.read(CHUNK_SIZE):
+                    member.write(chunk)
+                    yield from _drain(buffer)
+            yield from _drain(buffer)
+    yield from _drain(buffer)
+
+
+def _drain(buffer: _ChunkBuffer) -> Iterator[bytes]:
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def unique_arcnames(names: Iterable[str]) -> Iterator[str]:
+    seen = set()
+    for name in names:
+        candidate = name
+        base, ext = os.path.splitext(name)
+        counter = 1
+        while candidate in seen:
+            candidate = f"{base} ({counter}){ext}"
+            counter += 1
+        seen.add(candidate)
+        yield candidate